@@ -1,19 +1,34 @@
+import sys
 import json
-import colorsys
 import os
+import hashlib
+import argparse
 import datetime
-from reportlab.pdfgen import canvas
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import cm
 
-# Global buffer for log messages
-output_buffer = []
+import numpy as np
 
-def log(message=""):
-    print(message)
-    output_buffer.append(message)
+from photo_color_stats import (BUCKET_COLORS, BUCKET_NAMES, NEUTRAL_SATURATION, compute_color_stats,
+                               get_bucket_counts, rgb_to_hsv)
+from photo_color_report import write_html_report, write_pdf_report, write_text_report
+from generate_photo_list import expand_variants, load_photo_data
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# 資料來源：generate_photo_list.py 產生的 data_photos.js (或分類分檔索引 data_photos_index.js)
+photo_js_dir = os.path.join(script_dir, 'public', 'js')
+# 上次分析結果 (資料來源雜湊 + 統計)，用來跳過未變更的資料與計算色彩分布變化
+snapshot_file = os.path.join(script_dir, '.color_stats_snapshot.json')
+
+# 地點色調：只列出照片數達此門檻的地點 (檔名前 4 字)，最多 report_location_limit 個 (依張數)
+location_min_photos = 3
+report_location_limit = 20
+# 縮圖聯絡表最多張數 (依主色色相排序後平均取樣)，讓 PDF 大小與產生時間不隨作品數增加
+contact_sheet_limit = 56
+
+# 結束碼
+EXIT_OK = 0
+EXIT_DATA_ERROR = 1
+EXIT_DRIFT = 2
 
 def get_translated_category(cat):
     """Translate categories to Chinese for display"""
@@ -27,176 +42,294 @@ def get_translated_category(cat):
     }
     return translations.get(cat, cat)
 
-def get_stats(items):
-    stats = {
-        "Red/Orange (Warm)": 0,
-        "Yellow (Warm)": 0,
-        "Green (Nature)": 0,
-        "Cyan/Blue (Sky/Water)": 0,
-        "Purple/Magenta": 0,
-        "Neutral/Grey/Dark": 0
-    }
-    
-    for item in items:
-        r, g, b = item['color']
-        h, s, v = colorsys.rgb_to_hsv(r/255.0, g/255.0, b/255.0)
-        h_deg = h * 360
-        
-        if s < 0.15: 
-            stats["Neutral/Grey/Dark"] += 1
-        else:
-            if (0 <= h_deg < 40) or (340 <= h_deg <= 360):
-                stats["Red/Orange (Warm)"] += 1
-            elif 40 <= h_deg < 70:
-                stats["Yellow (Warm)"] += 1
-            elif 70 <= h_deg < 160:
-                stats["Green (Nature)"] += 1
-            elif 160 <= h_deg < 260:
-                stats["Cyan/Blue (Sky/Water)"] += 1
-            elif 260 <= h_deg < 340:
-                stats["Purple/Magenta"] += 1
-    return stats
-
-def print_stats(title, stats, total_imgs):
-    log(f"\n--- {title} (共 {total_imgs} 張) ---")
-    for k, v in stats.items():
-        percentage = (v / total_imgs * 100) if total_imgs > 0 else 0
-        bar = "█" * int(percentage / 5)
-        k_zh = get_translated_category(k)
-        # Using ljust for alignment in text file (count double width chars)
-        # Simple padding approach for console
-        log(f"{k_zh:<18}: {bar} {v} ({percentage:.1f}%)")
-
-def generate_pdf(report_path_pdf, lines):
-    """Generate PDF using ReportLab"""
-    # 1. Register Font
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    font_path = os.path.join(script_dir, 'NotoSansTC-VariableFont_wght.ttf')
-    
-    # Fallback if font not found
-    if not os.path.exists(font_path):
-        print(f"Warning: Font not found at {font_path}. PDF might not show Chinese correctly.")
-        # Try to find bold one or just skip registration to avoid crash
-        font_path = os.path.join(script_dir, 'NotoSansTC-Bold.otf')
-        if not os.path.exists(font_path):
-             print(f"Error: No NotoSansTC font found.")
-             return
+def get_stats(items, use_palette=True):
+    """
+    色系分布 (NumPy 向量化，見 photo_color_stats.py)。
+    有 palette 時依色盤佔比加權，每張照片合計 1 張；否則只看主色。
+    """
+    return get_bucket_counts(items, use_palette)
 
-    try:
-        pdfmetrics.registerFont(TTFont('NotoSansTC', font_path))
-    except Exception as e:
-        print(f"Font registration failed: {e}")
-        return
-
-    c = canvas.Canvas(report_path_pdf, pagesize=A4)
-    width, height = A4
-    c.setFont("NotoSansTC", 12)
-    
-    y = height - 2 * cm
-    line_height = 0.6 * cm
-    
-    c.drawString(2*cm, y, f"LCT Studio 色調分析報告 (Generated: {datetime.datetime.now().strftime('%Y-%m-%d')})")
-    y -= line_height * 2
-    
-    for line in lines:
-        if y < 2 * cm: # New page
-            c.showPage()
-            c.setFont("NotoSansTC", 12)
-            y = height - 2 * cm
-        
-        # Simple cleanup for unicode bars in PDF if font doesn't support them perfectly, 
-        # but NotoSans usually handles them. 
-        c.drawString(2*cm, y, line)
-        y -= line_height
-
-    c.save()
-    print(f"\nPDF Report saved to: {report_path_pdf}")
-
-def analyze_photos():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    json_path = os.path.join(script_dir, 'public', 'photos.json')
-    report_path_txt = os.path.join(script_dir, 'color_analysis_report.txt')
-    report_path_pdf = os.path.join(script_dir, 'color_analysis_report.pdf')
-
-    log(f"讀取資料來源: {json_path}")
-    log(f"報表產生時間: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-
-    if not os.path.exists(json_path):
-        log("錯誤: 找不到 photos.json。請先執行 generate_photo_list.py。")
-        input("請按 Enter 結束...")
-        return
+def get_source_signature(js_dir):
+    """
+    資料來源的內容雜湊。分類分檔時只需雜湊索引檔 (索引已含各分類檔的內容雜湊)。
+    找不到資料檔時回傳 None。
+    """
+    for filename in ('data_photos.js', 'data_photos_index.js'):
+        path = os.path.join(js_dir, filename)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                return {"file": filename, "sha256": hashlib.sha256(f.read()).hexdigest()}
+    return None
 
+
+def load_snapshot(path):
+    if not os.path.exists(path):
+        return None
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
     except Exception as e:
-        log(f"讀取 JSON 發生錯誤: {e}")
-        input("請按 Enter 結束...")
-        return
-
-    # 1. Collect Data
-    all_items = []
-    
-    log("\n" + "="*30)
-    log("      詳細分析 (Detailed Analysis)      ")
-    log("="*30)
-
-    for category, items in data.items():
-        if category == "assets": continue
-        all_items.extend(items)
-        cat_stats = get_stats(items)
-        print_stats(category, cat_stats, len(items))
+        print(f"警告：無法讀取上次分析結果 '{path}' ({e})，將重新計算。", file=sys.stderr)
+        return None
 
-    # 2. Total Stats
-    total_stats = get_stats(all_items)
-    print_stats("所有照片總計 (All Photos)", total_stats, len(all_items))
-
-    # 3. Recommendations (Chinese)
-    log("\n" + "="*30)
-    log("      拍攝建議與推薦 (Recommendations)      ")
-    log("="*30)
-    
-    total_imgs = len(all_items)
-    found_missing = False
-    
+
+def save_snapshot(path, snapshot):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def get_bucket_shares(group):
+    count = group["count"]
+    return {name: (group["buckets"][name] / count * 100 if count else 0.0) for name in BUCKET_NAMES}
+
+
+def get_drift(current, previous):
+    """
+    與上次分析相比，總計與各分類的色系佔比變化 (百分點)。
+    回傳 {"total": {色系: 變化}, "categories": {分類: {色系: 變化}}}；沒有上次結果時回傳 None。
+    """
+    if not previous:
+        return None
+
+    def diff(now, before):
+        now_shares = get_bucket_shares(now)
+        before_shares = get_bucket_shares(before) if before else {name: 0.0 for name in BUCKET_NAMES}
+        return {name: round(now_shares[name] - before_shares[name], 2) for name in BUCKET_NAMES}
+
+    return {
+        "total": diff(current["total"], previous.get("total")),
+        "categories": {
+            category: diff(group, previous.get("categories", {}).get(category))
+            for category, group in current["categories"].items()
+        },
+    }
+
+
+def get_max_drift(drift):
+    if not drift:
+        return 0.0
+    values = list(drift["total"].values())
+    for category_drift in drift["categories"].values():
+        values.extend(category_drift.values())
+    return max((abs(v) for v in values), default=0.0)
+
+
+def get_recommendations(total_stats, total_imgs):
+    """依總計色系分布回傳 [(缺乏的色調, 建議拍攝題材), ...]。"""
+    recommendations = []
     if total_stats["Red/Orange (Warm)"] + total_stats["Yellow (Warm)"] < (total_imgs * 0.2):
-        log("\n[缺乏] 暖色調 (紅/橘/黃)")
-        log("  -> 建議拍攝: 夕陽、廟宇建築、夜市燈火、紅磚老街、秋天楓紅。")
-        found_missing = True
-    
+        recommendations.append(("暖色調 (紅/橘/黃)", "夕陽、廟宇建築、夜市燈火、紅磚老街、秋天楓紅。"))
     if total_stats["Cyan/Blue (Sky/Water)"] < (total_imgs * 0.2):
-        log("\n[缺乏] 藍色調")
-        log("  -> 建議拍攝: 晴朗藍天、海洋、現代玻璃帷幕建築、藍調時刻(Blue Hour)。")
-        found_missing = True
-        
+        recommendations.append(("藍色調", "晴朗藍天、海洋、現代玻璃帷幕建築、藍調時刻(Blue Hour)。"))
     if total_stats["Green (Nature)"] < (total_imgs * 0.2):
-         log("\n[缺乏] 綠色調")
-         log("  -> 建議拍攝: 森林、山脈、公園綠地、稻田或茶園。")
-         found_missing = True
-         
+        recommendations.append(("綠色調", "森林、山脈、公園綠地、稻田或茶園。"))
     if total_stats["Purple/Magenta"] < (total_imgs * 0.05):
-        log("\n[缺乏] 紫色/洋紅")
-        log("  -> 建議拍攝: 城市霓虹燈 (賽博龐克風)、繡球花/薰衣草花田、日出霞光。")
-        found_missing = True
-        
-    if not found_missing:
-        log("\n太棒了！您的作品集色彩分佈非常均衡。")
-
-    log("\n" + "="*30)
-    
-    # 4. Save Logs to Files
-    # Save TXT
+        recommendations.append(("紫色/洋紅", "城市霓虹燈 (賽博龐克風)、繡球花/薰衣草花田、日出霞光。"))
+    return recommendations
+
+
+def get_color_analysis(js_dir=photo_js_dir, snapshot_path=snapshot_file):
+    """
+    讀取資料並計算色彩統計。資料來源雜湊與上次分析相同時直接沿用上次結果，不重新解析。
+    回傳 (analysis, previous_stats)，previous_stats 為上一版資料的統計 (用於計算變化)；
+    找不到或無法解析資料時丟出例外。
+    """
+    signature = get_source_signature(js_dir)
+    if signature is None:
+        raise FileNotFoundError(os.path.join(js_dir, 'data_photos.js'))
+
+    snapshot = load_snapshot(snapshot_path)
+    if snapshot and snapshot.get("source") == signature:
+        return {"source": signature, "cached": True, "stats": snapshot["stats"]}, snapshot.get("previous_stats")
+
+    photo_data = load_photo_data(js_dir)
+    stats = compute_color_stats(photo_data)
+    previous_stats = snapshot.get("stats") if snapshot else None
+    save_snapshot(snapshot_path, {
+        "source": signature,
+        "generated": datetime.datetime.now().isoformat(timespec='seconds'),
+        "stats": stats,
+        "previous_stats": previous_stats,
+    })
+    return {"source": signature, "cached": False, "stats": stats}, previous_stats
+
+
+def get_bucket_items(buckets):
+    return [{"label": get_translated_category(name), "value": buckets[name], "color": BUCKET_COLORS[name]}
+            for name in BUCKET_NAMES]
+
+
+def select_contact_sheet_photos(all_photo_data, js_dir, limit=contact_sheet_limit):
+    """
+    依主色色相排序所有照片，平均取樣最多 limit 張作為聯絡表。
+    使用已輸出的網站照片，有響應式版本時取最小的 JPEG。
+    """
+    photos = []
+    for category, items in all_photo_data.items():
+        for item in items:
+            if not item.get("color"):
+                continue
+            jpeg_variants = [v for v in expand_variants(item.get("variants")) if v["format"] == "jpg"]
+            filename = min(jpeg_variants, key=lambda v: v["width"])["file"] if jpeg_variants else item["filename"]
+            path = os.path.join(os.path.dirname(js_dir), 'photos', category, filename)
+            if not os.path.exists(path):
+                continue
+            photos.append({
+                "path": path,
+                "label": item["filename"],
+                "color": list(item["color"]),
+            })
+    if not photos:
+        return []
+
+    hsv = rgb_to_hsv(np.array([photo["color"] for photo in photos], dtype=np.float64))
+    # 中性色排在最後，其餘依色相排列
+    order = np.lexsort((hsv[:, 0], hsv[:, 1] < NEUTRAL_SATURATION))
+    if len(order) > limit:
+        order = order[np.linspace(0, len(order) - 1, limit).round().astype(int)]
+    return [photos[i] for i in order]
+
+
+def iter_report_sections(analysis, js_dir, recommendations, drift, largest_drift, contact_photos):
+    """依序產生報告段落 (見 photo_color_report.py)；每種輸出格式各自走訪一次，不保留全域緩衝。"""
+    color_stats = analysis["stats"]
+    total = color_stats["total"]
+
+    yield {"type": "title", "text": f"LCT Studio 色調分析報告 (Generated: {datetime.datetime.now().strftime('%Y-%m-%d')})"}
+    yield {"type": "text", "text": f"讀取資料來源: {os.path.join(js_dir, analysis['source']['file'])}"}
+    yield {"type": "text", "text": f"報表產生時間: {datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"}
+
+    # 1. Category Stats (all categories and locations were computed in one vectorized pass)
+    yield {"type": "heading", "text": "詳細分析 (Detailed Analysis)"}
+    for category, cat_stats in color_stats["categories"].items():
+        yield {"type": "buckets", "title": category, "count": cat_stats["count"],
+               "items": get_bucket_items(cat_stats["buckets"])}
+
+    # 2. Total Stats
+    yield {"type": "buckets", "title": "所有照片總計 (All Photos)", "count": total["count"],
+           "items": get_bucket_items(total["buckets"])}
+    yield {"type": "hue_wheel", "title": "色相分布 (Hue Wheel，不含中性色)", "bins": total["hue"]}
+    yield {"type": "stacked_bars", "title": "各分類色系比例 (By Category)",
+           "rows": [{"label": category, "count": cat_stats["count"], "items": get_bucket_items(cat_stats["buckets"])}
+                    for category, cat_stats in color_stats["categories"].items()]}
+
+    # 3. Location Stats (filename prefix)
+    locations = sorted(
+        ((name, loc) for name, loc in color_stats["locations"].items() if loc["count"] >= location_min_photos),
+        key=lambda pair: -pair[1]["count"])[:report_location_limit]
+    if locations:
+        yield {"type": "heading", "text": "地點色調 (By Location)"}
+        yield {"type": "stacked_bars", "title": f"照片數最多的 {len(locations)} 個地點 (檔名前 4 字)",
+               "rows": [{"label": name, "count": loc["count"], "items": get_bucket_items(loc["buckets"])}
+                        for name, loc in locations]}
+
+    # 4. Recommendations (Chinese)
+    yield {"type": "heading", "text": "拍攝建議與推薦 (Recommendations)"}
+    for missing, suggestion in recommendations:
+        yield {"type": "text", "text": f"[缺乏] {missing}"}
+        yield {"type": "text", "text": f"  -> 建議拍攝: {suggestion}"}
+    if not recommendations:
+        yield {"type": "text", "text": "太棒了！您的作品集色彩分佈非常均衡。"}
+
+    # 5. Drift since last analysis
+    if drift:
+        yield {"type": "heading", "text": "與上次分析比較 (Drift)"}
+        for name, delta in drift["total"].items():
+            if delta:
+                yield {"type": "text", "text": f"{get_translated_category(name):<18}: {delta:+.1f} 個百分點"}
+        yield {"type": "text", "text": f"最大變化: {largest_drift:.1f} 個百分點"}
+
+    # 6. Contact Sheet
+    if contact_photos:
+        yield {"type": "heading", "text": "作品縮圖 (Contact Sheet)"}
+        yield {"type": "contact_sheet", "title": "依主色色相排列", "photos": contact_photos}
+
+
+def analyze_photos(js_dir=photo_js_dir, snapshot_path=snapshot_file, as_json=False, write_reports=True,
+                   max_drift=None):
+    """
+    執行色調分析並回傳結束碼：0 正常、1 找不到或無法解析資料、2 色系佔比變化超過 max_drift 百分點。
+    as_json=True 時只在 stdout 輸出 JSON，不寫報表；write_reports=False 時只在終端機顯示。
+    """
     try:
-        with open(report_path_txt, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(output_buffer))
-        print(f"\n文字報表已儲存至: {report_path_txt}")
+        analysis, previous_stats = get_color_analysis(js_dir, snapshot_path)
+    except FileNotFoundError as e:
+        print(f"錯誤: 找不到照片資料 {e}。請先執行 generate_photo_list.py。", file=sys.stderr)
+        return EXIT_DATA_ERROR
     except Exception as e:
-        print(f"\n儲存文字報表失敗: {e}")
+        print(f"讀取照片資料發生錯誤: {e}", file=sys.stderr)
+        return EXIT_DATA_ERROR
+
+    color_stats = analysis["stats"]
+    total_stats = color_stats["total"]["buckets"]
+    total_imgs = color_stats["total"]["count"]
+    recommendations = get_recommendations(total_stats, total_imgs)
+    drift = get_drift(color_stats, previous_stats)
+    largest_drift = get_max_drift(drift)
+    exit_code = EXIT_DRIFT if max_drift is not None and largest_drift > max_drift else EXIT_OK
+
+    if as_json:
+        print(json.dumps({
+            "source": analysis["source"],
+            "cached": analysis["cached"],
+            "stats": color_stats,
+            "recommendations": [{"missing": missing, "suggestion": suggestion} for missing, suggestion in recommendations],
+            "drift": drift,
+            "max_drift": largest_drift,
+            "exit_code": exit_code,
+        }, ensure_ascii=False, indent=2))
+        return exit_code
+
+    def make_sections():
+        return iter_report_sections(analysis, js_dir, recommendations, drift, largest_drift, contact_photos)
+
+    if not write_reports:
+        contact_photos = []
+        write_text_report(make_sections())
+        return exit_code
+
+    try:
+        contact_photos = select_contact_sheet_photos(load_photo_data(js_dir), js_dir)
+    except Exception as e:
+        print(f"警告：無法讀取照片清單，略過縮圖聯絡表 ({e})", file=sys.stderr)
+        contact_photos = []
+
+    # 每種格式各自逐段輸出同一份段落內容 (統計已算好，產生段落不需重新計算)
+    report_paths = {
+        "txt": os.path.join(script_dir, 'color_analysis_report.txt'),
+        "pdf": os.path.join(script_dir, 'color_analysis_report.pdf'),
+        "html": os.path.join(script_dir, 'color_analysis_report.html'),
+    }
+    writers = {
+        "txt": lambda path: write_text_report(make_sections(), path),
+        "pdf": lambda path: write_pdf_report(make_sections(), path),
+        "html": lambda path: write_html_report(make_sections(), path),
+    }
+    for fmt, path in report_paths.items():
+        try:
+            writers[fmt](path)
+            print(f"{fmt.upper()} 報表已儲存至: {path}")
+        except Exception as e:
+            print(f"儲存 {fmt.upper()} 報表失敗: {e}", file=sys.stderr)
+
+    return exit_code
+
 
-    # Generate PDF
-    generate_pdf(report_path_pdf, output_buffer)
+def parse_args():
+    parser = argparse.ArgumentParser(description="作品集色調分析 (讀取 data_photos.js，不需互動)")
+    parser.add_argument('--data-dir', default=photo_js_dir,
+                        help="data_photos.js (或 data_photos_index.js) 所在資料夾，預設 public/js")
+    parser.add_argument('--snapshot', default=snapshot_file,
+                        help="上次分析結果檔，用於跳過未變更的資料與計算色彩分布變化")
+    parser.add_argument('--json', action='store_true', help="只在 stdout 輸出 JSON (統計、建議與變化)，不寫報表")
+    parser.add_argument('--no-report', action='store_true', help="不寫出 TXT/PDF/HTML 報表")
+    parser.add_argument('--max-drift', type=float, default=None,
+                        help="任一色系佔比變化超過此百分點時以結束碼 2 結束")
+    return parser.parse_args()
 
-    input("\n分析完成。請按 Enter 鍵關閉視窗...")
 
 if __name__ == "__main__":
-    analyze_photos()
+    args = parse_args()
+    sys.exit(analyze_photos(args.data_dir, args.snapshot, args.json, not args.no_report, args.max_drift))
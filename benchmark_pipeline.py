@@ -0,0 +1,391 @@
+import os
+import sys
+import json
+import time
+import shutil
+import hashlib
+import argparse
+import datetime
+import platform
+import subprocess
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import ExifTags, Image, __version__ as pillow_version
+
+try:
+    import resource
+except ImportError:  # Windows 沒有 resource 模組，峰值記憶體不列入
+    resource = None
+
+import generate_photo_list as gpl
+from photo_colors import get_color_proxy, get_palette
+from photo_metadata import scan_metadata
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# 測試結果、基準線與合成照片都放在 .benchmarks/ (不進版控；基準線只在同一台機器上比較才有意義)
+benchmark_dir = os.path.join(script_dir, '.benchmarks')
+latest_result_file = os.path.join(benchmark_dir, 'latest.json')
+baseline_file = os.path.join(benchmark_dir, 'baseline.json')
+
+# 合成照片規格 (寬, 高, 格式, 是否含 GPS)；以固定種子產生，同一規格每次內容相同並會快取
+# 'standard'：接近實際空拍原檔 (12-48 MP)；'quick'：縮小版，用於快速檢查
+corpus_profiles = {
+    'standard': [
+        (4000, 3000, 'jpg', True),   # 12 MP 4:3
+        (5472, 3648, 'jpg', True),   # 20 MP 3:2
+        (8000, 6000, 'jpg', True),   # 48 MP 4:3
+        (3840, 2160, 'jpg', False),  # 4K 16:9 影格截圖
+        (3000, 4000, 'jpg', True),   # 直幅
+        (6000, 2000, 'png', False),  # 3:1 全景 PNG
+        (4000, 3000, 'png', True),   # PNG + EXIF GPS
+    ],
+    'quick': [
+        (2000, 1500, 'jpg', True),
+        (2400, 1600, 'jpg', False),
+        (1500, 2000, 'jpg', True),
+        (3000, 1000, 'png', False),
+    ],
+}
+corpus_seed = 2026
+
+# 測試階段：建置實際呼叫的函式單獨計時 (scan_metadata：EXIF 掃描；color_palette：色彩分析小圖與色盤)，
+# end_to_end 在暫存網站目錄以 generate_photo_list.py --full 完整建置
+STAGES = ['scan_metadata', 'color_palette', 'process_image', 'end_to_end']
+result_version = 2
+
+# 與基準線比較：吞吐量下降、p95 延遲或峰值記憶體上升超過此比例，且差距超過絕對門檻時才視為退步
+# (毫秒以下的階段相對變化幾乎都是雜訊)；延遲以每張照片重複 --repeat 次中最快的一次計算
+default_tolerance = 0.15
+default_noise_floor_ms = 1.0  # 單張延遲差距小於此值不算退步
+memory_noise_floor_mb = 5.0   # 峰值記憶體差距小於此值不算退步
+
+# 結束碼
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_REGRESSION = 2
+
+
+def get_corpus_dir(profile):
+    spec = json.dumps([corpus_seed, corpus_profiles[profile]])
+    return os.path.join(benchmark_dir, 'corpus', f"{profile}-{hashlib.sha256(spec.encode()).hexdigest()[:10]}")
+
+
+def get_gps_exif(index):
+    """模擬空拍機原檔的 EXIF：機型、拍攝時間與 GPS (每張位置略有不同)。"""
+    exif = Image.Exif()
+    exif[271] = 'DJI'
+    exif[272] = 'FC3582'
+    exif.get_ifd(ExifTags.IFD.Exif)[36867] = f'2026:03:{index + 1:02d} 10:20:30'
+    gps = exif.get_ifd(ExifTags.IFD.GPSInfo)
+    gps[1] = 'N'
+    gps[2] = (25.0, float(index), 32.4)
+    gps[3] = 'E'
+    gps[4] = (121.0, 28.0, float(8 + index))
+    gps[6] = 120.5
+    return exif
+
+
+def make_synthetic_photo(width, height, rng):
+    """
+    產生類似空拍照片的影像：低頻色塊 (地形/色調) 放大後疊上漸層與細節雜訊，
+    讓 JPEG 編碼與色彩量化的成本接近真實照片 (純色或純雜訊都會失真)。
+    分段處理，48 MP 也不需要整張 float 陣列。
+    """
+    terrain = Image.fromarray(rng.integers(0, 256, size=(12, 16, 3), dtype=np.uint8))
+    base = np.asarray(terrain.resize((width, height), Image.Resampling.BICUBIC))
+    out = np.empty((height, width, 3), dtype=np.uint8)
+    shade = np.linspace(-30, 30, width, dtype=np.float32)
+    for top in range(0, height, 512):
+        block = base[top:top + 512].astype(np.int16)
+        block += shade.astype(np.int16)[None, :, None]
+        block += rng.integers(-18, 19, size=block.shape[:2], dtype=np.int16)[:, :, None]
+        out[top:top + 512] = np.clip(block, 0, 255)
+    return Image.fromarray(out)
+
+
+def ensure_corpus(profile):
+    """建立 (或沿用快取的) 合成照片集，回傳 [(路徑, 百萬像素), ...]。"""
+    corpus_dir = get_corpus_dir(profile)
+    spec = corpus_profiles[profile]
+    paths = [os.path.join(corpus_dir, f"{i:02d}_{w}x{h}{'_gps' if gps else ''}.{fmt}")
+             for i, (w, h, fmt, gps) in enumerate(spec)]
+    if not all(os.path.exists(p) for p in paths):
+        print(f"產生合成照片 ({profile}，{len(spec)} 張) -> {corpus_dir}")
+        shutil.rmtree(corpus_dir, ignore_errors=True)
+        os.makedirs(corpus_dir)
+        rng = np.random.default_rng(corpus_seed)
+        for i, ((w, h, fmt, gps), path) in enumerate(zip(spec, paths)):
+            img = make_synthetic_photo(w, h, rng)
+            options = {"exif": get_gps_exif(i)} if gps else {}
+            if fmt == 'jpg':
+                img.save(path, quality=92, **options)
+            else:
+                img.save(path, compress_level=1, **options)
+    return [(path, w * h / 1e6) for path, (w, h, _, _) in zip(paths, spec)]
+
+
+def get_peak_rss_mb(children=False):
+    """本 process (或已結束的子 process) 的峰值 RSS (MB)；ru_maxrss 在 macOS 為 bytes，Linux 為 KB。"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def time_calls(corpus, repeat, call):
+    """
+    對每張照片執行 repeat 次 call(path)，回傳每張最快一次的延遲 (秒) 與對應的百萬像素。
+    取最小值排除排程與快取造成的偶發延遲，兩次執行相同程式碼的結果才穩定。
+    """
+    # 先以第一張暖機一次 (不計入)，排除延遲載入模組與外掛的一次性成本
+    call(corpus[0][0])
+    best = [min(call(path) for _ in range(repeat)) for path, _ in corpus]
+    return best, [mp for _, mp in corpus]
+
+
+def bench_metadata(path):
+    # 與建置相同：scan_metadata() 自行開檔並只讀檔頭
+    start = time.perf_counter()
+    scan_metadata(path)
+    return time.perf_counter() - start
+
+
+def bench_color_palette(path):
+    # 與建置相同：由主要輸出尺寸的圖建立色彩分析小圖並計算色盤；解碼與縮放在計時外完成
+    with Image.open(path) as img:
+        width = min(gpl.portfolio_resize_width, img.width)
+        img.draft('RGB', (width, round(img.height * width / img.width)))
+        output = img.convert('RGB').resize((width, round(img.height * width / img.width)), Image.Resampling.LANCZOS)
+    start = time.perf_counter()
+    get_palette(get_color_proxy(output), gpl.palette_size, gpl.color_engine)
+    return time.perf_counter() - start
+
+
+def run_stage(stage, corpus, repeat, jobs):
+    """
+    在獨立的 process 執行單一階段 (由 ProcessPoolExecutor 呼叫)，峰值記憶體才不會被其他階段影響。
+    回傳 {"latencies" (每張最快一次), "megapixels", "peak_rss_mb"}。
+    """
+    devnull = open(os.devnull, 'w', encoding='utf-8')
+    stdout, sys.stdout = sys.stdout, devnull  # 隱藏 process_image() 的逐張訊息
+    try:
+        with tempfile.TemporaryDirectory(prefix='photo-bench-') as work_dir:
+            if stage == 'scan_metadata':
+                latencies, megapixels = time_calls(corpus, repeat, bench_metadata)
+            elif stage == 'color_palette':
+                latencies, megapixels = time_calls(corpus, repeat, bench_color_palette)
+            elif stage == 'process_image':
+                variant_formats = gpl.get_variant_formats()
+
+                def bench_process(path):
+                    output_path = os.path.join(work_dir, os.path.splitext(os.path.basename(path))[0] + '.jpg')
+                    call_start = time.perf_counter()
+                    success = gpl.process_image(path, output_path, gpl.portfolio_resize_width,
+                                                variant_widths=gpl.responsive_widths, variant_formats=variant_formats,
+                                                extract_gps=False)[0]
+                    if not success:
+                        raise RuntimeError(f"process_image 失敗: {path}")
+                    return time.perf_counter() - call_start
+
+                latencies, megapixels = time_calls(corpus, repeat, bench_process)
+            else:
+                latencies, megapixels = run_end_to_end(corpus, repeat, jobs, work_dir)
+    finally:
+        sys.stdout = stdout
+        devnull.close()
+
+    return {"latencies": latencies, "megapixels": megapixels,
+            "peak_rss_mb": get_peak_rss_mb(children=stage == 'end_to_end')}
+
+
+def run_end_to_end(corpus, repeat, jobs, work_dir):
+    """
+    在暫存目錄建立最小網站 (腳本、模組、字型與 photos/<分類>)，執行 repeat 次 generate_photo_list.py --full。
+    最快一次建置的總時間除以張數作為單張延遲。
+    """
+    for name in os.listdir(script_dir):
+        if name == 'generate_photo_list.py' or (name.startswith('photo_') and name.endswith('.py')):
+            shutil.copy(os.path.join(script_dir, name), work_dir)
+    if os.path.exists(os.path.join(script_dir, gpl.font_file)):
+        shutil.copy(os.path.join(script_dir, gpl.font_file), work_dir)
+    for i, (path, _) in enumerate(corpus):
+        category_dir = os.path.join(work_dir, gpl.source_parent_folder, gpl.portfolio_categories[i % len(gpl.portfolio_categories)])
+        os.makedirs(category_dir, exist_ok=True)
+        shutil.copy(path, category_dir)
+
+    builds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, 'generate_photo_list.py', '--full', '--jobs', str(jobs)],
+                                cwd=work_dir, capture_output=True, text=True, encoding='utf-8', errors='replace')
+        if result.returncode != 0:
+            raise RuntimeError(f"generate_photo_list.py 結束碼 {result.returncode}: {result.stderr[-500:]}")
+        builds.append(time.perf_counter() - start)
+    return [min(builds) / len(corpus)] * len(corpus), [mp for _, mp in corpus]
+
+
+def get_percentile(values, percent):
+    return float(np.percentile(values, percent)) if values else None
+
+
+def summarize_stage(stage, raw):
+    count = len(raw["latencies"])
+    busy = sum(raw["latencies"])
+    megapixels = sum(raw["megapixels"])
+    return {
+        "images": count,
+        "seconds": round(busy, 4),
+        "images_per_sec": round(count / busy, 3) if busy else None,
+        "mp_per_sec": round(megapixels / busy, 3) if busy else None,
+        # end_to_end 只有整批時間，不提供單張分位數
+        "p50_ms": None if stage == 'end_to_end' else round(get_percentile(raw["latencies"], 50) * 1000, 3),
+        "p95_ms": None if stage == 'end_to_end' else round(get_percentile(raw["latencies"], 95) * 1000, 3),
+        "peak_rss_mb": raw["peak_rss_mb"],
+    }
+
+
+def run_benchmark(profile, stages, repeat, jobs):
+    corpus = ensure_corpus(profile)
+    result = {
+        "version": result_version,
+        "created": datetime.datetime.now().isoformat(timespec='seconds'),
+        "machine": {
+            "python": platform.python_version(),
+            "pillow": pillow_version,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "corpus": {
+            "profile": profile,
+            "images": len(corpus),
+            "megapixels": round(sum(mp for _, mp in corpus), 2),
+        },
+        "repeat": repeat,
+        "jobs": jobs,
+        "stages": {},
+    }
+    for stage in stages:
+        print(f"執行 {stage} ...")
+        # 每個階段使用全新的 process (spawn，不繼承本 process 的記憶體)，峰值記憶體互不影響
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            raw = executor.submit(run_stage, stage, corpus, repeat, jobs).result()
+        result["stages"][stage] = summarize_stage(stage, raw)
+    return result
+
+
+def format_value(value, digits=1):
+    return '--' if value is None else f"{value:,.{digits}f}"
+
+
+def print_result(result):
+    corpus = result["corpus"]
+    print(f"\n合成照片 {corpus['profile']}：{corpus['images']} 張，{corpus['megapixels']} MP，每張重複 {result['repeat']} 次取最快")
+    print(f"{'階段':<20}{'張/秒':>10}{'MP/秒':>10}{'p50 ms':>10}{'p95 ms':>10}{'峰值 MB':>10}")
+    for stage, stats in result["stages"].items():
+        print(f"{stage:<22}{format_value(stats['images_per_sec'], 2):>10}{format_value(stats['mp_per_sec'], 1):>10}"
+              f"{format_value(stats['p50_ms'], 2):>10}{format_value(stats['p95_ms'], 2):>10}{format_value(stats['peak_rss_mb']):>10}")
+
+
+def get_latency_change_ms(old_images_per_sec, new_images_per_sec):
+    """吞吐量 (張/秒) 換算成平均單張延遲後增加的毫秒數；缺少數值時回傳無限大 (只依相對變化判斷)。"""
+    if not old_images_per_sec or not new_images_per_sec:
+        return float('inf')
+    return 1000 / new_images_per_sec - 1000 / old_images_per_sec
+
+
+def compare_with_baseline(result, baseline, tolerance, noise_floor_ms=default_noise_floor_ms):
+    """
+    回傳退步項目列表 [(階段, 指標, 基準值, 本次值), ...]；只比較雙方都有的階段與數值。
+    相對變化超過 tolerance，且絕對差距超過雜訊門檻 (延遲 noise_floor_ms、記憶體 memory_noise_floor_mb) 才算退步。
+    """
+    checks = [("images_per_sec", -1), ("mp_per_sec", -1), ("p95_ms", 1), ("peak_rss_mb", 1)]
+    regressions = []
+    for stage, stats in result["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base:
+            continue
+        for metric, direction in checks:
+            old, new = base.get(metric), stats.get(metric)
+            if not old or new is None:
+                continue
+            if (new - old) / old * direction <= tolerance:
+                continue
+            if metric in ("images_per_sec", "mp_per_sec"):
+                # MP/秒與張/秒同比例變化，都以平均單張延遲的增加量判斷是否超過雜訊門檻
+                absolute = get_latency_change_ms(base.get("images_per_sec"), stats.get("images_per_sec"))
+                floor = noise_floor_ms
+            elif metric == "p95_ms":
+                absolute, floor = new - old, noise_floor_ms
+            else:
+                absolute, floor = new - old, memory_noise_floor_mb
+            if absolute > floor:
+                regressions.append((stage, metric, old, new))
+    return regressions
+
+
+def write_json(path, data):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    gpl.write_text_atomic(path, json.dumps(data, ensure_ascii=False, indent=2))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="照片建置流程效能測試 (合成空拍照片，輸出 JSON 並與基準線比較)")
+    parser.add_argument('--profile', choices=sorted(corpus_profiles), default='standard', help="合成照片規格")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=STAGES, help="要執行的階段")
+    parser.add_argument('--repeat', type=int, default=5, metavar='N', help="每張照片重複次數 (取最快的一次)")
+    parser.add_argument('--jobs', type=int, default=1, metavar='N', help="end_to_end 建置的 --jobs")
+    parser.add_argument('--output', default=latest_result_file, help="結果 JSON 路徑")
+    parser.add_argument('--baseline', default=baseline_file, help="比較用的基準線 JSON (不存在時略過比較)")
+    parser.add_argument('--save-baseline', action='store_true', help="把本次結果存為基準線")
+    parser.add_argument('--tolerance', type=float, default=default_tolerance,
+                        help="容許的退步比例 (預設 0.15 = 15%%)")
+    parser.add_argument('--noise-floor', type=float, default=default_noise_floor_ms, metavar='MS',
+                        help="單張延遲差距小於此毫秒數時不算退步 (預設 1.0)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    try:
+        result = run_benchmark(args.profile, args.stages, max(1, args.repeat), args.jobs)
+    except Exception as e:
+        print(f"錯誤：效能測試失敗: {e}")
+        return EXIT_ERROR
+
+    print_result(result)
+    write_json(args.output, result)
+    print(f"\n結果已寫入 {args.output}")
+
+    if args.save_baseline:
+        write_json(args.baseline, result)
+        print(f"已更新基準線 {args.baseline}")
+        return EXIT_OK
+    if not os.path.exists(args.baseline):
+        print("沒有基準線，略過比較 (可加上 --save-baseline 建立)。")
+        return EXIT_OK
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get("corpus", {}).get("profile") != args.profile:
+        print(f"警告：基準線使用的合成照片規格為 {baseline.get('corpus', {}).get('profile')}，與本次不同，略過比較。")
+        return EXIT_OK
+    if baseline.get("version") != result_version:
+        print("警告：基準線由舊版效能測試產生 (階段與計算方式不同)，略過比較；請以 --save-baseline 重新建立。")
+        return EXIT_OK
+
+    regressions = compare_with_baseline(result, baseline, args.tolerance, args.noise_floor)
+    if not regressions:
+        print(f"與基準線 ({baseline.get('created')}) 相比沒有超過 {args.tolerance:.0%} (且差距超過 {args.noise_floor} ms) 的退步。")
+        return EXIT_OK
+    print(f"\n!!! 效能退步 (超過 {args.tolerance:.0%}，且差距超過 {args.noise_floor} ms / {memory_noise_floor_mb} MB)：")
+    for stage, metric, old, new in regressions:
+        print(f"  {stage} {metric}: {old} -> {new}")
+    return EXIT_REGRESSION
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,7 +1,29 @@
+import io
 import os
 import json
+import time
+import base64
 import shutil
-from PIL import Image, ImageDraw, ImageFont, ExifTags
+import hashlib
+import cProfile
+import argparse
+import datetime
+from contextlib import contextmanager
+from functools import lru_cache
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from PIL import Image, ImageDraw, ImageFont
+
+from photo_colors import DEFAULT_COLOR, get_blurhash, get_color_proxy, get_palette
+from photo_jpeg import encode_jpeg_auto
+from photo_metadata import get_gps_info, scan_metadata
+from photo_layouts import format_magazine_layouts_js, plan_magazine_layouts
+from photo_map import build_map_markers, format_map_markers_js, load_map_markers
+from photo_similarity import build_similarity_index, find_similar, find_similar_groups, get_image_signature
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 為選用套件，未安裝時 BlurHash 會改用小圖預覽
+    np = None
 
 # --- 設定區 ---
 # 1. 來源與輸出路徑
@@ -25,6 +47,101 @@ portfolio_categories = ["城市光影", "大地映像"]
 
 # 5. 其他設定
 supported_extensions = ['.jpg', '.jpeg', '.png', '.gif']
+
+# 6. 增量建置設定
+# 建置清單記錄每張原圖的大小、修改時間、內容雜湊與處理參數；
+# 未變更的照片直接沿用既有輸出與顏色/GPS，不再重新處理。
+build_manifest_file = '.photo_build_manifest.json'
+build_manifest_version = 1
+
+# 7. 解碼設定
+# JPEG 原圖先以 DCT 縮放 (Image.draft) 解碼到不小於目標寬度的 1/2、1/4、1/8 尺寸，
+# 再做最後一次 LANCZOS 縮放；可大幅降低 20–48MP 空拍原圖的記憶體與時間。
+# 若要與完整解碼比較畫質，可改為 False 或執行時加上 --no-draft。
+jpeg_draft_decode = True
+
+# 8. 響應式多尺寸輸出 (前端作品集卡片與雜誌頁以 srcset / <picture> 載入)
+# 同一次解碼產生多種寬度與格式；portfolio_resize_width 的 JPEG 仍是主要輸出檔。
+# 比原圖寬的尺寸會略過 (不放大)。預設只多一張 640px JPEG，建置時間與只輸出 1280px 時相近；
+# 'webp' / 'avif' 需自行加入：WebP 約讓建置時間加倍，AVIF 約慢 20 倍以上
+# (AVIF 需 Pillow 11.3+ 或 pillow-avif-plugin，未安裝時自動略過)。設為空列表即只輸出單一 1280px JPEG。
+responsive_widths = [640, 1280]
+responsive_formats = ['jpg']
+webp_quality = 75
+avif_quality = 55
+
+# 9. 低畫質預覽 (LQIP)
+# 'blurhash'：BlurHash 字串 (需 NumPy)；'webp'：約 16px 的 base64 WebP data URI；None：不產生。
+placeholder_mode = 'blurhash'
+blurhash_components = (4, 3) # (橫向, 縱向) 分量數
+
+# 10. 色彩分析
+# 'quantize'：Pillow 減色 (與舊版主色結果相同)；'kmeans'：NumPy k-means (未安裝 NumPy 時退回 quantize)。
+# 前 palette_size 個顏色與佔比會寫入 data_photos.js 的 palette 欄位，第一個即為 color。
+color_engine = 'quantize'
+palette_size = 5
+
+# 11. 資料檔輸出
+# 'compact'：不縮排，每個分類的欄位打包成 columnar 陣列，載入時由內嵌的小函式還原成原本的物件陣列；
+# 'pretty'：舊版 indent=2 格式，方便人工比對。
+data_output_mode = 'compact'
+# True 時另外依分類拆成 public/js/photos/<分類>.js，並產生索引 public/js/data_photos_index.js 供前端按需載入
+data_shard_output = False
+
+# 12. 空拍地圖標示
+# True 時依照片 GPS 自動產生 public/js/map_markers.js (手動標示保留並優先)；也可執行時加上 --map-markers
+auto_map_markers = False
+map_markers_file = 'public/js/map_markers.js'
+map_cluster_radius = 0.5 # 群集半徑 (底圖寬/高的百分比；1 約 5 km，0.5 只合併幾乎同一地點的照片)
+
+# 13. 相似照片偵測
+# 以感知雜湊 (pHash；未安裝 NumPy 時為 dHash) 的漢明距離加上色彩向量 (Lab) 距離判斷近重複 / 相似鏡頭，
+# 同一群組的照片在 data_photos.js 寫入相同的 similar 群組編號；也可用 --similar-to 檔名 查詢。
+similarity_groups = True
+similarity_hash_radius = 8   # 64 bits 中最多容許幾個 bit 不同
+similarity_color_radius = 12 # 2x2 區塊平均 Lab 距離 (均方根) 上限
+similarity_report_limit = 10 # 終端機列出的群組數上限
+
+# 14. 雜誌模式預先排版
+# True 時依主色、檔名地點前綴與相似群組預先排出 magazine_layout_variants 組頁序 (桌機/手機各一份)，
+# 輸出 public/js/magazine_layouts.js，前端開啟雜誌時直接挑一組套用；可用 --no-layouts 關閉。
+magazine_layouts = True
+magazine_layouts_file = 'public/js/magazine_layouts.js'
+magazine_layout_variants = 6
+magazine_color_threshold = 100 # 同頁主色 RGB 距離下限 (與原本前端相同)
+
+# 15. 效能分析
+# 每次建置都會列出重新處理照片的各階段耗時 (依分類加總)；加上 --profile 時另外以 cProfile 記錄整個建置，
+# 輸出 .build_profiles/build_<時間>.prof (可用 python -m pstats 開啟) 與同名 .json 執行摘要。
+profile_dir = '.build_profiles'
+profile_slowest_files = 10 # 執行摘要列出最慢的照片數
+
+# 16. 平行處理設定 (1 = 單一 process；0 = 使用全部 CPU 核心；可用 --jobs 覆寫)
+parallel_jobs = 1
+# 平行處理時同時處理中照片的影像記憶體上限 (MB，依檔頭像素數估計；0 = 不限制；可用 --max-memory 覆寫)
+max_memory_mb = 0
+
+# 17. 監看模式 (--watch)
+# 每 watch_interval 秒比對一次來源資料夾的檔名、大小與修改時間；偵測到新增/變更/刪除後，
+# 等到連續 watch_debounce 秒沒有再變動 (大批複製或檔案還在寫入時) 才執行一次增量建置。
+watch_interval = 0.25
+watch_debounce = 0.75
+
+# 18. JPEG 畫質 (主要輸出與響應式 JPEG)
+# 'fixed' (預設)：全部使用 jpeg_quality，輸出 progressive + optimize；
+# 'ssim'：每個輸出二分搜尋亮度 SSIM (縮小 jpeg_ssim_downscale 倍計算) 仍 >= jpeg_target_ssim 的最低畫質，
+#         平坦的天空照片會降低畫質、細節多的城市照片會提高畫質；
+# 'budget'：檔案不超過 jpeg_byte_budget 的最高畫質 (預算對應 portfolio_resize_width 寬的輸出，其他寬度依像素數等比例)。
+# 畫質限制在 jpeg_quality_range 之內 (最高畫質也達不到目標的雜訊般內容改用 jpeg_quality)；色度細節 (2x2 區塊內的色度變化) 超過 jpeg_chroma_threshold 時用 4:4:4，否則 4:2:0。
+# 'ssim' / 'budget' 需自行啟用：雜訊多的照片 SSIM 目標可能逼近畫質上限 (約 88、檔案約為 fixed 的兩倍)，
+# 啟用前請先用自己的照片比較總大小。自動畫質需要 NumPy，未安裝時改用 fixed。
+jpeg_encoder = 'fixed'
+jpeg_target_ssim = 0.993
+jpeg_byte_budget = 250 * 1024
+jpeg_quality_range = (40, 90)
+jpeg_ssim_downscale = 2
+jpeg_chroma_threshold = 3.0
+jpeg_progressive = True
 # --- 結束設定 ---
 
 
@@ -59,123 +176,336 @@ def clean_output():
     return True
 
 
-def get_decimal_from_dms(dms, ref):
-    """
-    將度/分/秒 (DMS) 格式轉換為十進位度數。
-    dms: (Degrees, Minutes, Seconds)
-    ref: 'N', 'S', 'E', 'W'
-    """
-    degrees = dms[0]
-    minutes = dms[1]
-    seconds = dms[2]
-    
-    decimal = degrees + (minutes / 60.0) + (seconds / 3600.0)
-    
-    if ref in ['S', 'W']:
-        decimal = -decimal
-        
-    return decimal
+def get_file_sha256(path):
+    """以分塊方式計算檔案的 SHA-256，避免一次把大檔讀進記憶體。"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def get_variant_formats():
+    """回傳目前環境實際可輸出的響應式圖片格式 (AVIF 視 Pillow 支援與否)。"""
+    formats = []
+    for fmt in responsive_formats:
+        if fmt == 'avif':
+            try:
+                import pillow_avif  # noqa: F401 (舊版 Pillow 透過外掛註冊 AVIF)
+            except ImportError:
+                pass
+            Image.init()
+            if 'AVIF' not in Image.SAVE:
+                continue
+        formats.append(fmt)
+    return formats
+
 
-def get_gps_info(img):
+def get_jpeg_encoder():
+    """實際使用的 JPEG 畫質模式 (未安裝 NumPy 時自動畫質改為 fixed)。"""
+    return jpeg_encoder if np is not None else 'fixed'
+
+
+def get_settings_fingerprint(draft_decode=jpeg_draft_decode):
     """
-    從圖片的 EXIF 資料中提取 GPS 經緯度和高度。
-    回傳: 包含 lat, lng, alt 的字典，若無資料則回傳 None。
+    將會影響作品集輸出結果的設定組合成一個雜湊值。
+    任一設定 (寬度、畫質、浮水印文字/顏色、字型檔內容、解碼方式、響應式尺寸) 改變時，所有快取都會失效。
     """
     try:
-        exif_data = img._getexif()
-        if not exif_data:
-            return None
-
-        gps_info = {}
-        for tag, value in exif_data.items():
-            decoded = ExifTags.TAGS.get(tag, tag)
-            if decoded == 'GPSInfo':
-                gps_info = value
-                break
-        
-        if not gps_info:
-            return None
-
-        # 提取經緯度需要的標籤 ID
-        # 1: GPSLatitudeRef, 2: GPSLatitude, 3: GPSLongitudeRef, 4: GPSLongitude, 6: GPSAltitude
-        gps_lat_ref = gps_info.get(1)
-        gps_lat = gps_info.get(2)
-        gps_lng_ref = gps_info.get(3)
-        gps_lng = gps_info.get(4)
-        gps_alt = gps_info.get(6)
-
-        if gps_lat and gps_lat_ref and gps_lng and gps_lng_ref:
-            lat = get_decimal_from_dms(gps_lat, gps_lat_ref)
-            lng = get_decimal_from_dms(gps_lng, gps_lng_ref)
-            
-            result = {
-                "lat": round(lat, 6),
-                "lng": round(lng, 6)
-            }
-            
-            # 高度是選擇性的
-            if gps_alt is not None:
-                # gps_alt 可能是 (numerator, denominator) 或直接是數值
-                try:
-                    # Pillow 的 IFDRational 處理
-                    alt_val = float(gps_alt)
-                except:
-                    alt_val = 0
-                result["alt"] = round(alt_val, 2)
-            
-            return result
+        font_hash = get_file_sha256(font_file)
+    except OSError:
+        font_hash = 'missing'
+
+    settings = {
+        "portfolio_resize_width": portfolio_resize_width,
+        "jpeg_quality": jpeg_quality,
+        "jpeg_encoder": get_jpeg_encoder(),
+        "jpeg_target_ssim": jpeg_target_ssim,
+        "jpeg_byte_budget": jpeg_byte_budget,
+        "jpeg_quality_range": list(jpeg_quality_range),
+        "jpeg_ssim_downscale": jpeg_ssim_downscale,
+        "jpeg_chroma_threshold": jpeg_chroma_threshold,
+        "jpeg_progressive": jpeg_progressive,
+        "watermark_text": watermark_text,
+        "font_color": list(font_color),
+        "font_file": font_hash,
+        "jpeg_draft_decode": draft_decode,
+        "responsive_widths": sorted(responsive_widths),
+        "responsive_formats": get_variant_formats(),
+        "webp_quality": webp_quality,
+        "avif_quality": avif_quality,
+        "placeholder_mode": placeholder_mode,
+        "blurhash_components": list(blurhash_components),
+        "color_engine": color_engine,
+        "palette_size": palette_size,
+    }
+    raw = json.dumps(settings, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
 
+
+def load_build_manifest():
+    """讀取建置清單；檔案不存在、損毀或版本不符時回傳空清單 (等同全部重建)。"""
+    empty = {"version": build_manifest_version, "entries": {}}
+    if not os.path.exists(build_manifest_file):
+        return empty
+    try:
+        with open(build_manifest_file, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
     except Exception as e:
-        print(f"  ! 讀取 GPS 發生錯誤: {e}")
-        return None
+        print(f"警告：建置清單 '{build_manifest_file}' 無法讀取 ({e})，將重新建置所有照片。")
+        return empty
+    if manifest.get("version") != build_manifest_version or not isinstance(manifest.get("entries"), dict):
+        return empty
+    return manifest
 
-    return None
 
+def write_text_atomic(path, text):
+    """先寫入同目錄的暫存檔再以 os.replace 取代，中途中斷也不會留下寫到一半的檔案。"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
 
-def get_dominant_color(img):
+
+def save_build_manifest(manifest):
+    """寫入建置清單 (atomic)，避免中途中斷留下不完整的建置清單。"""
+    try:
+        write_text_atomic(build_manifest_file, json.dumps(manifest, ensure_ascii=False, indent=2))
+    except Exception as e:
+        print(f"警告：寫入建置清單失敗: {e}")
+
+
+def get_cached_entry(entry, source_path, output_path, settings_hash):
     """
-    使用 Quantize 方法提取圖片的顯著色 (Dominant Color)。
-    比單純平均 (Average) 更能反映肉眼看到的「主色」。
+    判斷原圖是否可以沿用上次的輸出。
+    先比對大小與修改時間 (不需讀檔)；若不同再比對內容雜湊，
+    只是被複製或 touch 過的檔案也能命中快取。
+    回傳 (可沿用的 entry 或 None, 最新的檔案資訊)。
     """
+    stat = os.stat(source_path)
+    file_info = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+    if not entry or entry.get("settings") != settings_hash:
+        return None, file_info
+    if entry.get("output") != os.path.basename(output_path) or not os.path.exists(output_path):
+        return None, file_info
+    output_dir = os.path.dirname(output_path)
+    variants = (entry.get("extra") or {}).get("variants") or []
+    if any(not os.path.exists(os.path.join(output_dir, v["file"])) for v in variants):
+        return None, file_info
+    if entry.get("size") != stat.st_size:
+        return None, file_info
+
+    if entry.get("mtime_ns") == stat.st_mtime_ns:
+        file_info["sha256"] = entry.get("sha256")
+        return entry, file_info
+
+    file_info["sha256"] = get_file_sha256(source_path)
+    if file_info["sha256"] == entry.get("sha256"):
+        return entry, file_info
+    return None, file_info
+
+
+def prune_outputs(output_category_path, keep_filenames):
+    """刪除原圖已不存在 (或處理失敗) 的舊輸出照片。"""
+    for filename in os.listdir(output_category_path):
+        path = os.path.join(output_category_path, filename)
+        if filename in keep_filenames or not os.path.isfile(path):
+            continue
+        try:
+            os.remove(path)
+            print(f"  - 已移除過期輸出: {filename}")
+        except Exception as e:
+            print(f"警告：無法移除過期輸出 '{path}': {e}")
+
+
+def get_placeholder(proxy, mode=None):
+    """
+    依 placeholder_mode 產生低畫質預覽，回傳要寫入資料檔的 (欄位名稱, 值)；不產生時回傳 None。
+    """
+    mode = placeholder_mode if mode is None else mode
     try:
-        # 1. 轉為 RGB 並縮小以加速處理
-        img_copy = img.copy()
-        if img_copy.mode != 'RGB':
-            img_copy = img_copy.convert('RGB')
-        img_copy.thumbnail((150, 150))
-
-        # 2. 減色處理 (Quantize)，只取主要 5 色
-        # 使用 MAXCOVERAGE 或預設算法皆可
-        quantized = img_copy.quantize(colors=5, method=Image.MAXCOVERAGE)
-        
-        # 3. 找出佔比最多的顏色索引
-        # getcolors() 回傳 [(count, index), ...]
-        counts = quantized.getcolors(maxcolors=256)
-        if not counts:
-            return (128, 128, 128) # Fallback
-
-        # 排序：數量多的在前面
-        counts.sort(key=lambda x: x[0], reverse=True)
-        dominant_index = counts[0][1]
-
-        # 4. 從色盤 (Palette) 取出 RGB
-        palette = quantized.getpalette()
-        r = palette[dominant_index * 3]
-        g = palette[dominant_index * 3 + 1]
-        b = palette[dominant_index * 3 + 2]
-        
-        return (r, g, b)
-        
+        if mode == 'blurhash' and np is not None:
+            return "blurhash", get_blurhash(proxy, blurhash_components)
+        if mode in ('blurhash', 'webp'):
+            # 未安裝 NumPy 時也退回小圖預覽
+            tiny = proxy.copy()
+            tiny.thumbnail((16, 16))
+            buffer = io.BytesIO()
+            tiny.save(buffer, 'WEBP', quality=40)
+            return "lqip", "data:image/webp;base64," + base64.b64encode(buffer.getvalue()).decode('ascii')
     except Exception as e:
-        print(f"  ! 計算主色時發生錯誤: {e}, 改用預設灰色")
-        return (128, 128, 128)
+        print(f"  ! 產生預覽時發生錯誤: {e}")
+    return None
 
 
-def process_image(source_path, output_path, target_width, add_watermark=True):
+@lru_cache(maxsize=16)
+def get_watermark_font(size):
+    """載入指定大小的浮水印字型；同一個 process 內相同大小只載入一次。"""
+    try:
+        return ImageFont.truetype(font_file, size)
+    except IOError:
+        print(f"警告: 找不到字型 {font_file}，嘗試使用預設字型。")
+        return ImageFont.load_default()
+
+
+@lru_cache(maxsize=16)
+def get_watermark_tile(size):
+    """
+    預先繪製指定字級的浮水印小圖 (只有文字範圍大小的 RGBA)。
+    回傳 (tile, left, top)，left/top 為文字外框相對於置中點的位移。
+    作品集照片多半只有幾種比例，字級重複率很高，快取命中率也高。
+    """
+    current_font = get_watermark_font(size)
+    try:
+        # Pillow 8.0+：以文字中心 (anchor='mm') 計算外框
+        left, top, right, bottom = current_font.getbbox(watermark_text, anchor='mm')
+        anchor = 'mm'
+    except (TypeError, ValueError):
+        # 點陣預設字型不支援 anchor，改以左上角外框自行置中
+        left, top, right, bottom = current_font.getbbox(watermark_text)
+        width, height = right - left, bottom - top
+        left, top, right, bottom = -width / 2, -height / 2, width / 2, height / 2
+        anchor = None
+
+    left, top = int(left), int(top)
+    tile = Image.new('RGBA', (max(1, int(right) - left), max(1, int(bottom) - top)), (255, 255, 255, 0))
+    draw = ImageDraw.Draw(tile)
+    if anchor:
+        draw.text((-left, -top), watermark_text, font=current_font, fill=font_color, anchor=anchor)
+    else:
+        draw.text((0, 0), watermark_text, font=current_font, fill=font_color)
+    return tile, left, top
+
+
+def apply_watermark(img):
+    """
+    將浮水印置中合成到圖片上。
+    只裁出浮水印外框範圍做 alpha 合成再貼回，不再配置與整張圖同大的 RGBA 圖層。
+    """
+    if img.mode not in ('RGB', 'RGBA'):
+        img = img.convert('RGBA')
+
+    # --- 動態計算字體大小 (短邊的 8%) ---
+    # 原因：在網頁縮圖(object-cover)時，顯示比例通常取決於短邊。
+    # 為了讓浮水印在正方形縮圖中看起來大小一致，需以 min(width, height) 為基準。
+    short_side = min(img.width, img.height)
+    dynamic_font_size = int(short_side * 0.08)
+    if dynamic_font_size < 12: dynamic_font_size = 12 # 最小限制
+
+    tile, left, top = get_watermark_tile(dynamic_font_size)
+
+    # 計算文字位置 (置中)，並裁切到圖片範圍內
+    x = img.width // 2 + left
+    y = img.height // 2 + top
+    box = (max(0, x), max(0, y), min(img.width, x + tile.width), min(img.height, y + tile.height))
+    if box[0] >= box[2] or box[1] >= box[3]:
+        return img
+
+    region = img.crop(box)
+    if region.mode != 'RGBA':
+        region = region.convert('RGBA')
+    region.alpha_composite(tile, source=(box[0] - x, box[1] - y))
+    img.paste(region if img.mode == 'RGBA' else region.convert(img.mode), box[:2])
+    return img
+
+
+def get_variant_filename(output_filename, width, fmt):
+    """響應式輸出檔名，例如 基隆望幽谷.jpg -> 基隆望幽谷@640w.webp。"""
+    stem = os.path.splitext(output_filename)[0]
+    return f"{stem}@{width}w.{fmt}"
+
+
+def save_image(img, path, fmt):
+    """依格式儲存圖片 (jpg 依設定區 18 決定畫質，webp/avif 以設定區畫質壓縮，其餘依副檔名)。"""
+    if fmt in ('jpg', 'jpeg'):
+        if img.mode == 'RGBA': img = img.convert('RGB')
+        encoder = get_jpeg_encoder()
+        if encoder == 'fixed':
+            img.save(path, 'JPEG', quality=jpeg_quality, optimize=True, progressive=jpeg_progressive)
+        else:
+            byte_budget = jpeg_byte_budget * (img.width / portfolio_resize_width) ** 2
+            data, _ = encode_jpeg_auto(img, encoder, jpeg_target_ssim, byte_budget, jpeg_quality_range,
+                                       jpeg_ssim_downscale, jpeg_chroma_threshold, jpeg_progressive, jpeg_quality)
+            with open(path, 'wb') as f:
+                f.write(data)
+    elif fmt == 'webp':
+        img.save(path, 'WEBP', quality=webp_quality, method=4)
+    elif fmt == 'avif':
+        img.save(path, 'AVIF', quality=avif_quality)
+    else:
+        img.save(path)
+
+
+def iter_renditions(img, widths, main_width, aspect_ratio, add_watermark=True, timings=None):
+    """
+    依 widths (由大到小) 逐一產生加上浮水印的輸出圖，呼叫端存檔後即可丟棄。
+    主要輸出與更大的尺寸直接由解碼原圖縮放 (結果與以往相同)；產生主要輸出後立即關閉 img 釋放解碼原圖
+    (48 MP 約 190 MB)，較小的尺寸改由未加浮水印的主要輸出縮放，同一時間只保留一張底圖與一張輸出圖。
+    """
+    timings = {} if timings is None else timings
+    base = img
+    for width in widths:
+        out = base
+        if base.width > width:
+            with timing_span(timings, "resize"):
+                out = base.resize((width, int(width * aspect_ratio)), Image.Resampling.LANCZOS)
+        if base is img and width <= main_width:
+            if out is img:
+                out = img.copy()
+            img.close()
+            base = out
+        if add_watermark:
+            with timing_span(timings, "watermark"):
+                out = apply_watermark(out.copy() if out is base else out)
+        yield out
+
+
+def estimate_image_memory(source_path, target_width, variant_widths=(), draft_decode=jpeg_draft_decode):
+    """
+    只讀檔頭估計處理單張照片時的影像記憶體峰值 (bytes)：
+    解碼後的原圖 (JPEG 縮小解碼後的尺寸) 加上約 3 張最大輸出 (底圖、浮水印複本與浮水印圖層)；
+    Pillow 的 RGB/RGBA 每像素佔 4 bytes。
+    """
+    with Image.open(source_path) as img:
+        width, height = img.size
+        source_format = img.format
+    decode_width = min(width, max([target_width] + [w for w in variant_widths if w < width]))
+    scale = 1
+    if draft_decode and source_format == 'JPEG':
+        # 與 draft() 相同：挑選仍 >= 最大輸出尺寸的最小 2 的冪次縮放 (最多 1/8)
+        while scale < 8 and width // (scale * 2) >= decode_width:
+            scale *= 2
+    decoded_pixels = (width // scale) * (height // scale)
+    largest_pixels = decode_width * decode_width * height / width
+    return int((decoded_pixels + 3 * largest_pixels) * 4)
+
+
+@contextmanager
+def timing_span(timings, stage):
+    """把區塊耗時 (秒) 累加到 timings[stage]。"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + time.perf_counter() - start
+
+
+def process_image(source_path, output_path, target_width, add_watermark=True, draft_decode=jpeg_draft_decode,
+                  variant_widths=(), variant_formats=(), extract_gps=True, timings=None):
     """
     統一處理單一圖片的函式 (可指定縮放寬度、可選浮水印)。
     (已優化：移除了不必要的 'global font')
+    draft_decode=True 時，JPEG 原圖會以縮小尺寸直接解碼 (見 jpeg_draft_decode 設定)。
+    variant_widths/variant_formats 指定額外的響應式輸出，全部由同一次解碼的原圖縮放產生，
+    輸出到 output_path 同一資料夾。
+    extract_gps=False 時不讀 GPS (作品集流程已由 scan_metadata() 事先讀取並快取)。
+    回傳 (成功與否, 主色, GPS, 其他資料)，其他資料為 dict：
+    variants (響應式輸出列表)、palette (排序後色盤)、blurhash 或 lqip (低畫質預覽)、
+    similarity (感知雜湊與色彩向量，只存在建置清單)。
+    timings 為 dict 時累加各階段耗時 (秒)：gps、decode、resize、watermark、encode_<格式>、color、placeholder、similarity。
     """
+    timings = {} if timings is None else timings
     # 注意：'font' 變數是在 run_processor() 中定義的全域變數，
     # 這裡僅為讀取，不需要 'global' 關鍵字。
     try:
@@ -183,87 +513,685 @@ def process_image(source_path, output_path, target_width, add_watermark=True):
         
         with Image.open(source_path) as img:
             # 1. 先嘗試讀取 GPS 資訊 (在縮放之前)
-            current_gps_info = get_gps_info(img)
-            if current_gps_info:
-                print(f"  * 發現 GPS: {current_gps_info}")
-
-            # 使用傳入的 target_width 進行縮放
-            if img.width > target_width:
-                aspect_ratio = img.height / img.width
-                new_height = int(target_width * aspect_ratio)
-                img = img.resize((target_width, new_height), Image.Resampling.LANCZOS)
-
-            # 加上浮水印 (如果需要)
-            if add_watermark:
-                if img.mode != 'RGBA': img = img.convert('RGBA')
-                # 建立一個透明的圖層用於繪製文字
-                txt_layer = Image.new('RGBA', img.size, (255, 255, 255, 0))
-                draw = ImageDraw.Draw(txt_layer)
-                
-                # --- 動態計算字體大小 (短邊的 8%) ---
-                # 原因：在網頁縮圖(object-cover)時，顯示比例通常取決於短邊。
-                # 為了讓浮水印在正方形縮圖中看起來大小一致，需以 min(width, height) 為基準。
-                short_side = min(img.width, img.height)
-                dynamic_font_size = int(short_side * 0.08)
-                if dynamic_font_size < 12: dynamic_font_size = 12 # 最小限制
-
-                try:
-                    current_font = ImageFont.truetype(font_file, dynamic_font_size)
-                except IOError:
-                    print(f"警告: 找不到字型 {font_file}，嘗試使用預設字型。")
-                    current_font = ImageFont.load_default()
-
-                # 計算文字位置 (置中)
-                # Pillow 9.2.0+ (anchor='mm')
-                try:
-                    x, y = img.width / 2, img.height / 2
-                    draw.text((x, y), watermark_text, font=current_font, fill=font_color, anchor='mm')
-                except AttributeError:
-                    # 舊版 Pillow 的置中寫法 (如果 anchor='mm' 不支援)
-                    text_width, text_height = draw.textsize(watermark_text, current_font)
-                    x = (img.width - text_width) / 2
-                    y = (img.height - text_height) / 2
-                    draw.text((x, y), watermark_text, font=current_font, fill=font_color)
-
-                img = Image.alpha_composite(img, txt_layer)
-
-            # 儲存處理後的圖片
-            if output_path.lower().endswith(('.jpg', '.jpeg')):
-                if img.mode == 'RGBA': img = img.convert('RGB')
-                img.save(output_path, 'JPEG', quality=jpeg_quality, optimize=True)
-            else:
-                img.save(output_path)
-            
-            print(f"  - 已處理: {os.path.basename(source_path)} (寬度 -> {img.width}px)")
-            
-            # --- 改用顯著色算法 (Dominant Color) ---
-            dominant_color = get_dominant_color(img)
+            if extract_gps:
+                with timing_span(timings, "gps"):
+                    current_gps_info = get_gps_info(img)
+                if current_gps_info:
+                    print(f"  * 發現 GPS: {current_gps_info}")
+
+            source_width, source_height = img.size
+            aspect_ratio = source_height / source_width
+            # 不放大：只保留比原圖窄的響應式寬度
+            ladder = sorted(w for w in set(variant_widths) if w < source_width and w != target_width)
+            decode_width = max([target_width] + ladder)
+
+            if draft_decode and img.format == 'JPEG' and source_width > decode_width:
+                # 只讀取檔頭時呼叫 draft()，解碼器會挑選仍 >= 最大輸出尺寸的最小 2 的冪次縮放
+                img.draft(img.mode, (decode_width, int(decode_width * aspect_ratio)))
+            with timing_span(timings, "decode"):
+                img.load()
+
+            # 主要輸出 (target_width，不放大) 與響應式尺寸由大到小逐一產生，每個尺寸存完檔即丟棄
+            main_width = min(target_width, img.width)
+            output_ext = os.path.splitext(output_path)[1].lower().lstrip('.')
+            output_dir = os.path.dirname(output_path)
+            output_filename = os.path.basename(output_path)
+            variants = []
+            proxy = None
+
+            for variant_img in iter_renditions(img, sorted(set(ladder) | {main_width}, reverse=True), main_width,
+                                               aspect_ratio, add_watermark, timings):
+                is_main = variant_img.width == main_width
+                if is_main:
+                    with timing_span(timings, f"encode_{output_ext}"):
+                        save_image(variant_img, output_path, output_ext)
+                for fmt in variant_formats:
+                    if is_main and fmt == output_ext:
+                        # 主要輸出檔本身就是這個尺寸與格式，不重複儲存
+                        filename = output_filename
+                    else:
+                        filename = get_variant_filename(output_filename, variant_img.width, fmt)
+                        with timing_span(timings, f"encode_{fmt}"):
+                            save_image(variant_img, os.path.join(output_dir, filename), fmt)
+                    variants.append({
+                        "width": variant_img.width,
+                        "height": variant_img.height,
+                        "format": fmt,
+                        "file": filename,
+                        "bytes": os.path.getsize(os.path.join(output_dir, filename)),
+                    })
+                if is_main:
+                    # --- 改用顯著色算法 (Dominant Color) ---
+                    # 只建立一張小圖，色盤 (第一個顏色即主色)、預覽與相似度特徵都由它計算
+                    with timing_span(timings, "color"):
+                        proxy = get_color_proxy(variant_img)
+                del variant_img
+            # 資料檔中的響應式輸出維持由小到大 (同寬度依 variant_formats 順序)
+            variants.sort(key=lambda v: v["width"])
+
+            print(f"  - 已處理: {os.path.basename(source_path)} (寬度 -> {main_width}px，響應式輸出 {len(variants)} 個)")
+
+            with timing_span(timings, "color"):
+                palette = get_palette(proxy, palette_size, color_engine)
+            dominant_color = palette[0][0] if palette else DEFAULT_COLOR
+
+            extra = {
+                "variants": variants,
+                "palette": [{"color": list(rgb), "weight": round(weight, 3)} for rgb, weight in palette if round(weight, 3) > 0],
+            }
+            with timing_span(timings, "placeholder"):
+                placeholder = get_placeholder(proxy)
+            if placeholder:
+                extra[placeholder[0]] = placeholder[1]
+            with timing_span(timings, "similarity"):
+                extra["similarity"] = get_image_signature(proxy)
             
-            return True, dominant_color, current_gps_info
+            return True, dominant_color, current_gps_info, extra
             
     except Exception as e:
         print(f"處理檔案 {os.path.basename(source_path)} 時發生錯誤: {e}")
-        return False, None, None
+        return False, None, None, {}
+
+
+# 將 columnar 欄位還原成 [{filename, color, ...}, ...]；值為 null 的欄位不會出現在物件上 (與舊格式相同)
+PHOTO_DATA_UNPACK_JS = (
+    "function(c){var n=(c.filename||[]).length,a=[],i,k,p;"
+    "for(i=0;i<n;i++){p={};for(k in c)if(c[k][i]!=null)p[k]=c[k][i];a.push(p);}return a;}"
+)
+
+
+def pack_photo_columns(items):
+    """
+    把同一分類的照片物件陣列打包成 {欄位: [值...]}，欄位順序依第一次出現的順序。
+    沒有該欄位的照片以 None 佔位，省去每筆重複的欄位名稱。
+    """
+    fields = []
+    for item in items:
+        for key in item:
+            if key not in fields:
+                fields.append(key)
+    return {field: [item.get(field) for item in items] for field in fields}
+
+
+def to_compact_json(data):
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def build_photo_data_js(all_photo_data, mode=data_output_mode):
+    """產生 data_photos.js 內容，兩種格式載入後的 window.globalPhotoData 完全相同。"""
+    if mode == 'pretty':
+        return 'window.globalPhotoData = ' + json.dumps(all_photo_data, ensure_ascii=False, indent=2) + ';'
+
+    packed = {category: pack_photo_columns(items) for category, items in all_photo_data.items()}
+    return (
+        'window.globalPhotoData=(function(u,d){for(var k in d)d[k]=u(d[k]);return d;})('
+        + PHOTO_DATA_UNPACK_JS + ',' + to_compact_json(packed) + ');\n'
+    )
+
+
+def write_photo_data_shards(all_photo_data, js_dir):
+    """
+    依分類輸出 public/js/photos/<分類>.js，並產生索引 data_photos_index.js。
+    索引內含各分類筆數與帶內容雜湊的檔案路徑，以及 window.loadPhotoCategory(名稱) 按需載入函式。
+    """
+    shard_dir = os.path.join(js_dir, 'photos')
+    os.makedirs(shard_dir, exist_ok=True)
+
+    index = {"categories": []}
+    shard_files = set()
+    for category, items in all_photo_data.items():
+        shard_filename = f"{category}.js"
+        text = (
+            '(window.globalPhotoData=window.globalPhotoData||{})[' + to_compact_json(category) + ']=('
+            + PHOTO_DATA_UNPACK_JS + ')(' + to_compact_json(pack_photo_columns(items)) + ');\n'
+        )
+        write_text_atomic(os.path.join(shard_dir, shard_filename), text)
+        shard_files.add(shard_filename)
+        version = hashlib.sha256(text.encode('utf-8')).hexdigest()[:8]
+        index["categories"].append({
+            "name": category,
+            "count": len(items),
+            "file": f"public/js/photos/{shard_filename}?v={version}",
+        })
+
+    # 移除已不在設定中的分類檔
+    for filename in os.listdir(shard_dir):
+        if filename.endswith('.js') and filename not in shard_files:
+            os.remove(os.path.join(shard_dir, filename))
+
+    index_text = (
+        'window.photoDataIndex=' + to_compact_json(index) + ';\n'
+        'window.loadPhotoCategory=function(name){'
+        'var d=window.globalPhotoData;if(d&&d[name])return Promise.resolve(d[name]);'
+        'var c=window.photoDataIndex.categories.filter(function(x){return x.name===name;})[0];'
+        'if(!c)return Promise.reject(new Error("unknown category: "+name));'
+        'return new Promise(function(ok,fail){var s=document.createElement("script");s.src=c.file;'
+        's.onload=function(){ok(window.globalPhotoData[name]);};s.onerror=fail;document.head.appendChild(s);});};\n'
+    )
+    write_text_atomic(os.path.join(js_dir, 'data_photos_index.js'), index_text)
+    return len(shard_files)
 
 
-def run_processor():
-    """主執行函式"""
+def unpack_photo_columns(columns):
+    """pack_photo_columns() 的反向操作，與 PHOTO_DATA_UNPACK_JS 相同：值為 None 的欄位不放入物件。"""
+    count = len(columns.get("filename") or [])
+    return [
+        {key: values[i] for key, values in columns.items() if i < len(values) and values[i] is not None}
+        for i in range(count)
+    ]
+
+
+def parse_photo_data_js(text):
+    """
+    解析 build_photo_data_js() 或分類分檔產生的 JS，回傳 {分類: [照片, ...]}，不需要 Node。
+    pretty 格式直接取等號後的 JSON；compact 與分類檔取出 columnar JSON 後還原。
+    """
+    decoder = json.JSONDecoder()
+    text = text.strip()
+    unpack_marker = PHOTO_DATA_UNPACK_JS + ','
+    shard_prefix = '(window.globalPhotoData=window.globalPhotoData||{})['
+
+    if text.startswith(shard_prefix):
+        category, end = decoder.raw_decode(text, len(shard_prefix))
+        columns_start = text.index('(' + PHOTO_DATA_UNPACK_JS + ')(', end) + len(PHOTO_DATA_UNPACK_JS) + 3
+        columns, _ = decoder.raw_decode(text, columns_start)
+        return {category: unpack_photo_columns(columns)}
+
+    if unpack_marker in text:
+        packed, _ = decoder.raw_decode(text, text.index(unpack_marker) + len(unpack_marker))
+        return {category: unpack_photo_columns(columns) for category, columns in packed.items()}
+
+    if not text.startswith('window.globalPhotoData'):
+        raise ValueError("不是 data_photos.js 格式")
+    data, _ = decoder.raw_decode(text[text.index('=') + 1:].lstrip())
+    return data
+
+
+def load_photo_data(js_dir=None):
+    """
+    讀取目前發布的照片資料：優先 data_photos.js，沒有時改讀分類分檔索引 data_photos_index.js。
+    找不到任何資料檔時丟出 FileNotFoundError。
+    """
+    js_dir = js_dir or os.path.join(output_parent_folder, 'js')
+    data_path = os.path.join(js_dir, 'data_photos.js')
+    if os.path.exists(data_path):
+        with open(data_path, 'r', encoding='utf-8') as f:
+            return parse_photo_data_js(f.read())
+
+    index_path = os.path.join(js_dir, 'data_photos_index.js')
+    if not os.path.exists(index_path):
+        raise FileNotFoundError(data_path)
+    with open(index_path, 'r', encoding='utf-8') as f:
+        index_text = f.read()
+    index, _ = json.JSONDecoder().raw_decode(index_text, index_text.index('=') + 1)
+    all_photo_data = {}
+    for category in index["categories"]:
+        shard_path = os.path.join(js_dir, 'photos', f"{category['name']}.js")
+        with open(shard_path, 'r', encoding='utf-8') as f:
+            all_photo_data.update(parse_photo_data_js(f.read()))
+    return all_photo_data
+
+
+def get_clean_filename(filename, used_filenames):
+    """
+    檔名清洗與去重，回傳輸出用的檔名並登記到 used_filenames。
+    必須依原本的檔案順序逐一呼叫，編號結果才會固定。
+    """
+    # 1. 分離檔名與副檔名
+    name_part, ext = os.path.splitext(filename)
+
+    # 2. 清洗: 去除首尾空白
+    name_part = name_part.strip()
+
+    # 3. 統一副檔名: 小寫，jpeg -> jpg
+    ext = ext.lower()
+    if ext == '.jpeg': ext = '.jpg'
     
-    # (已修正) 執行清理，如果失敗 (回傳 False)，則停止程式
-    # (已修正) 執行清理
-    clean_output()
+    # 4. 產生候選檔名
+    clean_filename = f"{name_part}{ext}"
+    final_filename = clean_filename
+
+    # 5. 檢查重複並編號 (如: 基隆望幽谷-2.jpg)
+    counter = 1
+    while final_filename in used_filenames:
+        counter += 1
+        final_filename = f"{name_part}-{counter}{ext}"
+
+    used_filenames.add(final_filename)
+    return final_filename
+
+
+def process_portfolio_task(task):
+    """
+    給 process pool 使用的包裝函式 (必須是模組層級函式才能被 pickle)。
+    回傳 (process_image 結果, 各階段耗時)；total 為整張照片的耗時。
+    """
+    timings = {}
+    with timing_span(timings, "total"):
+        result = process_image(task["source_path"], task["output_path"], target_width=portfolio_resize_width, add_watermark=True,
+                               draft_decode=task["draft_decode"],
+                               variant_widths=responsive_widths, variant_formats=task["variant_formats"],
+                               extract_gps=False, timings=timings)
+    return result, timings
+
+
+def get_task_memory(task):
+    try:
+        return estimate_image_memory(task["source_path"], portfolio_resize_width, responsive_widths, task["draft_decode"])
+    except Exception:
+        return 0
+
+
+def run_image_tasks(tasks, jobs=1, max_memory=max_memory_mb):
+    """
+    處理需要重新產生的照片，回傳與 tasks 相同順序的結果列表。
+    jobs > 1 時使用多個 process 平行處理 (縮放、浮水印、JPEG 壓縮都是 CPU 密集工作)。
+    max_memory (MB) > 0 時，依檔頭估計的影像記憶體控制同時處理的張數：
+    加入下一張會超過上限就先等其他照片完成 (至少會有一張在處理，單張超過上限也照常處理)。
+    """
+    if jobs <= 1 or len(tasks) <= 1:
+        return [process_portfolio_task(task) for task in tasks]
+
+    workers = min(jobs, len(tasks))
+    print(f"  (使用 {workers} 個 process 平行處理 {len(tasks)} 張照片)")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        if max_memory <= 0:
+            # executor.map 會依輸入順序回傳，確保輸出資料與單執行緒版本一致
+            return list(executor.map(process_portfolio_task, tasks))
+
+        budget = max_memory * 1024 * 1024
+        costs = [get_task_memory(task) for task in tasks]
+        results = [None] * len(tasks)
+        pending = {}
+        in_flight = 0
+        next_index = 0
+        while next_index < len(tasks) or pending:
+            while next_index < len(tasks) and len(pending) < workers:
+                if pending and in_flight + costs[next_index] > budget:
+                    break
+                future = executor.submit(process_portfolio_task, tasks[next_index])
+                pending[future] = next_index
+                in_flight += costs[next_index]
+                next_index += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = pending.pop(future)
+                in_flight -= costs[index]
+                results[index] = future.result()
+        return results
+
+
+def get_source_metadata(entry, source_path, file_info):
+    """
+    取得原圖的 EXIF 中繼資料：大小與修改時間和上次掃描時相同就沿用建置清單中的結果，否則重新掃描檔頭。
+    """
+    metadata = (entry or {}).get("metadata")
+    stamp = [file_info["size"], file_info["mtime_ns"]]
+    if metadata and entry.get("metadata_stat") == stamp:
+        return metadata, stamp
+    return scan_metadata(source_path), stamp
+
+
+def build_photo_entry(filename, color, metadata, extra):
+    """組合寫入 data_photos.js 的單張照片資料。"""
+    # Store object instead of string
+    img_data = {
+        "filename": filename, # 使用新的乾淨檔名
+        "color": color # (r, g, b)
+    }
+    # 如果有 GPS 資訊才加入；拍攝時間與機型也只在有資料時加入
+    for key in ("gps", "taken", "camera"):
+        if metadata.get(key):
+            img_data[key] = metadata[key]
+    # 響應式輸出與色盤以精簡格式寫入 (見 get_compact_variants)，低畫質預覽原樣寫入
+    # 相似度特徵只供建置時分群，不寫入資料檔
+    for key, value in extra.items():
+        if not value or key == "similarity":
+            continue
+        if key == "variants":
+            value = get_compact_variants(value)
+        elif key == "palette":
+            value = [[*entry["color"], entry["weight"]] for entry in value]
+        img_data[key] = value
+    return img_data
+
+
+def get_compact_variants(variants):
+    """
+    建置清單中的響應式輸出列表 -> data_photos.js 的 columnar 格式
+    {"width": [...], "height": [...], "format": [...], "file": [...], "bytes": [...]} (與 pack_photo_columns 相同)，
+    省去每個輸出重複的欄位名稱。
+    """
+    return pack_photo_columns(variants)
+
+
+def expand_variants(columns):
+    """get_compact_variants() 的反向操作，回傳 [{"width", "height", "format", "file", "bytes"}, ...]。"""
+    columns = columns or {}
+    count = len(columns.get("file") or [])
+    return [{key: values[i] for key, values in columns.items()} for i in range(count)]
+
+
+def get_output_signature(output_path):
+    """舊版建置清單沒有相似度特徵時，由已輸出的照片補算 (只需解碼成色彩分析小圖)。"""
+    try:
+        with Image.open(output_path) as img:
+            img.draft('RGB', (img.width // 4, img.height // 4))
+            return get_image_signature(get_color_proxy(img))
+    except Exception as e:
+        print(f"警告：無法計算 {os.path.basename(output_path)} 的相似度特徵: {e}")
+        return None
+
+
+def assign_similarity_groups(all_photo_data, signatures):
+    """
+    signatures: {(分類, 檔名): 相似度特徵}。
+    找出近重複 / 相似鏡頭群組，在 all_photo_data 對應照片寫入 similar 群組編號 (1 起算，依分類與檔名排序)，
+    並列出群組報告。回傳群組列表。
+    """
+    groups = find_similar_groups(signatures, similarity_hash_radius, similarity_color_radius)
+    group_ids = {key: group_id for group_id, members in enumerate(groups, 1) for key in members}
+    for category, items in all_photo_data.items():
+        for item in items:
+            group_id = group_ids.get((category, item["filename"]))
+            if group_id:
+                item["similar"] = group_id
+
+    photo_count = sum(len(members) for members in groups)
+    print(f"相似照片: {len(groups)} 組，共 {photo_count} 張 (漢明距離 <= {similarity_hash_radius}，色彩距離 <= {similarity_color_radius})。")
+    for group_id, members in enumerate(groups[:similarity_report_limit], 1):
+        print(f"  #{group_id}: " + ", ".join(f"{category}/{filename}" for category, filename in members))
+    if len(groups) > similarity_report_limit:
+        print(f"  ... 其餘 {len(groups) - similarity_report_limit} 組略過")
+    return groups
+
+
+def get_manifest_signatures(entries):
+    """由建置清單取出 {(分類, 輸出檔名): 相似度特徵}。"""
+    signatures = {}
+    for manifest_key, entry in entries.items():
+        signature = (entry.get("extra") or {}).get("similarity")
+        if signature:
+            signatures[(manifest_key.split('/', 1)[0], entry["output"])] = signature
+    return signatures
+
+
+def query_similar_photos(name, radius=similarity_hash_radius, color_radius=similarity_color_radius):
+    """
+    --similar-to：依建置清單建立相似度索引，列出與指定照片相似的照片。
+    name 可以是輸出檔名、原圖檔名或「分類/檔名」。
+    """
+    entries = load_build_manifest()["entries"]
+    signatures = get_manifest_signatures(entries)
+    targets = []
+    for manifest_key, entry in entries.items():
+        category, source_name = manifest_key.split('/', 1)
+        target = (category, entry.get("output"))
+        if target in signatures and name in (manifest_key, source_name, target[1], f"{category}/{target[1]}"):
+            targets.append(target)
+    if not targets:
+        print(f"錯誤：建置清單中找不到 '{name}' 的相似度特徵 (請先執行一般建置)。")
+        return False
+
+    index = build_similarity_index(signatures)
+    for target in targets:
+        results = find_similar(index, signatures, target, radius, color_radius)
+        print(f"與 {target[0]}/{target[1]} 相似的照片 ({len(results)} 張，共索引 {len(signatures)} 張)：")
+        for distance, (category, filename) in results:
+            print(f"  {distance:2d} bits  {category}/{filename}")
+    return True
+
+
+def write_photo_data(all_photo_data, data_mode=data_output_mode, shard=data_shard_output):
+    """寫出 public/js/data_photos.js (以及選用的分類分檔)。"""
+    # Write to public/js/data_photos.js (JS format for CORS-free local execution)
+    # 以 atomic 寫入，中途中斷也不會留下截斷的資料檔
+    output_js_path = os.path.join(output_parent_folder, 'js', 'data_photos.js')
+    try:
+        os.makedirs(os.path.dirname(output_js_path), exist_ok=True)
+        write_text_atomic(output_js_path, build_photo_data_js(all_photo_data, data_mode))
+        print(f"Successfully generated JS data file at: {output_js_path}")
+        if shard:
+            shard_count = write_photo_data_shards(all_photo_data, os.path.dirname(output_js_path))
+            print(f"已輸出 {shard_count} 個分類分檔與索引 data_photos_index.js")
+    except Exception as e:
+        print(f"Error writing to JS file: {e}")
+
+
+def write_map_markers(all_photo_data):
+    """依照片 GPS 重新產生空拍地圖標示；手動維護的標示 (沒有 auto 欄位者) 原樣保留。"""
+    try:
+        existing = load_map_markers(map_markers_file)
+        markers = build_map_markers(all_photo_data, existing, map_cluster_radius)
+        write_text_atomic(map_markers_file, format_map_markers_js(markers))
+        auto_count = sum(1 for marker in markers if marker.get("auto"))
+        print(f"已更新地圖標示 {map_markers_file}：手動 {len(markers) - auto_count} 個，自動 {auto_count} 個。")
+    except Exception as e:
+        print(f"警告：產生地圖標示失敗: {e}")
+
+
+def write_magazine_layouts(all_photo_data):
+    """預先排好雜誌模式的頁序 (見設定區 14)。"""
+    try:
+        layouts = plan_magazine_layouts(all_photo_data, magazine_layout_variants, color_threshold=magazine_color_threshold)
+        write_text_atomic(magazine_layouts_file, format_magazine_layouts_js(layouts))
+        print(f"已更新雜誌版面 {magazine_layouts_file}：桌機/手機各 {len(layouts['desktop'])} 組頁序。")
+    except Exception as e:
+        print(f"警告：產生雜誌版面失敗: {e}")
+
+
+def summarize_build_timings(records, counts, slowest_limit=profile_slowest_files):
+    """
+    records: 本次重新處理的照片 [{"category", "file", "bytes_in", "bytes_out", "timings"}, ...]。
+    回傳執行摘要：張數、輸入/輸出位元組、各階段耗時 (總計與依分類) 與最慢的照片。
+    """
+    def add_stages(target, timings):
+        for stage, seconds in timings.items():
+            target[stage] = target.get(stage, 0.0) + seconds
+
+    def rounded(stages):
+        return {stage: round(seconds, 4) for stage, seconds in sorted(stages.items(), key=lambda item: -item[1])}
+
+    total_stages = {}
+    categories = {}
+    for record in records:
+        group = categories.setdefault(record["category"], {"count": 0, "bytes_in": 0, "bytes_out": 0, "stages": {}})
+        group["count"] += 1
+        group["bytes_in"] += record["bytes_in"]
+        group["bytes_out"] += record["bytes_out"]
+        add_stages(group["stages"], record["timings"])
+        add_stages(total_stages, record["timings"])
+    for group in categories.values():
+        group["stages"] = rounded(group["stages"])
+
+    slowest = sorted(records, key=lambda record: -record["timings"].get("total", 0.0))[:slowest_limit]
+    return {
+        "counts": counts,
+        "bytes_in": sum(record["bytes_in"] for record in records),
+        "bytes_out": sum(record["bytes_out"] for record in records),
+        "stages": rounded(total_stages),
+        "categories": categories,
+        "slowest": [{**record, "timings": rounded(record["timings"])} for record in slowest],
+    }
+
+
+def print_build_timings(summary):
+    """列出各階段耗時 (total 為整張照片耗時，其餘為各階段，平行處理時為各 process 加總)。"""
+    total = summary["stages"].get("total") or 0.0
+    if not total:
+        return
+    print(f"\n各階段耗時 (重新處理 {summary['counts']['processed']} 張，"
+          f"原圖 {summary['bytes_in'] / 1e6:.1f} MB -> 輸出 {summary['bytes_out'] / 1e6:.1f} MB)：")
+    for stage, seconds in summary["stages"].items():
+        if stage != "total":
+            print(f"  {stage:<14}{seconds:8.2f} 秒 ({seconds / total:5.1%})")
+    print(f"  {'total':<14}{total:8.2f} 秒")
+    for category, group in summary["categories"].items():
+        stages = ", ".join(f"{stage} {seconds:.2f}" for stage, seconds in group["stages"].items() if stage != "total")
+        print(f"  [{category}] {group['count']} 張，{group['stages'].get('total', 0.0):.2f} 秒：{stages}")
+
+
+def write_build_profile(profiler, summary):
+    """--profile：寫出 cProfile 統計檔與 JSON 執行摘要，回傳兩個檔案路徑。"""
+    os.makedirs(profile_dir, exist_ok=True)
+    stem = os.path.join(profile_dir, datetime.datetime.now().strftime('build_%Y%m%d_%H%M%S'))
+    profiler.dump_stats(stem + '.prof')
+    write_text_atomic(stem + '.json', json.dumps(summary, ensure_ascii=False, indent=2))
+    return stem + '.prof', stem + '.json'
+
+
+def refresh_metadata_only(data_mode=data_output_mode, shard=data_shard_output, map_markers=auto_map_markers,
+                          similarity=similarity_groups, layouts=magazine_layouts):
+    """
+    --metadata-only：只重新讀取原圖 EXIF，更新 data_photos.js 的 GPS/拍攝時間/機型。
+    不解碼、不輸出也不刪除任何照片；顏色與響應式資料沿用建置清單。
+    建置清單沒有紀錄的照片 (建置清單不納入版本控制，剛 clone 時不存在) 沿用目前 data_photos.js 中的資料。
+    兩者都沒有 (尚未建置) 的照片會列出並中止，不寫入任何檔案，需先執行一般建置。
+    回傳是否已更新資料檔。
+    """
+    if not os.path.isdir(source_parent_folder):
+        print(f"錯誤：找不到來源資料夾 '{source_parent_folder}'。")
+        return False
+
+    manifest = load_build_manifest()
+    entries = manifest["entries"]
+    try:
+        published = load_photo_data()
+    except FileNotFoundError:
+        published = {}
+    except Exception as e:
+        print(f"警告：無法讀取目前的 data_photos.js ({e})。")
+        published = {}
+    published_items = {(category, item["filename"]): item for category, items in published.items() for item in items}
+    all_photo_data = {}
+    scanned_count = 0
+    kept_count = 0
+    missing = []
+
+    print("\n--- 只更新照片中繼資料 (不處理圖片) ---")
+    for category in portfolio_categories:
+        source_category_path = os.path.join(source_parent_folder, category)
+        output_category_path = os.path.join(output_parent_folder, 'photos', category)
+        all_photo_data[category] = []
+        if not os.path.isdir(source_category_path):
+            continue
+
+        files = [f for f in os.listdir(source_category_path) if os.path.splitext(f)[1].lower() in supported_extensions]
+        used_filenames = set()
+        for filename in files:
+            source_path = os.path.join(source_category_path, filename)
+            final_filename = get_clean_filename(filename, used_filenames)
+            entry = entries.get(f"{category}/{filename}")
+            output_exists = os.path.exists(os.path.join(output_category_path, final_filename))
+            if not entry or entry.get("output") != final_filename or not output_exists:
+                item = published_items.get((category, final_filename))
+                if not item or not output_exists:
+                    missing.append(f"{category}/{filename}")
+                    continue
+                # 沒有建置清單紀錄：其餘欄位沿用已發布的資料，只換成重新掃描的 EXIF 欄位
+                metadata = scan_metadata(source_path)
+                scanned_count += 1
+                kept_count += 1
+                kept = build_photo_entry(final_filename, item.get("color"), metadata, {})
+                kept.update((key, value) for key, value in item.items()
+                            if key not in ("filename", "color", "gps", "taken", "camera", "similar"))
+                all_photo_data[category].append(kept)
+                continue
+
+            stat = os.stat(source_path)
+            metadata, stamp = get_source_metadata(entry, source_path, {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+            if entry.get("metadata") is not metadata:
+                scanned_count += 1
+            entry["metadata"] = metadata
+            entry["metadata_stat"] = stamp
+
+            color = tuple(entry["color"]) if entry.get("color") else None
+            all_photo_data[category].append(build_photo_entry(final_filename, color, metadata, entry.get("extra") or {}))
+
+    if missing:
+        print(f"錯誤：{len(missing)} 張照片尚未建置 (建置清單與 data_photos.js 都沒有資料)：")
+        for key in missing:
+            print(f"  - {key}")
+        print("未寫入任何檔案，請先執行一般建置。")
+        return False
+
+    save_build_manifest(manifest)
+    print(f"重新掃描 EXIF {scanned_count} 張 (其中 {kept_count} 張沒有建置清單紀錄，沿用 data_photos.js 的資料)。")
+    if similarity:
+        if kept_count:
+            # 沒有建置清單紀錄的照片沒有相似度特徵，無法重新分群，沿用已發布的群組編號
+            for category, items in all_photo_data.items():
+                for item in items:
+                    group_id = published_items.get((category, item["filename"]), {}).get("similar")
+                    if group_id:
+                        item["similar"] = group_id
+        else:
+            assign_similarity_groups(all_photo_data, get_manifest_signatures(entries))
+    write_photo_data(all_photo_data, data_mode, shard)
+    if map_markers:
+        write_map_markers(all_photo_data)
+    if layouts:
+        write_magazine_layouts(all_photo_data)
+    return True
+
+
+def run_processor(full_rebuild=False, jobs=parallel_jobs, draft_decode=jpeg_draft_decode,
+                  data_mode=data_output_mode, shard=data_shard_output, map_markers=auto_map_markers,
+                  similarity=similarity_groups, layouts=magazine_layouts, profile=False, max_memory=max_memory_mb):
+    """
+    主執行函式。
+    預設為增量建置：只重新處理新增或變更的照片，並移除原圖已刪除的輸出。
+    full_rebuild=True 時會先清空 public/photos 並忽略建置清單。
+    jobs 為平行處理的 process 數量，0 代表使用全部 CPU 核心。
+    draft_decode=False 時 JPEG 改用完整解碼，方便與縮小解碼比較畫質。
+    data_mode / shard 控制 data_photos.js 的格式與是否另外輸出分類分檔 (見設定區 11)。
+    map_markers=True 時依照片 GPS 更新空拍地圖標示 (見設定區 12)。
+    similarity=True 時偵測相似照片並寫入 similar 群組編號 (見設定區 13)。
+    layouts=True 時預先排好雜誌模式頁序 (見設定區 14)。
+    profile=True 時以 cProfile 記錄整個建置並寫出執行摘要 (見設定區 15)；cProfile 只能記錄單一 process，因此固定 jobs=1。
+    max_memory (MB) 限制平行處理時同時處理中照片的影像記憶體 (見設定區 16)。
+    """
+
+    if full_rebuild:
+        clean_output()
+    elif os.path.exists(output_json_file):
+        # legacy JSON 檔案已不再使用，增量模式下仍一併移除
+        try:
+            os.remove(output_json_file)
+        except Exception:
+            pass
 
     if not os.path.isdir(source_parent_folder):
         print(f"錯誤：找不到來源資料夾 '{source_parent_folder}'。")
         return
 
+    if jobs <= 0:
+        jobs = os.cpu_count() or 1
+    profiler = None
+    if profile:
+        if jobs != 1:
+            print(f"--profile：cProfile 只能記錄單一 process，改用 jobs=1 (原為 {jobs})。")
+            jobs = 1
+        profiler = cProfile.Profile()
+        profiler.enable()
+    started = datetime.datetime.now()
+
     # 確保 public 資料夾存在 (即使沒有照片也該建立)
     os.makedirs(output_parent_folder, exist_ok=True)
     
     # --- 1. 處理作品集分類照片 (加浮水印，寬度 1280px) ---
 
+    manifest = {"version": build_manifest_version, "entries": {}} if full_rebuild else load_build_manifest()
+    old_entries = manifest["entries"]
+    new_entries = {}
+    settings_hash = get_settings_fingerprint(draft_decode)
+    variant_formats = get_variant_formats()
+
     all_photo_data = {}
     print("\n--- 正在處理作品集照片 (將加上浮水印與計算顏色) ---")
+
+    # 第一階段：依固定順序分派輸出檔名並比對快取，決定哪些照片需要重新處理
+    category_tasks = {}
     for category in portfolio_categories:
         source_category_path = os.path.join(source_parent_folder, category)
         output_category_path = os.path.join(output_parent_folder, 'photos', category)
@@ -278,65 +1206,129 @@ def run_processor():
         
         if not files:
             print(f"  - 分類 '{category}' 中沒有找到圖片。")
+            prune_outputs(output_category_path, set())
             continue
 
         # 用於追蹤已分派的檔名，確保不重複
         used_filenames = set()
+        category_tasks[category] = []
 
         for filename in files:
             source_path = os.path.join(source_category_path, filename)
-            
-            # --- 檔名清洗與去重邏輯 ---
-            # 1. 分離檔名與副檔名
-            name_part, ext = os.path.splitext(filename)
-            
-            # 2. 清洗: 去除首尾空白
-            name_part = name_part.strip()
-            
-            # 3. 統一副檔名: 小寫，jpeg -> jpg
-            ext = ext.lower()
-            if ext == '.jpeg': ext = '.jpg'
-            
-            # 4. 產生候選檔名
-            clean_filename = f"{name_part}{ext}"
-            final_filename = clean_filename
-            
-            # 5. 檢查重複並編號 (如: 基隆望幽谷-2.jpg)
-            counter = 1
-            while final_filename in used_filenames:
-                counter += 1
-                final_filename = f"{name_part}-{counter}{ext}"
-            
-            used_filenames.add(final_filename)
-            # ---------------------------
-
+            final_filename = get_clean_filename(filename, used_filenames)
             output_path = os.path.join(output_category_path, final_filename)
-            
-            success, color, gps_info = process_image(source_path, output_path, target_width=portfolio_resize_width, add_watermark=True)
+            manifest_key = f"{category}/{filename}"
+
+            old_entry = old_entries.get(manifest_key)
+            cached, file_info = get_cached_entry(old_entry, source_path, output_path, settings_hash)
+            # EXIF 只讀檔頭，與影像處理分開；原圖未變更時直接沿用快取
+            metadata, metadata_stat = get_source_metadata(old_entry, source_path, file_info)
+            category_tasks[category].append({
+                "source_path": source_path,
+                "output_path": output_path,
+                "filename": final_filename,
+                "manifest_key": manifest_key,
+                "cached": cached,
+                "file_info": file_info,
+                "metadata": metadata,
+                "metadata_stat": metadata_stat,
+                "draft_decode": draft_decode,
+                "variant_formats": variant_formats,
+            })
+
+    # 第二階段：只處理快取未命中的照片 (可平行)
+    pending_tasks = [task for tasks in category_tasks.values() for task in tasks if not task["cached"]]
+    for task, (result, timings) in zip(pending_tasks, run_image_tasks(pending_tasks, jobs, max_memory)):
+        task["result"] = result
+        task["timings"] = timings
+
+    # 第三階段：依原本順序組合資料，確保 data_photos.js 與單執行緒結果相同
+    reused_count = 0
+    processed_count = 0
+    failed_count = 0
+    signatures = {}
+    timing_records = []
+    for category, tasks in category_tasks.items():
+        # 成功輸出的檔名，其餘舊檔會在分類處理完後移除
+        published_filenames = set()
+
+        for task in tasks:
+            cached = task["cached"]
+            file_info = task["file_info"]
+            final_filename = task["filename"]
+
+            if cached:
+                success = True
+                color = tuple(cached["color"]) if cached.get("color") else None
+                extra = cached.get("extra") or {}
+                reused_count += 1
+                if similarity and "similarity" not in extra:
+                    signature = get_output_signature(task["output_path"])
+                    if signature:
+                        extra = {**extra, "similarity": signature}
+            else:
+                success, color, _, extra = task["result"]
+                if success:
+                    processed_count += 1
+                    if "sha256" not in file_info:
+                        file_info["sha256"] = get_file_sha256(task["source_path"])
+                    timing_records.append({
+                        "category": category,
+                        "file": final_filename,
+                        "bytes_in": file_info["size"],
+                        "bytes_out": sum(v["bytes"] for v in extra.get("variants", [])),
+                        "timings": task["timings"],
+                    })
+                else:
+                    failed_count += 1
+
             if success:
-                # Store object instead of string
-                img_data = {
-                    "filename": final_filename, # 使用新的乾淨檔名
-                    "color": color # (r, g, b)
+                new_entries[task["manifest_key"]] = {
+                    **file_info,
+                    "settings": settings_hash,
+                    "output": final_filename,
+                    "color": list(color) if color else None,
+                    "extra": extra,
+                    "metadata": task["metadata"],
+                    "metadata_stat": task["metadata_stat"],
                 }
-                # 如果有 GPS 資訊才加入
-                if gps_info:
-                    img_data["gps"] = gps_info
-                
-                all_photo_data[category].append(img_data)
+                published_filenames.add(final_filename)
+                published_filenames.update(v["file"] for v in extra.get("variants", []))
+                all_photo_data[category].append(build_photo_entry(final_filename, color, task["metadata"], extra))
+                if extra.get("similarity"):
+                    signatures[(category, final_filename)] = extra["similarity"]
 
-    # 確保 public 資料夾存在 (即使沒有照片也該建立)
-    # Write to public/js/data_photos.js (JS format for CORS-free local execution)
-    output_js_path = os.path.join(output_parent_folder, 'js', 'data_photos.js')
-    try:
-        os.makedirs(os.path.dirname(output_js_path), exist_ok=True)
-        with open(output_js_path, 'w', encoding='utf-8') as f:
-            f.write('window.globalPhotoData = ')
-            json.dump(all_photo_data, f, ensure_ascii=False, indent=2)
-            f.write(';')
-        print(f"Successfully generated JS data file at: {output_js_path}")
-    except Exception as e:
-        print(f"Error writing to JS file: {e}")
+        # 移除原圖已刪除或改名後留下的舊輸出
+        output_category_path = os.path.join(output_parent_folder, 'photos', category)
+        prune_outputs(output_category_path, published_filenames)
+
+    manifest["entries"] = new_entries
+    save_build_manifest(manifest)
+    removed_count = len(set(old_entries) - set(new_entries))
+    print(f"\n增量建置: 重新處理 {processed_count} 張，沿用快取 {reused_count} 張，移除 {removed_count} 筆舊紀錄。")
+    timing_summary = summarize_build_timings(timing_records, {
+        "processed": processed_count, "reused": reused_count, "removed": removed_count, "failed": failed_count,
+    })
+    print_build_timings(timing_summary)
+
+    if similarity:
+        assign_similarity_groups(all_photo_data, signatures)
+    write_photo_data(all_photo_data, data_mode, shard)
+    if map_markers:
+        write_map_markers(all_photo_data)
+    if layouts:
+        write_magazine_layouts(all_photo_data)
+
+    if profiler:
+        profiler.disable()
+        timing_summary.update({
+            "started": started.isoformat(timespec='seconds'),
+            "wall_seconds": round((datetime.datetime.now() - started).total_seconds(), 3),
+            "full_rebuild": full_rebuild,
+            "settings": settings_hash,
+        })
+        prof_path, summary_path = write_build_profile(profiler, timing_summary)
+        print(f"已寫出效能分析 {prof_path} 與執行摘要 {summary_path}")
 
     # Legacy JSON file (optional, keeping for backup if needed, or remove)
     # output_json_path = os.path.join(public_dir, 'photos.json')
@@ -344,8 +1336,130 @@ def run_processor():
     print("\n--- 所有處理程序完成！public/assets 未被修改。 ---")
 
 
+def get_source_snapshot():
+    """{分類/檔名: (大小, 修改時間)}：只列目錄與 stat，不讀檔。"""
+    snapshot = {}
+    for category in portfolio_categories:
+        source_category_path = os.path.join(source_parent_folder, category)
+        if not os.path.isdir(source_category_path):
+            continue
+        for entry in os.scandir(source_category_path):
+            if os.path.splitext(entry.name)[1].lower() not in supported_extensions:
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if entry.is_file():
+                snapshot[f"{category}/{entry.name}"] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+
+def diff_source_snapshots(old, new):
+    """回傳 (新增, 變更, 移除) 的「分類/檔名」列表。"""
+    added = sorted(set(new) - set(old))
+    removed = sorted(set(old) - set(new))
+    changed = sorted(key for key in set(old) & set(new) if old[key] != new[key])
+    return added, changed, removed
+
+
+def watch_sources(interval=watch_interval, debounce=watch_debounce, full_rebuild=False, **build_options):
+    """
+    --watch：先執行一次建置，之後持續監看 photos/ 各分類資料夾 (輪詢，不需額外套件)。
+    偵測到變動且靜止 debounce 秒後執行增量建置：只處理新增或變更的照片、移除已刪除照片的輸出，
+    其餘照片直接沿用建置清單，資料檔只有受影響的照片會改變。
+    建置失敗時記下當時的來源狀態，直到來源再次變動才重試。按 Ctrl+C 結束 (初次建置中也可以)。
+    """
+    try:
+        run_processor(full_rebuild=full_rebuild, **build_options)
+        built = get_source_snapshot()
+        failed = None
+        print(f"\n--- 監看 {source_parent_folder}/ 中 (每 {interval} 秒檢查，按 Ctrl+C 結束) ---")
+        while True:
+            time.sleep(interval)
+            current = get_source_snapshot()
+            if current == built or current == failed:
+                continue
+
+            # 等到一段時間沒有變動 (複製中的檔案大小與修改時間會持續改變) 再建置
+            stable_since = time.monotonic()
+            while time.monotonic() - stable_since < debounce:
+                time.sleep(interval)
+                latest = get_source_snapshot()
+                if latest != current:
+                    current = latest
+                    stable_since = time.monotonic()
+
+            added, changed, removed = diff_source_snapshots(built, current)
+            if not (added or changed or removed):
+                # 變動後又恢復原狀 (例如複製後立即刪除)
+                failed = None
+                continue
+            print(f"\n[{datetime.datetime.now():%H:%M:%S}] 偵測到變動：新增 {len(added)}、變更 {len(changed)}、移除 {len(removed)} 張")
+            for label, keys in (("+", added), ("*", changed), ("-", removed)):
+                for key in keys:
+                    print(f"  {label} {key}")
+
+            started = time.perf_counter()
+            try:
+                run_processor(**build_options)
+            except Exception as e:
+                # 例如建置途中檔案又被移動；同一個來源狀態不重複建置，下次偵測到變動時再試
+                print(f"警告：建置失敗: {e}")
+                failed = current
+                continue
+            built = current
+            failed = None
+            print(f"--- 更新完成 ({time.perf_counter() - started:.2f} 秒)，繼續監看 ---")
+    except KeyboardInterrupt:
+        print("\n已停止監看。")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="處理作品集照片並產生 public/js/data_photos.js")
+    parser.add_argument('--full', action='store_true', help="忽略建置清單，清空 public/photos 後全部重新處理")
+    parser.add_argument('--jobs', type=int, default=parallel_jobs, metavar='N', help="平行處理的 process 數量 (0 = 全部 CPU 核心)")
+    parser.add_argument('--max-memory', type=int, default=max_memory_mb, metavar='MB',
+                        help="平行處理時同時處理中照片的影像記憶體上限 (依檔頭像素數估計，0 = 不限制)")
+    parser.add_argument('--no-draft', dest='draft_decode', action='store_false', default=jpeg_draft_decode,
+                        help="JPEG 改用完整解碼後再縮放 (用於與縮小解碼比較畫質)")
+    parser.add_argument('--data-format', dest='data_mode', choices=['compact', 'pretty'], default=data_output_mode,
+                        help="data_photos.js 格式 (compact：columnar 精簡格式；pretty：縮排格式)")
+    parser.add_argument('--shard', action='store_true', default=data_shard_output,
+                        help="另外依分類輸出 public/js/photos/<分類>.js 與索引檔，供前端按需載入")
+    parser.add_argument('--metadata-only', action='store_true',
+                        help="只重新讀取原圖 EXIF 並更新 data_photos.js 的 GPS/拍攝時間/機型，不處理圖片")
+    parser.add_argument('--map-markers', action='store_true', default=auto_map_markers,
+                        help="依照片 GPS 自動產生 public/js/map_markers.js (保留手動標示)")
+    parser.add_argument('--no-similar', dest='similarity', action='store_false', default=similarity_groups,
+                        help="不偵測相似照片，data_photos.js 不寫入 similar 群組編號")
+    parser.add_argument('--no-layouts', dest='layouts', action='store_false', default=magazine_layouts,
+                        help="不預先排版雜誌模式 (不更新 public/js/magazine_layouts.js)")
+    parser.add_argument('--profile', action='store_true',
+                        help="以 cProfile 記錄整個建置，輸出 .build_profiles/ 下的 .prof 與 JSON 執行摘要 (固定單一 process)")
+    parser.add_argument('--similar-to', metavar='檔名',
+                        help="依建置清單列出與指定照片相似的照片 (不處理圖片)")
+    parser.add_argument('--watch', action='store_true',
+                        help="建置後持續監看 photos/，有照片新增、變更或刪除時自動增量建置 (Ctrl+C 結束)")
+    return parser.parse_args()
+
+
 if __name__ == '__main__':
-    run_processor()
+    args = parse_args()
+    if args.similar_to:
+        query_similar_photos(args.similar_to)
+    elif args.watch:
+        watch_sources(full_rebuild=args.full, jobs=args.jobs, draft_decode=args.draft_decode,
+                      data_mode=args.data_mode, shard=args.shard, map_markers=args.map_markers,
+                      similarity=args.similarity, layouts=args.layouts, max_memory=args.max_memory)
+    elif args.metadata_only:
+        refresh_metadata_only(data_mode=args.data_mode, shard=args.shard, map_markers=args.map_markers,
+                              similarity=args.similarity, layouts=args.layouts)
+    else:
+        run_processor(full_rebuild=args.full, jobs=args.jobs, draft_decode=args.draft_decode,
+                      data_mode=args.data_mode, shard=args.shard, map_markers=args.map_markers,
+                      similarity=args.similarity, layouts=args.layouts, profile=args.profile,
+                      max_memory=args.max_memory)
     # 在程式結束前暫停，方便在終端機查看所有 print 訊息
     # input("請按 Enter 鍵結束...")
     pass
@@ -1,61 +1,717 @@
 import os
+import sys
+import json
+import time
+import hashlib
 import subprocess
 import shutil
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 
-video_dir = r'd:\12_網頁\01_LCT\background'
-videos = ['your-hero-video1.mp4', 'your-hero-video2.mp4', 'your-hero-video3.mp4', 'your-hero-video4.mp4']
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; without it the poster falls back to the first frame
+    np = None
 
-print(f"Processing videos in {video_dir}...")
+# Videos are discovered automatically in background/ next to this script:
+#   name_original.mp4 : untouched source (backup made on the first run)
+#   name.mp4          : optimized output (or a brand-new source before its first run)
+site_root = os.path.dirname(os.path.abspath(__file__))
+video_dir = os.path.join(site_root, 'background')
 
-for v in videos:
+# Build manifest: source hash + encoder arguments + output hashes, used to skip unchanged videos
+manifest_file = os.path.join(site_root, '.video_build_manifest.json')
+
+# Per-run JSON report (encode time, speed, sizes, durations, compression ratio)
+report_dir = os.path.join(site_root, '.video_reports')
+# Progress lines are printed at most this often per encode (seconds)
+progress_interval = 5
+
+# Encoder settings
+# -q:v 2 : High quality Jpeg poster
+# scale=-2:1080 : Resize to 1080p (scaled once, shared by both encoders)
+# -b:v : Target bitrate (WebM 3Mbps / MP4 3.5Mbps)
+poster_quality = '2'
+target_height = 1080
+webm_bitrate = '3000k'
+mp4_bitrate = '3500k'
+
+# Poster selection
+# 'auto'  : sample poster_samples frames (fast seek, 320px) and keep the sharpest / best exposed / most colorful one
+# 'first' : always the first frame (previous behaviour)
+poster_mode = 'auto'
+poster_samples = 12
+poster_sample_width = 320
+poster_sample_height = 180
+# Score weights (each metric is normalised to 0..1 across the samples of one video)
+poster_weights = {'sharpness': 0.5, 'exposure': 0.3, 'colorfulness': 0.2}
+
+# Adaptive bitrate ladder (--abr)
+# One ffmpeg pass encodes every rendition with aligned keyframes into fMP4 segments;
+# the same segments are referenced by both the DASH manifest (manifest.mpd) and the HLS playlists (master.m3u8).
+# Renditions taller than the source are skipped.
+abr_dir = os.path.join(video_dir, 'abr')
+abr_ladder = [
+    {'height': 360, 'bitrate': '800k'},
+    {'height': 540, 'bitrate': '1400k'},
+    {'height': 720, 'bitrate': '2200k'},
+    {'height': 1080, 'bitrate': '3500k'},
+]
+abr_segment_seconds = 4
+abr_descriptor_name = 'stream.json'
+
+BACKUP_SUFFIX = '_original'
+# Encodes are written here first and moved next to the source only when ffmpeg succeeds,
+# so an interrupted or failed run never leaves a truncated name.mp4 / .webm / .jpg behind.
+# (Not scanned by discover_videos(), which is not recursive.)
+temp_dir = os.path.join(video_dir, '.encoding')
+
+
+def default_workers():
+    # Each ffmpeg process already uses several threads, so run roughly one encode per two cores.
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path, previous=None):
+    """size + mtime + sha256; the hash is reused when size and mtime are unchanged."""
+    stat = os.stat(path)
+    info = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+    if previous and previous.get("size") == info["size"] and previous.get("mtime_ns") == info["mtime_ns"]:
+        info["sha256"] = previous.get("sha256")
+    else:
+        info["sha256"] = file_sha256(path)
+    return info
+
+
+def load_manifest():
+    if not os.path.exists(manifest_file):
+        return {}
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Warning: could not read {manifest_file} ({e}), re-encoding everything.")
+        return {}
+
+
+def save_manifest(manifest):
+    tmp_path = manifest_file + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_file)
+
+
+def discover_videos():
+    """
+    Find hero videos in background/ (not recursive).
+    A video is identified by its base name; name_original.mp4 and name.mp4 count as the same video.
+    """
+    if not os.path.isdir(video_dir):
+        return []
+    names = set()
+    for filename in os.listdir(video_dir):
+        stem, ext = os.path.splitext(filename)
+        if ext.lower() != '.mp4':
+            continue
+        if stem.endswith(BACKUP_SUFFIX):
+            stem = stem[:-len(BACKUP_SUFFIX)]
+        names.add(f"{stem}.mp4")
+    return sorted(names)
+
+
+def get_output_paths(v):
+    base_name = os.path.splitext(v)[0]
+    return {
+        "poster": os.path.join(video_dir, f"{base_name}.jpg"),
+        "webm": os.path.join(video_dir, f"{base_name}.webm"),
+        "mp4": os.path.join(video_dir, f"{base_name}.mp4"), # This replaces the original file location
+    }
+
+
+def prepare_source(v, entry=None, new_source=False):
+    """
+    Backup logic:
+    If backup exists, use IT as input (because original_input_path might handle be overwritten or already processed)
+    If backup doesn't exist, move original to backup, then use backup as input.
+    The backup is never replaced automatically. When name.mp4 is not the output recorded in the manifest,
+    it is only promoted to the new source with new_source=True (--new-source); otherwise the video is left
+    untouched so a dropped-in source is not overwritten by re-encoding the old backup.
+    Returns (input path or None, status) where status is 'ok', 'missing' or 'conflict'.
+    """
     original_input_path = os.path.join(video_dir, v)
-    backup_path = os.path.join(video_dir, f"{os.path.splitext(v)[0]}_original.mp4")
-    
-    # Backup logic: 
-    # If backup exists, use IT as input (because original_input_path might handle be overwritten or already processed)
-    # If backup doesn't exist, move original to backup, then use backup as input.
-    
-    input_source = ""
-    
+    backup_path = os.path.join(video_dir, f"{os.path.splitext(v)[0]}{BACKUP_SUFFIX}.mp4")
+
     if os.path.exists(backup_path):
-        print(f"Backup found for {v}, using backup as source.")
-        input_source = backup_path
-    else:
-        if os.path.exists(original_input_path):
-            print(f"Backing up {v}...")
-            shutil.move(original_input_path, backup_path)
-            input_source = backup_path
+        recorded_mp4 = ((entry or {}).get("outputs") or {}).get("mp4")
+        changed = os.path.exists(original_input_path) and (
+            not recorded_mp4
+            or file_fingerprint(original_input_path, recorded_mp4)["sha256"] != recorded_mp4.get("sha256"))
+        if changed and new_source:
+            print(f"Using {v} as the new source, replacing {os.path.basename(backup_path)}.")
+            os.replace(original_input_path, backup_path)
+        elif changed and recorded_mp4:
+            print(f"Warning: {v} differs from the last optimized output; leaving it untouched. "
+                  f"Run with --new-source if it is a new source, or delete it to re-encode from the backup.")
+            return None, 'conflict'
         else:
-            print(f"Warning: {v} not found!")
+            print(f"Backup found for {v}, using backup as source.")
+        return backup_path, 'ok'
+
+    if os.path.exists(original_input_path):
+        print(f"Backing up {v}...")
+        shutil.move(original_input_path, backup_path)
+        return backup_path, 'ok'
+
+    print(f"Warning: {v} not found!")
+    return None, 'missing'
+
+
+def get_temp_paths(output_paths):
+    return {key: os.path.join(temp_dir, os.path.basename(path)) for key, path in output_paths.items()}
+
+
+def discard_temp_outputs(temp_paths):
+    for path in temp_paths.values():
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def promote_outputs(temp_paths, output_paths):
+    """Move finished encodes into place (same file system, so each os.replace is atomic)."""
+    for key, path in temp_paths.items():
+        if os.path.exists(path):
+            os.replace(path, output_paths[key])
+
+
+def build_ffmpeg_command(input_source, poster_path, webm_path, mp4_path):
+    """
+    One ffmpeg process decodes the source once and fans out through a single filter graph:
+      [0:v] -> split -> poster (first frame)
+                     -> scale to 1080p -> split -> VP9 WebM / H.264 MP4
+    With poster_path=None the poster branch is omitted (the poster is extracted by select_poster()).
+    """
+    if poster_path:
+        filter_graph = (
+            f"[0:v]split=2[poster][main];"
+            f"[main]scale=-2:{target_height},split=2[webm][mp4]"
+        )
+        poster_args = ['-map', '[poster]', '-frames:v', '1', '-q:v', poster_quality, poster_path]
+    else:
+        filter_graph = f"[0:v]scale=-2:{target_height},split=2[webm][mp4]"
+        poster_args = []
+    return [
+        'ffmpeg', '-y', '-i', input_source,
+        '-filter_complex', filter_graph,
+        # 1. Poster (First frame)
+        *poster_args,
+        # 2. WebM (VP9), -an : Remove audio
+        '-map', '[webm]', '-c:v', 'libvpx-vp9', '-b:v', webm_bitrate, '-an', webm_path,
+        # 3. MP4 (H.264)
+        '-map', '[mp4]', '-c:v', 'libx264', '-b:v', mp4_bitrate, '-pix_fmt', 'yuv420p', '-an', mp4_path,
+    ]
+
+
+def format_clock(seconds):
+    seconds = int(max(0, seconds))
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def parse_bitrate_kbps(value):
+    """'3456.7kbits/s' -> 3456.7; 'N/A' -> None"""
+    try:
+        return float(value.replace('kbits/s', ''))
+    except (AttributeError, ValueError):
+        return None
+
+
+def run_ffmpeg(cmd, label, duration=None):
+    """
+    Run ffmpeg with '-progress pipe:1' and report fps / speed / ETA / output bitrate while it encodes.
+    stderr is drained on a separate thread and only the tail is kept for error messages.
+    Returns {'returncode', 'seconds', 'fps', 'speed', 'bitrate_kbps', 'error'}.
+    """
+    cmd = [cmd[0], '-nostats', '-progress', 'pipe:1'] + cmd[1:]
+    started = time.monotonic()
+    stats = {'returncode': None, 'seconds': 0.0, 'fps': None, 'speed': None, 'bitrate_kbps': None, 'error': None}
+    try:
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   text=True, encoding='utf-8', errors='replace')
+    except OSError as e:
+        stats['returncode'] = -1
+        stats['error'] = str(e)
+        return stats
+
+    stderr_tail = deque(maxlen=20)
+    drain = threading.Thread(target=lambda: stderr_tail.extend(line.rstrip() for line in process.stderr), daemon=True)
+    drain.start()
+
+    block = {}
+    last_print = 0.0
+    for line in process.stdout:
+        key, _, value = line.strip().partition('=')
+        if key != 'progress':
+            block[key] = value
             continue
 
+        # One progress block is complete
+        out_time_us = block.get('out_time_us') or block.get('out_time_ms')  # both are microseconds
+        try:
+            out_seconds = int(out_time_us) / 1_000_000
+        except (TypeError, ValueError):
+            out_seconds = None
+        try:
+            stats['fps'] = float(block.get('fps'))
+        except (TypeError, ValueError):
+            pass
+        try:
+            stats['speed'] = float(block.get('speed', '').rstrip('x'))
+        except ValueError:
+            pass
+        stats['bitrate_kbps'] = parse_bitrate_kbps(block.get('bitrate')) or stats['bitrate_kbps']
+        block = {}
+
+        now = time.monotonic()
+        if value == 'end' or now - last_print >= progress_interval:
+            last_print = now
+            parts = [f"  [{label}]"]
+            if duration and out_seconds is not None:
+                parts.append(f"{min(100.0, out_seconds / duration * 100):5.1f}%")
+            if stats['fps'] is not None:
+                parts.append(f"fps={stats['fps']:.1f}")
+            if stats['speed']:
+                parts.append(f"speed={stats['speed']:.2f}x")
+                if duration and out_seconds is not None:
+                    parts.append(f"ETA {format_clock((duration - out_seconds) / stats['speed'])}")
+            if stats['bitrate_kbps']:
+                parts.append(f"bitrate={stats['bitrate_kbps']:.0f}kbps")
+            print(' '.join(parts))
+
+    stats['returncode'] = process.wait()
+    drain.join()
+    stats['seconds'] = round(time.monotonic() - started, 3)
+    if stats['returncode'] != 0:
+        stats['error'] = '\n'.join(stderr_tail) or f"ffmpeg exited with code {stats['returncode']}"
+    return stats
+
+
+def report_encode(report, label, stats):
+    report.setdefault('encodes', []).append({
+        'label': label,
+        'seconds': stats['seconds'],
+        'returncode': stats['returncode'],
+        'fps': stats['fps'],
+        'speed': stats['speed'],
+        'bitrate_kbps': stats['bitrate_kbps'],
+    })
+    if stats['returncode'] != 0:
+        report['status'] = 'failed'
+        report.setdefault('errors', []).append(f"{label}: {stats['error']}")
+        print(f"  ! {label} failed (exit {stats['returncode']}):\n{stats['error']}")
+
+
+def probe_video(path):
+    """Return {'width', 'height', 'duration'} via ffprobe, or {} when ffprobe is unavailable or fails."""
+    cmd = [
+        'ffprobe', '-v', 'error', '-select_streams', 'v:0',
+        '-show_entries', 'stream=width,height:format=duration', '-of', 'json', path,
+    ]
+    try:
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        data = json.loads(result.stdout)
+        stream = (data.get('streams') or [{}])[0]
+        info = {'width': stream.get('width'), 'height': stream.get('height')}
+        duration = (data.get('format') or {}).get('duration')
+        info['duration'] = round(float(duration), 3) if duration else None
+        return info
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return {}
+
+
+def get_abr_renditions(source_height=None):
+    """Ladder rungs that do not upscale the source (at least the smallest rung is always kept)."""
+    if not source_height:
+        return list(abr_ladder)
+    renditions = [r for r in abr_ladder if r['height'] <= source_height]
+    return renditions or abr_ladder[:1]
+
+
+def scale_bitrate(bitrate, factor):
+    return f"{int(int(bitrate.rstrip('k')) * factor)}k"
+
+
+def build_abr_command(input_source, output_dir, renditions):
+    """
+    Single decode -> split -> one scaler + H.264 encoder per rendition -> DASH muxer with HLS playlists.
+    Keyframes are forced every segment so all renditions switch on the same boundaries.
+    """
+    count = len(renditions)
+    filter_graph = f"[0:v]split={count}" + ''.join(f"[s{i}]" for i in range(count)) + ';' + ';'.join(
+        f"[s{i}]scale=-2:{r['height']}[v{i}]" for i, r in enumerate(renditions))
+    cmd = ['ffmpeg', '-y', '-i', input_source, '-filter_complex', filter_graph]
+    for i in range(count):
+        cmd += ['-map', f'[v{i}]']
+    cmd += [
+        '-c:v', 'libx264', '-pix_fmt', 'yuv420p', '-preset', 'medium', '-an',
+        '-sc_threshold', '0', '-force_key_frames', f'expr:gte(t,n_forced*{abr_segment_seconds})',
+    ]
+    for i, r in enumerate(renditions):
+        cmd += [
+            f'-b:v:{i}', r['bitrate'],
+            f'-maxrate:v:{i}', scale_bitrate(r['bitrate'], 1.07),
+            f'-bufsize:v:{i}', scale_bitrate(r['bitrate'], 1.5),
+        ]
+    cmd += [
+        '-f', 'dash', '-seg_duration', str(abr_segment_seconds),
+        '-use_template', '1', '-use_timeline', '1',
+        '-adaptation_sets', 'id=0,streams=v',
+        '-init_seg_name', 'init-$RepresentationID$.m4s',
+        '-media_seg_name', 'chunk-$RepresentationID$-$Number%05d$.m4s',
+        '-hls_playlist', '1', '-hls_master_name', 'master.m3u8',
+        os.path.join(output_dir, 'manifest.mpd'),
+    ]
+    return cmd
+
+
+def site_path(path):
+    """Path relative to the site root with forward slashes, as used by the front end."""
+    return os.path.relpath(path, site_root).replace(os.sep, '/')
+
+
+def build_abr_descriptor(v, renditions, source_info):
+    base_name = os.path.splitext(v)[0]
+    output_dir = os.path.join(abr_dir, base_name)
+    output_paths = get_output_paths(v)
+    descriptor = {
+        'name': base_name,
+        'poster': site_path(output_paths['poster']),
+        'hls': site_path(os.path.join(output_dir, 'master.m3u8')),
+        'dash': site_path(os.path.join(output_dir, 'manifest.mpd')),
+        'segmentSeconds': abr_segment_seconds,
+        'renditions': [{'height': r['height'], 'bitrate': r['bitrate']} for r in renditions],
+        'fallback': {'webm': site_path(output_paths['webm']), 'mp4': site_path(output_paths['mp4'])},
+    }
+    if source_info.get('duration'):
+        descriptor['duration'] = source_info['duration']
+    return descriptor
+
+
+def package_abr(v, input_source, entry=None, force=False, report=None):
+    """
+    Build the ABR ladder for one video unless the source and ladder settings are unchanged.
+    Returns the manifest 'abr' section (the previous one when packaging fails, so it is retried next run).
+    """
+    report = {} if report is None else report
     base_name = os.path.splitext(v)[0]
-    poster_path = os.path.join(video_dir, f"{base_name}.jpg")
-    webm_path = os.path.join(video_dir, f"{base_name}.webm")
-    mp4_path = os.path.join(video_dir, f"{base_name}.mp4") # This replaces the original file location
-
-    print(f"Optimizing {base_name}...")
-
-    # 1. Poster (First frame)
-    # -vframes 1: Grab 1 frame
-    # -q:v 2: High quality Jpeg
-    cmd_poster = ['ffmpeg', '-y', '-i', input_source, '-ss', '00:00:00', '-vframes', '1', '-q:v', '2', poster_path]
-    subprocess.run(cmd_poster, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    print(f"  -> Generated Poster: {os.path.basename(poster_path)}")
-    
-    # 2. WebM (VP9)
-    # -vf scale=-2:1080 : Resize to 1080p
-    # -an : Remove audio
-    # -b:v 3000k : Target bitrate 3Mbps
-    cmd_webm = ['ffmpeg', '-y', '-i', input_source, '-vf', 'scale=-2:1080', '-c:v', 'libvpx-vp9', '-b:v', '3000k', '-an', webm_path]
-    subprocess.run(cmd_webm, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    print(f"  -> Generated WebM: {os.path.basename(webm_path)}")
-
-    # 3. MP4 (H.264)
-    # -c:v libx264
-    # -b:v 3500k : Target bitrate 3.5Mbps
-    cmd_mp4 = ['ffmpeg', '-y', '-i', input_source, '-vf', 'scale=-2:1080', '-c:v', 'libx264', '-b:v', '3500k', '-pix_fmt', 'yuv420p', '-an', mp4_path]
-    subprocess.run(cmd_mp4, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    print(f"  -> Generated MP4: {os.path.basename(mp4_path)}")
-
-print("\nAll videos optimized!")
+    output_dir = os.path.join(abr_dir, base_name)
+    descriptor_path = os.path.join(output_dir, abr_descriptor_name)
+    source_sha = file_fingerprint(input_source, (entry or {}).get('source'))['sha256']
+
+    source_info = probe_video(input_source)
+    renditions = get_abr_renditions(source_info.get('height'))
+    settings = hashlib.sha256(json.dumps(
+        build_abr_command('<input>', '<output>', renditions)).encode('utf-8')).hexdigest()
+
+    previous = (entry or {}).get('abr') or {}
+    if not force and previous.get('settings') == settings and previous.get('source') == source_sha \
+            and os.path.exists(descriptor_path):
+        print(f"Skipping ABR ladder for {base_name} (unchanged).")
+        return previous
+
+    ladder_label = ', '.join(f"{r['height']}p" for r in renditions)
+    print(f"Packaging ABR ladder for {base_name} ({ladder_label})...")
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    os.makedirs(output_dir)
+    stats = run_ffmpeg(build_abr_command(input_source, output_dir, renditions),
+                       f"{base_name} abr", source_info.get('duration'))
+    report_encode(report, 'abr', stats)
+    if stats['returncode'] != 0:
+        return previous
+
+    descriptor = build_abr_descriptor(v, renditions, source_info)
+    with open(descriptor_path, 'w', encoding='utf-8') as f:
+        json.dump(descriptor, f, ensure_ascii=False, indent=2)
+    print(f"  -> Generated {site_path(descriptor_path)}")
+    return {'source': source_sha, 'settings': settings, 'descriptor': site_path(descriptor_path)}
+
+
+def get_sample_times(duration, samples):
+    """Evenly spaced timestamps, skipping the first and last 5% (take-off / landing of drone clips)."""
+    start, end = duration * 0.05, duration * 0.95
+    if samples <= 1 or end <= start:
+        return [round(duration / 2, 3)]
+    step = (end - start) / (samples - 1)
+    return [round(start + i * step, 3) for i in range(samples)]
+
+
+def grab_frame(input_source, timestamp):
+    """Decode one downscaled RGB frame with a fast (input) seek; returns an HxWx3 uint8 array or None."""
+    cmd = [
+        'ffmpeg', '-v', 'error', '-ss', str(timestamp), '-i', input_source, '-frames:v', '1',
+        '-vf', f'scale={poster_sample_width}:{poster_sample_height}',
+        '-f', 'rawvideo', '-pix_fmt', 'rgb24', 'pipe:1',
+    ]
+    try:
+        data = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    frame_size = poster_sample_width * poster_sample_height * 3
+    if len(data) < frame_size:
+        return None
+    return np.frombuffer(data[:frame_size], dtype=np.uint8).reshape(poster_sample_height, poster_sample_width, 3)
+
+
+def score_frames(frames):
+    """
+    Vectorised quality metrics for a stack of frames (N x H x W x 3):
+      sharpness    : variance of the Laplacian of luma (motion blur / defocus -> low)
+      exposure     : mean luma close to mid-grey, penalised by clipped shadows / highlights
+      colorfulness : Hasler & Suesstrunk rg/yb metric
+    Returns (scores, metrics) where metrics holds the raw values per frame.
+    """
+    rgb = np.stack(frames).astype(np.float32) / 255.0
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    luma = 0.299 * r + 0.587 * g + 0.114 * b
+
+    laplacian = (luma[:, :-2, 1:-1] + luma[:, 2:, 1:-1] + luma[:, 1:-1, :-2] + luma[:, 1:-1, 2:]
+                 - 4 * luma[:, 1:-1, 1:-1])
+    sharpness = laplacian.reshape(len(frames), -1).var(axis=1)
+
+    mean_luma = luma.reshape(len(frames), -1).mean(axis=1)
+    clipped = ((luma < 0.02) | (luma > 0.98)).reshape(len(frames), -1).mean(axis=1)
+    exposure = np.clip(1 - np.abs(mean_luma - 0.5) * 2, 0, 1) * (1 - clipped)
+
+    rg = (r - g).reshape(len(frames), -1)
+    yb = (0.5 * (r + g) - b).reshape(len(frames), -1)
+    colorfulness = np.sqrt(rg.std(axis=1) ** 2 + yb.std(axis=1) ** 2) + 0.3 * np.sqrt(rg.mean(axis=1) ** 2 + yb.mean(axis=1) ** 2)
+
+    def normalise(values):
+        peak = values.max()
+        return values / peak if peak > 0 else np.zeros_like(values)
+
+    scores = (poster_weights['sharpness'] * normalise(sharpness)
+              + poster_weights['exposure'] * exposure
+              + poster_weights['colorfulness'] * normalise(colorfulness))
+    metrics = {'sharpness': sharpness, 'exposure': exposure, 'colorfulness': colorfulness}
+    return scores, metrics
+
+
+def select_poster(input_source, poster_path, duration):
+    """
+    Pick the best of poster_samples frames and write it (source resolution) to poster_path.
+    Returns {'time', 'score', 'metrics', 'samples'} or None when selection is not possible
+    (poster_mode 'first', NumPy missing, unknown duration, or no frame could be decoded).
+    """
+    if poster_mode != 'auto' or np is None or not duration:
+        return None
+
+    sampled = []
+    for timestamp in get_sample_times(duration, poster_samples):
+        frame = grab_frame(input_source, timestamp)
+        if frame is not None:
+            sampled.append((timestamp, frame))
+    if not sampled:
+        return None
+
+    scores, metrics = score_frames([frame for _, frame in sampled])
+    # argmax returns the earliest frame on ties, so the choice is reproducible
+    best = int(np.argmax(scores))
+    best_time = sampled[best][0]
+
+    cmd = ['ffmpeg', '-y', '-v', 'error', '-ss', str(best_time), '-i', input_source,
+           '-frames:v', '1', '-q:v', poster_quality, poster_path]
+    if subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode != 0:
+        return None
+    return {
+        'time': best_time,
+        'score': round(float(scores[best]), 4),
+        'metrics': {name: round(float(values[best]), 4) for name, values in metrics.items()},
+        'samples': len(sampled),
+    }
+
+
+def get_encoder_settings_hash():
+    """Hash of the full ffmpeg argument list (with placeholder paths); any encoder change invalidates the cache."""
+    args = build_ffmpeg_command('<input>', '<poster>', '<webm>', '<mp4>')
+    poster_settings = [poster_mode, poster_samples, poster_sample_width, poster_sample_height, poster_weights]
+    return hashlib.sha256(json.dumps([args, poster_settings]).encode('utf-8')).hexdigest()
+
+
+def is_up_to_date(entry, source_info, settings_hash, output_paths):
+    if not entry or entry.get("settings") != settings_hash:
+        return False
+    if (entry.get("source") or {}).get("sha256") != source_info["sha256"]:
+        return False
+    for key, path in output_paths.items():
+        recorded = (entry.get("outputs") or {}).get(key)
+        if not recorded or not os.path.exists(path):
+            return False
+        if file_fingerprint(path, recorded)["sha256"] != recorded.get("sha256"):
+            return False
+    return True
+
+
+def optimize_video(v, entry=None, settings_hash=None, force=False, abr=False, report=None, new_source=False):
+    """
+    Encode one video unless the manifest shows source, encoder settings and outputs are unchanged.
+    With abr=True the adaptive bitrate ladder is packaged as well.
+    new_source=True lets a changed name.mp4 replace the backup (see prepare_source()).
+    Outputs are encoded into temp_dir and only replace the published files when ffmpeg succeeds.
+    report (dict) is filled with timings, sizes and durations for the run report.
+    Returns the new manifest entry; the previous entry when encoding fails (so it is retried next run;
+    the published files were not touched), or None when the video is missing or left untouched (conflict).
+    """
+    report = {} if report is None else report
+    report.update({'name': v, 'status': 'ok'})
+    input_source, source_status = prepare_source(v, entry, new_source)
+    if not input_source:
+        report['status'] = source_status
+        return None
+
+    output_paths = get_output_paths(v)
+    base_name = os.path.splitext(v)[0]
+    source_info = file_fingerprint(input_source, (entry or {}).get("source"))
+
+    if not force and is_up_to_date(entry, source_info, settings_hash, output_paths):
+        print(f"Skipping {base_name} (unchanged).")
+        report['status'] = 'skipped'
+        new_entry = dict(entry)
+    else:
+        print(f"Optimizing {base_name}...")
+        source_probe = probe_video(input_source)
+        report['source'] = {'bytes': source_info['size'], 'duration': source_probe.get('duration')}
+
+        os.makedirs(temp_dir, exist_ok=True)
+        temp_paths = get_temp_paths(output_paths)
+        discard_temp_outputs(temp_paths)
+        poster_started = time.monotonic()
+        poster = select_poster(input_source, temp_paths["poster"], source_probe.get('duration'))
+        if poster:
+            print(f"  -> Poster frame at {poster['time']}s (score {poster['score']}, {poster['samples']} samples)")
+            report['poster'] = dict(poster, seconds=round(time.monotonic() - poster_started, 3))
+        poster_path = None if poster else temp_paths["poster"]
+        cmd = build_ffmpeg_command(input_source, poster_path, temp_paths["webm"], temp_paths["mp4"])
+        try:
+            stats = run_ffmpeg(cmd, f"{base_name} webm+mp4", source_probe.get('duration'))
+            report_encode(report, 'webm+mp4', stats)
+            if stats['returncode'] == 0:
+                promote_outputs(temp_paths, output_paths)
+        finally:
+            # Failed, killed or interrupted encodes never reach the published files
+            discard_temp_outputs(temp_paths)
+        if stats['returncode'] != 0:
+            # The published outputs are untouched, so the previous entry (and its recorded mp4) stays valid
+            return entry
+        print(f"  -> Generated Poster/WebM/MP4: {', '.join(os.path.basename(p) for p in output_paths.values())}")
+
+        new_entry = {
+            "source": source_info,
+            "settings": settings_hash,
+            "outputs": {key: file_fingerprint(path) for key, path in output_paths.items() if os.path.exists(path)},
+        }
+        if poster:
+            new_entry["poster"] = poster
+        if entry and entry.get("abr"):
+            new_entry["abr"] = entry["abr"]
+
+        report['outputs'] = {}
+        for key, path in output_paths.items():
+            if not os.path.exists(path):
+                continue
+            size = os.path.getsize(path)
+            output_report = {'bytes': size, 'compression_ratio': round(source_info['size'] / size, 2) if size else None}
+            if key != 'poster':
+                output_report['duration'] = probe_video(path).get('duration')
+            report['outputs'][key] = output_report
+
+    if abr:
+        new_entry["abr"] = package_abr(v, input_source, new_entry, force, report)
+    return new_entry
+
+
+def write_report(report):
+    """Write the run report without overwriting one from another run that started in the same second."""
+    os.makedirs(report_dir, exist_ok=True)
+    stem = os.path.join(report_dir, f"encode-{report['started'].replace(':', '').replace('-', '')}")
+    path = f"{stem}.json"
+    suffix = 1
+    while True:
+        try:
+            f = open(path, 'x', encoding='utf-8')
+            break
+        except FileExistsError:
+            suffix += 1
+            path = f"{stem}-{suffix}.json"
+    with f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Optimize hero background videos (poster + WebM + MP4).")
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help="Number of videos encoded concurrently (default: half the CPU cores)")
+    parser.add_argument('--force', action='store_true', help="Re-encode every video even if unchanged")
+    parser.add_argument('--new-source', action='store_true',
+                        help="Treat a name.mp4 that differs from the last optimized output as a new source "
+                             "and replace its name_original.mp4 backup")
+    parser.add_argument('--abr', action='store_true',
+                        help="Also package an adaptive bitrate ladder (HLS + DASH) into background/abr/<name>/")
+    args = parser.parse_args()
+
+    videos = discover_videos()
+    print(f"Processing {len(videos)} videos in {video_dir}...")
+    if not videos:
+        return
+
+    manifest = load_manifest()
+    settings_hash = get_encoder_settings_hash()
+    workers = max(1, min(args.workers, len(videos)))
+    video_reports = [{} for _ in videos]
+    run_started_at = datetime.now()
+    run_started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(
+            lambda v, r: optimize_video(v, manifest.get(v), settings_hash, args.force, args.abr, r, args.new_source),
+            videos, video_reports))
+
+    for v, entry in zip(videos, results):
+        if entry:
+            manifest[v] = entry
+    save_manifest(manifest)
+
+    failed = [r['name'] for r in video_reports if r.get('status') == 'failed']
+    conflicts = [r['name'] for r in video_reports if r.get('status') == 'conflict']
+    report_path = write_report({
+        'started': run_started_at.isoformat(timespec='seconds'),
+        'seconds': round(time.monotonic() - run_started, 3),
+        'workers': workers,
+        'force': args.force,
+        'abr': args.abr,
+        'settings': settings_hash,
+        'videos': video_reports,
+    })
+    print(f"\nReport: {report_path}")
+
+    if conflicts:
+        print(f"Left untouched (name.mp4 changed, rerun with --new-source to use it): {', '.join(conflicts)}")
+
+    if failed:
+        print(f"Failed: {', '.join(failed)}")
+        sys.exit(1)
+    print("All videos optimized!")
+
+
+if __name__ == '__main__':
+    main()
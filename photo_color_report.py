@@ -0,0 +1,386 @@
+"""
+色調分析報告輸出模組 (TXT / PDF / HTML)。
+
+analyze_colors.py 把報告內容產生為一連串的段落 (section dict)，各輸出格式逐段寫出，不再累積全域文字緩衝：
+  title / heading / text : 文字
+  buckets                : 色系分布 (加權張數與佔比)
+  hue_wheel              : 色相直方圖，PDF/HTML 畫成向量色相輪
+  stacked_bars           : 各分類色系佔比堆疊長條圖
+  contact_sheet          : 照片縮圖聯絡表 (使用已輸出的網站照片)
+PDF 字型只註冊一次；TrueType 字型由 ReportLab 自動子集化，只嵌入用到的字。
+"""
+import io
+import os
+import html
+import math
+import colorsys
+from functools import lru_cache
+
+from PIL import Image
+from reportlab.pdfgen import canvas
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import cm
+from reportlab.lib.utils import ImageReader
+
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# 依序尋找的字型檔；都找不到時改用 ReportLab 內建的繁中 CID 字型 (不嵌入，檔案最小)
+font_candidates = [
+    ('NotoSansTC', os.path.join(script_dir, 'NotoSansTC-VariableFont_wght.ttf')),
+    ('NotoSansTC', os.path.join(script_dir, 'NotoSansTC-Bold.otf')),
+]
+fallback_cid_font = 'MSung-Light'
+
+# 聯絡表縮圖 (PDF 內嵌 JPEG 的長邊像素與品質)
+thumbnail_size = 160
+thumbnail_quality = 70
+
+
+@lru_cache(maxsize=None)
+def get_report_font():
+    """註冊並回傳 PDF 使用的字型名稱；同一個程序只註冊一次。"""
+    for name, path in font_candidates:
+        if not os.path.exists(path):
+            continue
+        try:
+            pdfmetrics.registerFont(TTFont(name, path))
+            return name
+        except Exception as e:
+            print(f"Font registration failed ({os.path.basename(path)}): {e}")
+    print("Warning: NotoSansTC font not found, using built-in CID font for Chinese text.")
+    pdfmetrics.registerFont(UnicodeCIDFont(fallback_cid_font))
+    return fallback_cid_font
+
+
+def get_hue_color(index, bins):
+    """色相直方圖第 index 格的代表色 (r, g, b) 0-1。"""
+    return colorsys.hsv_to_rgb((index + 0.5) / bins, 0.7, 0.9)
+
+
+def hex_to_rgb(value):
+    value = value.lstrip('#')
+    return tuple(int(value[i:i + 2], 16) / 255 for i in (0, 2, 4))
+
+
+def format_count(value):
+    return f"{value:.1f}" if value % 1 else f"{int(value)}"
+
+
+def get_share(value, count):
+    return (value / count * 100) if count > 0 else 0
+
+
+def get_thumbnail_jpeg(path, size=thumbnail_size):
+    """縮成長邊 size 的 JPEG (BytesIO)；讀取失敗時回傳 None。JPEG 直接嵌入 PDF，不會再轉成點陣資料。"""
+    try:
+        with Image.open(path) as img:
+            img.draft('RGB', (size, size))
+            img = img.convert('RGB')
+            img.thumbnail((size, size), Image.Resampling.BICUBIC)
+            buffer = io.BytesIO()
+            img.save(buffer, 'JPEG', quality=thumbnail_quality)
+            buffer.seek(0)
+            return buffer
+    except Exception as e:
+        print(f"  ! 無法讀取縮圖 {os.path.basename(path)}: {e}")
+        return None
+
+
+# --- TXT / Console ---
+
+def iter_text_lines(section):
+    """把段落轉為純文字行 (TXT 報表與終端機輸出)。"""
+    kind = section["type"]
+    if kind in ("title", "text"):
+        yield section["text"]
+    elif kind == "heading":
+        yield ""
+        yield "=" * 30
+        yield f"      {section['text']}      "
+        yield "=" * 30
+    elif kind == "buckets":
+        yield f"\n--- {section['title']} (共 {section['count']} 張) ---"
+        for item in section["items"]:
+            percentage = get_share(item["value"], section["count"])
+            bar = "█" * int(percentage / 5)
+            # Using ljust for alignment in text file (count double width chars)
+            yield f"{item['label']:<18}: {bar} {format_count(item['value'])} ({percentage:.1f}%)"
+    elif kind == "hue_wheel":
+        total = sum(section["bins"]) or 1
+        yield f"\n--- {section['title']} ---"
+        step = 360 // len(section["bins"])
+        for i, value in enumerate(section["bins"]):
+            yield f"{i * step:>3}-{(i + 1) * step:<3}度: {'█' * int(value / total * 40)} {value / total * 100:.1f}%"
+    elif kind == "stacked_bars":
+        yield f"\n--- {section['title']} ---"
+        for row in section["rows"]:
+            shares = " / ".join(f"{get_share(item['value'], row['count']):.0f}%" for item in row["items"])
+            yield f"{row['label']}: {shares}"
+    elif kind == "contact_sheet":
+        yield f"\n--- {section['title']} (共 {len(section['photos'])} 張，縮圖見 PDF / HTML 報表) ---"
+
+
+def write_text_report(sections, path=None, echo=True):
+    """逐段輸出文字報表到檔案 (可選) 與終端機。"""
+    f = open(path, 'w', encoding='utf-8') if path else None
+    try:
+        for section in sections:
+            for line in iter_text_lines(section):
+                if echo:
+                    print(line)
+                if f:
+                    f.write(line + '\n')
+    finally:
+        if f:
+            f.close()
+
+
+# --- PDF ---
+
+def write_pdf_report(sections, path):
+    """逐段繪製 PDF：文字、色系長條、色相輪、堆疊長條與縮圖聯絡表都是向量圖形 (縮圖為 JPEG)。"""
+    font = get_report_font()
+    page_width, page_height = A4
+    margin = 2 * cm
+    content_width = page_width - 2 * margin
+    line_height = 0.6 * cm
+
+    c = canvas.Canvas(path, pagesize=A4, pageCompression=1)
+    state = {"y": page_height - margin}
+
+    def new_page():
+        c.showPage()
+        state["y"] = page_height - margin
+
+    def ensure_space(height):
+        if state["y"] - height < margin:
+            new_page()
+
+    def draw_text(text, size=11, x=margin, gap=line_height):
+        ensure_space(gap)
+        c.setFont(font, size)
+        c.setFillColorRGB(0, 0, 0)
+        c.drawString(x, state["y"], text)
+        state["y"] -= gap
+
+    def draw_legend(items):
+        ensure_space(line_height)
+        x = margin
+        c.setFont(font, 8)
+        for item in items:
+            c.setFillColorRGB(*hex_to_rgb(item["color"]))
+            c.rect(x, state["y"], 0.3 * cm, 0.3 * cm, stroke=0, fill=1)
+            c.setFillColorRGB(0.2, 0.2, 0.2)
+            c.drawString(x + 0.4 * cm, state["y"] + 0.05 * cm, item["label"])
+            x += 0.6 * cm + pdfmetrics.stringWidth(item["label"], font, 8)
+        state["y"] -= line_height
+
+    for section in sections:
+        kind = section["type"]
+        if kind == "title":
+            draw_text(section["text"], size=14, gap=line_height * 1.5)
+        elif kind == "text":
+            draw_text(section["text"])
+        elif kind == "heading":
+            ensure_space(line_height * 3)
+            state["y"] -= line_height * 0.5
+            draw_text(section["text"], size=13, gap=line_height * 1.2)
+
+        elif kind == "buckets":
+            ensure_space(line_height * (len(section["items"]) + 2))
+            draw_text(f"{section['title']} (共 {section['count']} 張)", size=11)
+            bar_x, bar_width = margin + 5.5 * cm, content_width - 8 * cm
+            for item in section["items"]:
+                percentage = get_share(item["value"], section["count"])
+                c.setFont(font, 9)
+                c.setFillColorRGB(0, 0, 0)
+                c.drawString(margin + 0.3 * cm, state["y"], item["label"])
+                c.setFillColorRGB(0.93, 0.93, 0.93)
+                c.rect(bar_x, state["y"] - 0.05 * cm, bar_width, 0.35 * cm, stroke=0, fill=1)
+                c.setFillColorRGB(*hex_to_rgb(item["color"]))
+                c.rect(bar_x, state["y"] - 0.05 * cm, bar_width * percentage / 100, 0.35 * cm, stroke=0, fill=1)
+                c.setFillColorRGB(0, 0, 0)
+                c.drawString(bar_x + bar_width + 0.3 * cm, state["y"],
+                             f"{format_count(item['value'])} ({percentage:.1f}%)")
+                state["y"] -= line_height * 0.85
+            state["y"] -= line_height * 0.3
+
+        elif kind == "hue_wheel":
+            radius = 3.2 * cm
+            ensure_space(radius * 2 + line_height * 2)
+            draw_text(section["title"], size=11)
+            cx, cy = margin + content_width / 2, state["y"] - radius
+            bins = section["bins"]
+            peak = max(bins) or 1
+            step = 360 / len(bins)
+            c.setStrokeColorRGB(0.85, 0.85, 0.85)
+            c.circle(cx, cy, radius, stroke=1, fill=0)
+            for i, value in enumerate(bins):
+                # 面積與權重成正比 (半徑取平方根)
+                r = radius * math.sqrt(value / peak)
+                if r <= 0:
+                    continue
+                c.setFillColorRGB(*get_hue_color(i, len(bins)))
+                c.wedge(cx - r, cy - r, cx + r, cy + r, i * step, step, stroke=0, fill=1)
+            total = sum(bins) or 1
+            c.setFont(font, 7)
+            c.setFillColorRGB(0.3, 0.3, 0.3)
+            for i, value in enumerate(bins):
+                angle = math.radians((i + 0.5) * step)
+                c.drawCentredString(cx + (radius + 0.45 * cm) * math.cos(angle),
+                                    cy + (radius + 0.45 * cm) * math.sin(angle) - 0.1 * cm,
+                                    f"{value / total * 100:.0f}%")
+            state["y"] = cy - radius - line_height * 1.2
+
+        elif kind == "stacked_bars":
+            rows = section["rows"]
+            ensure_space(line_height * 3)
+            draw_text(section["title"], size=11)
+            bar_x, bar_width = margin + 4.5 * cm, content_width - 4.5 * cm
+            for row in rows:
+                ensure_space(line_height)
+                c.setFont(font, 9)
+                c.setFillColorRGB(0, 0, 0)
+                c.drawString(margin + 0.3 * cm, state["y"], f"{row['label']} ({row['count']})")
+                x = bar_x
+                for item in row["items"]:
+                    width = bar_width * get_share(item["value"], row["count"]) / 100
+                    if width > 0:
+                        c.setFillColorRGB(*hex_to_rgb(item["color"]))
+                        c.rect(x, state["y"] - 0.05 * cm, width, 0.4 * cm, stroke=0, fill=1)
+                        x += width
+                state["y"] -= line_height * 0.9
+            if rows:
+                draw_legend(rows[0]["items"])
+
+        elif kind == "contact_sheet":
+            cell, gap = 2.1 * cm, 0.2 * cm
+            columns = max(1, int((content_width + gap) // (cell + gap)))
+            ensure_space(line_height + cell + gap)
+            draw_text(section["title"], size=11)
+            for index, photo in enumerate(section["photos"]):
+                column = index % columns
+                if column == 0:
+                    ensure_space(cell + gap)
+                    state["y"] -= cell
+                x = margin + column * (cell + gap)
+                thumbnail = get_thumbnail_jpeg(photo["path"])
+                if thumbnail:
+                    c.drawImage(ImageReader(thumbnail), x, state["y"] + 0.2 * cm, cell, cell - 0.2 * cm,
+                                preserveAspectRatio=True, anchor='c')
+                c.setFillColorRGB(*(v / 255 for v in photo["color"]))
+                c.rect(x, state["y"], cell, 0.12 * cm, stroke=0, fill=1)
+                if column == columns - 1:
+                    state["y"] -= gap
+            state["y"] -= gap + line_height * 0.5
+
+    c.save()
+
+
+# --- HTML ---
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="zh-Hant">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: "Noto Sans TC", sans-serif; max-width: 960px; margin: 2rem auto; color: #222; }}
+h2 {{ border-bottom: 1px solid #ddd; padding-bottom: .3rem; margin-top: 2.5rem; }}
+table.buckets td {{ padding: 2px 8px; font-size: 14px; }}
+.bar {{ background: #eee; width: 320px; height: 12px; }}
+.bar span, .stack span {{ display: inline-block; height: 100%; vertical-align: top; }}
+.stack {{ display: inline-block; width: 600px; height: 16px; background: #eee; }}
+.legend span {{ display: inline-block; width: 12px; height: 12px; margin: 0 4px 0 12px; vertical-align: middle; }}
+.sheet {{ display: grid; grid-template-columns: repeat(auto-fill, 120px); gap: 8px; }}
+.sheet img {{ width: 120px; height: 90px; object-fit: cover; display: block; }}
+.sheet i {{ display: block; height: 4px; }}
+</style>
+</head>
+<body>
+"""
+
+
+def get_hue_wheel_svg(bins, size=300):
+    """色相輪 (polar area) SVG：色相 0 度在右側、逆時針增加，與 PDF 相同。"""
+    radius = size / 2 - 30
+    center = size / 2
+    peak = max(bins) or 1
+    total = sum(bins) or 1
+    step = 360 / len(bins)
+    parts = [f'<svg width="{size}" height="{size}" viewBox="0 0 {size} {size}">',
+             f'<circle cx="{center}" cy="{center}" r="{radius:.1f}" fill="none" stroke="#ddd"/>']
+    for i, value in enumerate(bins):
+        r = radius * math.sqrt(value / peak)
+        a0, a1 = math.radians(i * step), math.radians((i + 1) * step)
+        red, green, blue = (int(v * 255) for v in get_hue_color(i, len(bins)))
+        if r > 0:
+            parts.append(
+                f'<path d="M{center},{center} L{center + r * math.cos(a0):.1f},{center - r * math.sin(a0):.1f} '
+                f'A{r:.1f},{r:.1f} 0 0 0 {center + r * math.cos(a1):.1f},{center - r * math.sin(a1):.1f} Z" '
+                f'fill="rgb({red},{green},{blue})"/>')
+        label_angle = math.radians((i + 0.5) * step)
+        parts.append(
+            f'<text x="{center + (radius + 16) * math.cos(label_angle):.1f}" '
+            f'y="{center - (radius + 16) * math.sin(label_angle) + 4:.1f}" font-size="10" text-anchor="middle" '
+            f'fill="#555">{value / total * 100:.0f}%</text>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+
+def write_html_report(sections, path):
+    """逐段寫出 HTML 報表；圖表為內嵌 SVG / CSS，縮圖直接引用網站照片 (不內嵌，檔案大小固定)。"""
+    report_dir = os.path.dirname(os.path.abspath(path))
+    with open(path, 'w', encoding='utf-8') as f:
+        head_written = False
+        for section in sections:
+            kind = section["type"]
+            if not head_written:
+                title = section["text"] if kind == "title" else "色調分析報告"
+                f.write(HTML_HEAD.format(title=html.escape(title)))
+                head_written = True
+
+            if kind == "title":
+                f.write(f"<h1>{html.escape(section['text'])}</h1>\n")
+            elif kind == "heading":
+                f.write(f"<h2>{html.escape(section['text'])}</h2>\n")
+            elif kind == "text":
+                if section["text"].strip():
+                    f.write(f"<p>{html.escape(section['text'].strip())}</p>\n")
+            elif kind == "buckets":
+                f.write(f"<h3>{html.escape(section['title'])} (共 {section['count']} 張)</h3>\n<table class=\"buckets\">\n")
+                for item in section["items"]:
+                    percentage = get_share(item["value"], section["count"])
+                    f.write(f"<tr><td>{html.escape(item['label'])}</td>"
+                            f"<td><div class=\"bar\"><span style=\"width:{percentage:.1f}%;background:{item['color']}\"></span></div></td>"
+                            f"<td>{format_count(item['value'])} ({percentage:.1f}%)</td></tr>\n")
+                f.write("</table>\n")
+            elif kind == "hue_wheel":
+                f.write(f"<h3>{html.escape(section['title'])}</h3>\n{get_hue_wheel_svg(section['bins'])}\n")
+            elif kind == "stacked_bars":
+                f.write(f"<h3>{html.escape(section['title'])}</h3>\n<table>\n")
+                for row in section["rows"]:
+                    spans = ''.join(
+                        f"<span style=\"width:{get_share(item['value'], row['count']):.2f}%;background:{item['color']}\" "
+                        f"title=\"{html.escape(item['label'])} {get_share(item['value'], row['count']):.1f}%\"></span>"
+                        for item in row["items"])
+                    f.write(f"<tr><td>{html.escape(row['label'])} ({row['count']})</td>"
+                            f"<td><div class=\"stack\">{spans}</div></td></tr>\n")
+                f.write("</table>\n")
+                if section["rows"]:
+                    legend = ''.join(f"<span style=\"background:{item['color']}\"></span>{html.escape(item['label'])}"
+                                     for item in section["rows"][0]["items"])
+                    f.write(f"<p class=\"legend\">{legend}</p>\n")
+            elif kind == "contact_sheet":
+                f.write(f"<h3>{html.escape(section['title'])}</h3>\n<div class=\"sheet\">\n")
+                for photo in section["photos"]:
+                    src = os.path.relpath(photo["path"], report_dir).replace(os.sep, '/')
+                    red, green, blue = photo["color"]
+                    f.write(f"<figure style=\"margin:0\"><img src=\"{html.escape(src)}\" loading=\"lazy\" "
+                            f"alt=\"{html.escape(photo['label'])}\" title=\"{html.escape(photo['label'])}\">"
+                            f"<i style=\"background:rgb({red},{green},{blue})\"></i></figure>\n")
+                f.write("</div>\n")
+        f.write("</body>\n</html>\n")
@@ -0,0 +1,206 @@
+"""
+照片色彩統計模組 (NumPy 向量化)。
+
+把 data_photos.js 所有照片的顏色一次載入陣列 (有 palette 時使用完整色盤與佔比權重，否則使用主色 color)，
+批次轉換為 HSV 與 CIE Lab，再以 np.bincount 一次算出各分類、各地點 (檔名前 4 字，與 main.js 畫冊相同)
+的加權色系分布與色相/飽和度/明度直方圖。每張照片的權重合計為 1，因此直方圖總和等於照片張數。
+"""
+import numpy as np
+
+# 與舊版 analyze_colors.get_stats() 相同的色系與邊界 (飽和度 < 0.15 為中性色)
+BUCKET_NAMES = [
+    "Red/Orange (Warm)",
+    "Yellow (Warm)",
+    "Green (Nature)",
+    "Cyan/Blue (Sky/Water)",
+    "Purple/Magenta",
+    "Neutral/Grey/Dark",
+]
+# 報告圖表使用的色系代表色
+BUCKET_COLORS = {
+    "Red/Orange (Warm)": "#E4572E",
+    "Yellow (Warm)": "#F3C13A",
+    "Green (Nature)": "#4CAF50",
+    "Cyan/Blue (Sky/Water)": "#2E86DE",
+    "Purple/Magenta": "#9B59B6",
+    "Neutral/Grey/Dark": "#9E9E9E",
+}
+NEUTRAL_SATURATION = 0.15
+# 色相邊界 (度) 與對應的色系索引；340-360 度回到紅/橘
+HUE_EDGES = np.array([0, 40, 70, 160, 260, 340])
+HUE_EDGE_BUCKETS = np.array([0, 1, 2, 3, 4, 0])
+NEUTRAL_BUCKET = 5
+
+HUE_BINS = 12         # 每格 30 度，只統計非中性色
+SATURATION_BINS = 10
+LIGHTNESS_BINS = 10   # Lab L* 0-100
+LOCATION_PREFIX_LENGTH = 4
+
+
+def load_color_arrays(all_photo_data, use_palette=True):
+    """
+    將 {分類: [照片, ...]} 攤平成陣列。
+    回傳 dict：rgb (N, 3) float、weight (N,)、photo (N,) 顏色所屬照片索引，
+    以及每張照片的 category / filename 列表。
+    """
+    colors, weights, photo_index = [], [], []
+    categories, filenames = [], []
+    for category, items in all_photo_data.items():
+        for item in items:
+            index = len(filenames)
+            categories.append(category)
+            filenames.append(item.get("filename", ""))
+            # palette: [[r, g, b, 佔比], ...]
+            palette = item.get("palette") if use_palette else None
+            if palette:
+                total = sum(entry[3] for entry in palette) or 1.0
+                for entry in palette:
+                    colors.append(entry[:3])
+                    weights.append(entry[3] / total)
+                    photo_index.append(index)
+            elif item.get("color"):
+                colors.append(item["color"])
+                weights.append(1.0)
+                photo_index.append(index)
+
+    return {
+        "rgb": np.array(colors, dtype=np.float64).reshape(-1, 3),
+        "weight": np.array(weights, dtype=np.float64),
+        "photo": np.array(photo_index, dtype=np.int64),
+        "categories": categories,
+        "filenames": filenames,
+    }
+
+
+def rgb_to_hsv(rgb):
+    """(N, 3) 0-255 RGB -> (N, 3) HSV，各分量 0-1 (與 colorsys.rgb_to_hsv 相同)。"""
+    rgb = rgb / 255.0
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    maxc = rgb.max(axis=1)
+    minc = rgb.min(axis=1)
+    delta = maxc - minc
+    safe_delta = np.where(delta == 0, 1, delta)
+
+    s = np.where(maxc == 0, 0, delta / np.where(maxc == 0, 1, maxc))
+    rc = (maxc - r) / safe_delta
+    gc = (maxc - g) / safe_delta
+    bc = (maxc - b) / safe_delta
+    h = np.where(r == maxc, bc - gc, np.where(g == maxc, 2.0 + rc - bc, 4.0 + gc - rc))
+    h = np.where(delta == 0, 0, (h / 6.0) % 1.0)
+    return np.stack([h, s, maxc], axis=1)
+
+
+def rgb_to_lab(rgb):
+    """(N, 3) 0-255 sRGB -> (N, 3) CIE Lab (D65)。"""
+    rgb = rgb / 255.0
+    linear = np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+    matrix = np.array([
+        [0.4124564, 0.3575761, 0.1804375],
+        [0.2126729, 0.7151522, 0.0721750],
+        [0.0193339, 0.1191920, 0.9503041],
+    ])
+    xyz = linear @ matrix.T / np.array([0.95047, 1.0, 1.08883])
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([116 * f[:, 1] - 16, 500 * (f[:, 0] - f[:, 1]), 200 * (f[:, 1] - f[:, 2])], axis=1)
+
+
+def get_bucket_indices(hsv):
+    """依舊版規則把每個顏色分到 BUCKET_NAMES 的索引。"""
+    hue_deg = hsv[:, 0] * 360
+    buckets = HUE_EDGE_BUCKETS[np.searchsorted(HUE_EDGES, hue_deg, side='right') - 1]
+    return np.where(hsv[:, 1] < NEUTRAL_SATURATION, NEUTRAL_BUCKET, buckets)
+
+
+def get_location_prefix(filename, length=LOCATION_PREFIX_LENGTH):
+    return filename[:length]
+
+
+def get_group_indices(labels):
+    """標籤列表 -> (群組名稱 (依首次出現順序), 每個標籤的群組索引陣列)。"""
+    position = {}
+    inverse = np.array([position.setdefault(label, len(position)) for label in labels], dtype=np.int64)
+    return list(position), inverse
+
+
+def grouped_histogram(groups, bins, weights, n_groups, n_bins):
+    """以單次 np.bincount 計算每個群組的加權直方圖，回傳 (n_groups, n_bins)。"""
+    flat = np.bincount(groups * n_bins + bins, weights=weights, minlength=n_groups * n_bins)
+    return flat.reshape(n_groups, n_bins)
+
+
+def get_color_features(arrays):
+    """批次轉換 HSV / Lab 並算出各直方圖的格索引；同一批顏色只需計算一次，各種分組共用。"""
+    hsv = rgb_to_hsv(arrays["rgb"])
+    lab = rgb_to_lab(arrays["rgb"])
+    return {
+        "lab": lab,
+        "chromatic": hsv[:, 1] >= NEUTRAL_SATURATION,
+        "bucket": get_bucket_indices(hsv),
+        "hue": np.minimum((hsv[:, 0] * HUE_BINS).astype(np.int64), HUE_BINS - 1),
+        "saturation": np.minimum((hsv[:, 1] * SATURATION_BINS).astype(np.int64), SATURATION_BINS - 1),
+        "lightness": np.clip((lab[:, 0] / 100 * LIGHTNESS_BINS).astype(np.int64), 0, LIGHTNESS_BINS - 1),
+    }
+
+
+def summarize_groups(arrays, features, photo_groups, n_groups):
+    """
+    photo_groups: 每張照片所屬群組索引 (N_photos,)。
+    回傳每個群組的 count、色系分布、色相/飽和度/明度直方圖與加權平均 Lab。
+    """
+    weight, lab = arrays["weight"], features["lab"]
+    photo_count = np.bincount(photo_groups, minlength=n_groups)
+    groups = photo_groups[arrays["photo"]]
+
+    group_weight = np.bincount(groups, weights=weight, minlength=n_groups)
+    lab_sum = np.stack([np.bincount(groups, weights=weight * lab[:, c], minlength=n_groups) for c in range(3)], axis=1)
+    histograms = {
+        "buckets": grouped_histogram(groups, features["bucket"], weight, n_groups, len(BUCKET_NAMES)),
+        "hue": grouped_histogram(groups, features["hue"], weight * features["chromatic"], n_groups, HUE_BINS),
+        "saturation": grouped_histogram(groups, features["saturation"], weight, n_groups, SATURATION_BINS),
+        "lightness": grouped_histogram(groups, features["lightness"], weight, n_groups, LIGHTNESS_BINS),
+        "lab": lab_sum / np.maximum(group_weight, 1e-12)[:, None],
+    }
+    return photo_count, histograms
+
+
+def format_group(count, histograms, index):
+    def rounded(values):
+        return [round(float(v), 3) for v in values]
+
+    return {
+        "count": int(count[index]),
+        "buckets": {name: round(float(v), 3) for name, v in zip(BUCKET_NAMES, histograms["buckets"][index])},
+        "hue": rounded(histograms["hue"][index]),
+        "saturation": rounded(histograms["saturation"][index]),
+        "lightness": rounded(histograms["lightness"][index]),
+        "mean_lab": [round(float(v), 2) for v in histograms["lab"][index]],
+    }
+
+
+def compute_color_stats(all_photo_data, use_palette=True, location_prefix_length=LOCATION_PREFIX_LENGTH,
+                        include_locations=True):
+    """
+    計算總計、各分類與各地點的色彩統計。
+    回傳 {"total": {...}, "categories": {分類: {...}}, "locations": {地點前綴: {...}}}，
+    每個群組包含 count、buckets (加權張數)、hue/saturation/lightness 直方圖與 mean_lab。
+    """
+    arrays = load_color_arrays(all_photo_data, use_palette)
+    features = get_color_features(arrays)
+    n_photos = len(arrays["filenames"])
+
+    total_count, total_hist = summarize_groups(arrays, features, np.zeros(n_photos, dtype=np.int64), 1)
+    stats = {"total": format_group(total_count, total_hist, 0)}
+
+    groupings = [("categories", arrays["categories"])]
+    if include_locations:
+        groupings.append(("locations", [get_location_prefix(name, location_prefix_length) for name in arrays["filenames"]]))
+    for key, labels in groupings:
+        names, inverse = get_group_indices(labels)
+        count, hist = summarize_groups(arrays, features, inverse, len(names))
+        stats[key] = {name: format_group(count, hist, i) for i, name in enumerate(names)}
+    return stats
+
+
+def get_bucket_counts(items, use_palette=True):
+    """單一照片列表的色系分布 {色系: 加權張數}，供 analyze_colors.get_stats() 使用。"""
+    return compute_color_stats({"_": items}, use_palette, include_locations=False)["total"]["buckets"]
@@ -0,0 +1,146 @@
+"""
+照片色彩分析模組。
+
+generate_photo_list.py 在輸出每張照片後只建立一次 150px 小圖 (color proxy)，
+主色、色盤 (palette) 與 BlurHash 預覽都由這張小圖計算，不再複製整張輸出圖。
+色盤可選擇 Pillow 減色 (quantize) 或 NumPy k-means 兩種引擎。
+"""
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 為選用套件，未安裝時 k-means 與 BlurHash 不可用
+    np = None
+
+DEFAULT_COLOR = (128, 128, 128)
+
+
+def get_color_proxy(img, size=150):
+    """
+    產生色彩分析與預覽共用的小圖 (RGB，長邊不超過 size)。
+    直接由輸出圖縮小產生，不會先複製一份全尺寸圖片。
+    """
+    scale = min(1.0, size / max(img.width, img.height))
+    proxy_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+    proxy = img.resize(proxy_size, Image.Resampling.BICUBIC, reducing_gap=2.0) if scale < 1 else img.copy()
+    if proxy.mode != 'RGB':
+        proxy = proxy.convert('RGB')
+    return proxy
+
+
+def get_quantize_palette(proxy, colors=5):
+    """
+    使用 Quantize 方法 (MAXCOVERAGE) 取得色盤。
+    回傳依佔比排序的 [((r, g, b), 權重), ...]，第一個即為原本的顯著色。
+    """
+    quantized = proxy.quantize(colors=colors, method=Image.MAXCOVERAGE)
+
+    # getcolors() 回傳 [(count, index), ...]
+    counts = quantized.getcolors(maxcolors=256)
+    if not counts:
+        return []
+
+    # 排序：數量多的在前面
+    counts.sort(key=lambda x: x[0], reverse=True)
+    total = sum(count for count, _ in counts)
+    palette = quantized.getpalette()
+    return [(tuple(palette[index * 3:index * 3 + 3]), count / total) for count, index in counts]
+
+
+def get_kmeans_palette(proxy, colors=5, iterations=10):
+    """
+    以 NumPy 向量化 k-means 取得色盤。
+    以 quantize 的結果作為初始中心 (結果可重現)，每次迭代一次算完所有像素到中心的距離。
+    回傳依佔比排序的 [((r, g, b), 權重), ...]。
+    """
+    pixels = np.asarray(proxy, dtype=np.float32).reshape(-1, 3)
+    initial = get_quantize_palette(proxy, colors)
+    if not initial:
+        return []
+    centers = np.array([rgb for rgb, _ in initial], dtype=np.float32)
+    k = len(centers)
+
+    for _ in range(iterations):
+        distances = ((pixels[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+        labels = distances.argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=pixels[:, c], minlength=k) for c in range(3)], axis=1)
+        new_centers = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        if np.allclose(new_centers, centers, atol=0.5):
+            centers = new_centers
+            break
+        centers = new_centers
+
+    distances = ((pixels[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2)
+    counts = np.bincount(distances.argmin(axis=1), minlength=k)
+    order = np.argsort(-counts, kind='stable')
+    total = counts.sum()
+    return [(tuple(int(round(v)) for v in centers[i]), float(counts[i] / total)) for i in order if counts[i] > 0]
+
+
+def get_palette(proxy, colors=5, engine='quantize'):
+    """
+    依引擎取得排序後的色盤；engine 為 'quantize' 或 'kmeans' (需 NumPy，未安裝時退回 quantize)。
+    """
+    try:
+        if engine == 'kmeans' and np is not None:
+            return get_kmeans_palette(proxy, colors)
+        return get_quantize_palette(proxy, colors)
+    except Exception as e:
+        print(f"  ! 計算色盤時發生錯誤: {e}")
+        return []
+
+
+BLURHASH_CHARACTERS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz#$%*+,-.:;=?@[]^_{|}~"
+
+
+def encode_base83(value, length):
+    result = ''
+    for i in range(1, length + 1):
+        digit = (int(value) // (83 ** (length - i))) % 83
+        result += BLURHASH_CHARACTERS[digit]
+    return result
+
+
+def get_blurhash(proxy, components=(4, 3)):
+    """
+    以 NumPy 向量化計算 BlurHash (https://blurha.sh)。
+    直接使用 150px 的色彩分析小圖，所有 DCT 分量以一次矩陣運算求得，每張只需幾毫秒。
+    """
+    components_x, components_y = components
+    pixels = np.asarray(proxy, dtype=np.float64) / 255.0
+    height, width = pixels.shape[:2]
+
+    # sRGB -> linear
+    linear = np.where(pixels <= 0.04045, pixels / 12.92, ((pixels + 0.055) / 1.055) ** 2.4)
+
+    cos_x = np.cos(np.pi * np.arange(components_x)[:, None] * np.arange(width)[None, :] / width)
+    cos_y = np.cos(np.pi * np.arange(components_y)[:, None] * np.arange(height)[None, :] / height)
+    # factors[j, i] = 該分量的 RGB 平均值
+    factors = np.einsum('jy,ix,yxc->jic', cos_y, cos_x, linear) / (width * height)
+    normalisation = np.full((components_y, components_x, 1), 2.0)
+    normalisation[0, 0] = 1.0
+    factors = (factors * normalisation).reshape(-1, 3)
+
+    dc, ac = factors[0], factors[1:]
+    result = encode_base83((components_x - 1) + (components_y - 1) * 9, 1)
+
+    if len(ac):
+        quantised_max = int(max(0, min(82, np.floor(np.abs(ac).max() * 166 - 0.5))))
+        maximum_value = (quantised_max + 1) / 166
+    else:
+        quantised_max, maximum_value = 0, 1
+    result += encode_base83(quantised_max, 1)
+
+    # DC：linear -> sRGB
+    dc = np.clip(dc, 0, 1)
+    dc = np.where(dc <= 0.0031308, dc * 12.92, 1.055 * dc ** (1 / 2.4) - 0.055)
+    r, g, b = (int(v * 255 + 0.5) for v in dc)
+    result += encode_base83((r << 16) + (g << 8) + b, 4)
+
+    # AC：以 sign * sqrt 壓縮後量化為 0..18
+    scaled = ac / maximum_value
+    quant = np.floor(np.clip(np.sign(scaled) * np.sqrt(np.abs(scaled)) * 9 + 9.5, 0, 18)).astype(int)
+    for q_r, q_g, q_b in quant:
+        result += encode_base83(q_r * 19 * 19 + q_g * 19 + q_b, 2)
+    return result
@@ -0,0 +1,158 @@
+"""
+JPEG 自動畫質編碼模組。
+
+固定畫質 (例如 70) 對平坦的天空照片太高、對細節多的城市照片又太低。
+這裡改為每張輸出各自決定畫質：
+'ssim' 以二分搜尋找出亮度 SSIM 仍 >= 目標值的最低畫質，'budget' 找出檔案不超過位元組預算的最高畫質。
+SSIM 以 NumPy (7x7 平均視窗，分離成橫向與縱向的滑動加總) 在縮小的亮度圖上計算，每次嘗試只需一次記憶體內編碼與解碼。
+色度取樣依照片決定：色度在 2x2 區塊內變化大 (細小的彩色細節) 時用 4:4:4，否則用 4:2:0。
+最後以 progressive + optimize 輸出；兩者只改變熵編碼，解碼後的像素與搜尋時相同。
+需要 NumPy，未安裝時由呼叫端改用固定畫質。
+"""
+import io
+
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 為選用套件，未安裝時不提供自動畫質
+    np = None
+
+SSIM_WINDOW = 7
+SSIM_C1 = (0.01 * 255) ** 2
+SSIM_C2 = (0.03 * 255) ** 2
+# Pillow 的 subsampling 參數
+SUBSAMPLING_444 = 0
+SUBSAMPLING_420 = 2
+
+
+def encode_jpeg(img, quality, subsampling=SUBSAMPLING_420, progressive=False, optimize=False):
+    buffer = io.BytesIO()
+    img.save(buffer, 'JPEG', quality=quality, subsampling=subsampling, progressive=progressive, optimize=optimize)
+    return buffer.getvalue()
+
+
+def box_mean(values, size=SSIM_WINDOW):
+    """size x size 視窗平均 (只取完整視窗，輸出比輸入小 size - 1)；逐列再逐行加總，float32 也不會累積誤差。"""
+    height, width = values.shape
+    rows = sum(values[i:height - size + 1 + i] for i in range(size))
+    return sum(rows[:, j:width - size + 1 + j] for j in range(size)) / (size * size)
+
+
+def get_ssim(a, b):
+    """兩張同尺寸灰階陣列的平均 SSIM (7x7 平均視窗)。"""
+    a = a.astype(np.float32)
+    b = b.astype(np.float32)
+    mu_a, mu_b = box_mean(a), box_mean(b)
+    var_a = box_mean(a * a) - mu_a * mu_a
+    var_b = box_mean(b * b) - mu_b * mu_b
+    covariance = box_mean(a * b) - mu_a * mu_b
+    ssim_map = ((2 * mu_a * mu_b + SSIM_C1) * (2 * covariance + SSIM_C2)) \
+        / ((mu_a * mu_a + mu_b * mu_b + SSIM_C1) * (var_a + var_b + SSIM_C2))
+    return float(ssim_map.mean())
+
+
+def get_luma_proxy(img, factor):
+    """亮度 (Pillow 'L'，ITU-R 601) 以 factor 倍 box 縮小後的陣列。"""
+    luma = img.convert('L')
+    if factor > 1:
+        luma = luma.reduce(factor)
+    return np.asarray(luma)
+
+
+def get_chroma_detail(img):
+    """
+    4:2:0 會損失的色度細節：Cb/Cr 與所在 2x2 區塊平均的均方根差 (取兩者較大值，0-255 刻度)。
+    """
+    ycbcr = np.asarray(img.convert('YCbCr'), dtype=np.float32)
+    height, width = (ycbcr.shape[0] // 2) * 2, (ycbcr.shape[1] // 2) * 2
+    detail = 0.0
+    for channel in (1, 2):
+        plane = ycbcr[:height, :width, channel]
+        blocks = plane.reshape(height // 2, 2, width // 2, 2)
+        residual = blocks - blocks.mean(axis=(1, 3), keepdims=True)
+        detail = max(detail, float(np.sqrt((residual * residual).mean())))
+    return detail
+
+
+def choose_subsampling(img, chroma_threshold):
+    return SUBSAMPLING_444 if get_chroma_detail(img) > chroma_threshold else SUBSAMPLING_420
+
+
+def search_ssim_quality(img, target_ssim, min_quality, max_quality, subsampling, downscale, fallback_quality):
+    """
+    二分搜尋亮度 SSIM >= target_ssim 的最低畫質 (假設 SSIM 隨畫質單調增加)。
+    SSIM 在縮小 downscale 倍的亮度圖上計算 (各寬度的輸出使用相同的比例，目標值才有一致的意義)。
+    最高畫質也達不到目標 (接近雜訊的內容，提高畫質只會讓檔案暴增) 或圖太小無法計算時使用 fallback_quality。
+    回傳 (畫質, 該畫質的 SSIM 或 None)。
+    """
+    factor = max(1, min(downscale, img.width // SSIM_WINDOW, img.height // SSIM_WINDOW))
+    reference = get_luma_proxy(img, factor)
+    if min(reference.shape) < SSIM_WINDOW:
+        # 比 SSIM 視窗還小的圖 (例如極窄的全景縮圖)
+        return fallback_quality, None
+    scores = {}
+
+    def score(quality):
+        if quality not in scores:
+            with Image.open(io.BytesIO(encode_jpeg(img, quality, subsampling))) as decoded:
+                scores[quality] = get_ssim(reference, get_luma_proxy(decoded, factor))
+        return scores[quality]
+
+    low, high = min_quality, max_quality
+    if score(high) < target_ssim:
+        return fallback_quality, None
+    while low < high:
+        middle = (low + high) // 2
+        if score(middle) >= target_ssim:
+            high = middle
+        else:
+            low = middle + 1
+    return high, score(high)
+
+
+def search_budget_quality(img, byte_budget, min_quality, max_quality, subsampling, progressive=True):
+    """
+    二分搜尋檔案大小 <= byte_budget 的最高畫質 (以最終的 progressive + optimize 參數編碼，大小即實際檔案大小)。
+    最低畫質仍超過預算時使用 min_quality。回傳 (畫質, JPEG 資料)。
+    """
+    encoded = {}
+
+    def encode(quality):
+        if quality not in encoded:
+            encoded[quality] = encode_jpeg(img, quality, subsampling, progressive, optimize=True)
+        return encoded[quality]
+
+    low, high = min_quality, max_quality
+    if len(encode(low)) > byte_budget:
+        return low, encoded[low]
+    while low < high:
+        middle = (low + high + 1) // 2
+        if len(encode(middle)) <= byte_budget:
+            low = middle
+        else:
+            high = middle - 1
+    return low, encode(low)
+
+
+def encode_jpeg_auto(img, mode, target_ssim=0.993, byte_budget=None, quality_range=(40, 90),
+                     downscale=2, chroma_threshold=3.0, progressive=True, fallback_quality=70):
+    """
+    依 mode ('ssim' 或 'budget') 決定畫質並編碼 (img 需為 RGB 或 L)；fallback_quality 見 search_ssim_quality()。
+    回傳 (JPEG 資料, {"quality", "subsampling", "ssim" (只有 ssim 模式)})。
+    """
+    min_quality, max_quality = quality_range
+    subsampling = SUBSAMPLING_420 if img.mode == 'L' else choose_subsampling(img, chroma_threshold)
+    info = {}
+    if mode == 'budget':
+        quality, data = search_budget_quality(img, byte_budget, min_quality, max_quality, subsampling, progressive)
+    else:
+        quality, info["ssim"] = search_ssim_quality(img, target_ssim, min_quality, max_quality, subsampling,
+                                                    downscale, fallback_quality)
+        if info["ssim"] is None:
+            # 接近雜訊的內容同樣會遮蔽色度損失，不值得用 4:4:4
+            subsampling = SUBSAMPLING_420
+        data = encode_jpeg(img, quality, subsampling, progressive, optimize=True)
+    info["quality"] = quality
+    info["subsampling"] = "4:4:4" if subsampling == SUBSAMPLING_444 else "4:2:0"
+    return data, info
@@ -0,0 +1,130 @@
+"""
+雜誌模式版面預先排版。
+
+main.js 過去在每次開啟雜誌時隨機挑版型，並逐張比對地點前綴與主色距離 (O(n²)，在訪客手機上執行)。
+這裡改在建置時以相同規則 (A3 420:297 五種版型、同頁地點前綴不重複、同頁主色距離 >= 門檻，
+另外同頁不放同一個相似照片群組) 一次排出數組完整的頁序，輸出成 public/js/magazine_layouts.js，
+前端只需隨機挑一組套用。排版為貪婪法：依洗牌順序取第一張，其餘依序挑第一個不衝突的照片，
+找不到時放寬色彩條件 (與原本前端行為相同)。以固定種子產生，照片不變時輸出也不變。
+"""
+import json
+import random
+
+LOCATION_PREFIX_LENGTH = 4
+# 桌機版型 (與 main.js 相同) -> 每頁照片數
+TEMPLATE_PHOTO_COUNTS = {1: 1, 2: 2, 3: 3, 4: 4, 5: 3}
+MOBILE_PHOTO_COUNT = 2
+LAYOUTS_VERSION = 1
+
+
+def get_location_prefix(filename, length=LOCATION_PREFIX_LENGTH):
+    return filename[:length]
+
+
+def get_color_distance(color1, color2):
+    """RGB 歐氏距離；沒有顏色時視為差異很大 (與 main.js getColorDistance 相同)。"""
+    if not color1 or not color2:
+        return 1000
+    return sum((a - b) ** 2 for a, b in zip(color1, color2)) ** 0.5
+
+
+def flatten_photos(all_photo_data):
+    """{分類: [照片, ...]} -> [(分類索引, 檔名, 地點前綴, 主色, 相似群組), ...] 與分類列表。"""
+    categories = list(all_photo_data)
+    photos = []
+    for category_index, category in enumerate(categories):
+        for item in all_photo_data[category]:
+            filename = item["filename"]
+            photos.append((category_index, filename, get_location_prefix(filename), item.get("color"), item.get("similar")))
+    return categories, photos
+
+
+def get_final_template(template, count):
+    """照片不足時調整版型 (與 main.js 相同)。"""
+    if count == 3:
+        return template if template in (3, 5) else 3
+    return count
+
+
+def plan_sequence(photos, rng, mobile, color_threshold):
+    """
+    排出一組完整頁序。
+    回傳頁面列表：桌機為 [版型, 照片索引, ...]，手機為 [照片索引, ...]。
+    """
+    order = list(range(len(photos)))
+    rng.shuffle(order)
+    pages = []
+
+    def is_conflict(batch, index, strict):
+        _, _, prefix, color, similar = photos[index]
+        for other in batch:
+            _, _, other_prefix, other_color, other_similar = photos[other]
+            if prefix == other_prefix:
+                return True
+            if strict and (get_color_distance(color, other_color) < color_threshold
+                           or (similar and similar == other_similar)):
+                return True
+        return False
+
+    while order:
+        if mobile:
+            template, target = None, MOBILE_PHOTO_COUNT
+        else:
+            template = rng.randint(1, len(TEMPLATE_PHOTO_COUNTS))
+            target = TEMPLATE_PHOTO_COUNTS[template]
+
+        batch = [order[0]]
+        rest = order[1:]
+        for strict in (True, False):
+            keep = []
+            for position, index in enumerate(rest):
+                if len(batch) >= target:
+                    # 這頁已滿，剩下的照片原樣留給下一頁
+                    keep.extend(rest[position:])
+                    break
+                if is_conflict(batch, index, strict):
+                    keep.append(index)
+                else:
+                    batch.append(index)
+            rest = keep
+        order = rest
+
+        pages.append(batch if mobile else [get_final_template(template, len(batch))] + batch)
+    return pages
+
+
+def pick_cover(photos, categories, rng, cover_category):
+    candidates = [i for i, photo in enumerate(photos) if categories[photo[0]] == cover_category]
+    return rng.choice(candidates or range(len(photos)))
+
+
+def plan_magazine_layouts(all_photo_data, variants=6, seed='portfolio', color_threshold=100, cover_category='大地映像'):
+    """
+    產生桌機與手機各 variants 組頁序。
+    回傳 {"version", "categories", "photos": [[分類索引, 檔名], ...],
+          "desktop": [{"cover": 照片索引, "pages": [[版型, 照片索引...], ...]}, ...],
+          "mobile": [{"cover": 照片索引, "pages": [[照片索引...], ...]}, ...]}。
+    """
+    categories, photos = flatten_photos(all_photo_data)
+    layouts = {
+        "version": LAYOUTS_VERSION,
+        "categories": categories,
+        "photos": [[photo[0], photo[1]] for photo in photos],
+        "desktop": [],
+        "mobile": [],
+    }
+    if not photos:
+        return layouts
+
+    for device in ("desktop", "mobile"):
+        for variant in range(variants):
+            rng = random.Random(f"{seed}/{device}/{variant}")
+            layouts[device].append({
+                "cover": pick_cover(photos, categories, rng, cover_category),
+                "pages": plan_sequence(photos, rng, device == "mobile", color_threshold),
+            })
+    return layouts
+
+
+def format_magazine_layouts_js(layouts):
+    return 'window.magazineLayouts = ' + json.dumps(layouts, ensure_ascii=False, separators=(',', ':')) + ';\n'
@@ -0,0 +1,182 @@
+"""
+空拍地圖標示自動產生模組。
+
+把 data_photos.js 中有 GPS 的照片投影到 taiwan-aerial-map.webp 上的百分比座標，
+以網格空間索引把幾乎同一地點拍攝的照片合併成一個群集標示，再寫回 public/js/map_markers.js。
+手動維護的標示 (沒有 auto 欄位者) 一律保留，並視為覆寫：被手動標示使用的照片不會再自動產生標示。
+"""
+import json
+import math
+import os
+import re
+
+# 與 public/js/main.js 的 MAP_BOUNDS 及 getBasePoint() 使用相同的校正值
+MAP_BOUNDS = {
+    "minLat": 21.9,
+    "maxLat": 25.35,
+    "minLng": 120.0,
+    "maxLng": 122.05
+}
+# 台灣本島在底圖上所占的範圍 (百分比)：x = 34.5 + 經度比例 * 43.5，y = 10 + 緯度比例 * 76
+MAP_FRAME = {"x": 34.5, "width": 43.5, "y": 10, "height": 76}
+
+JS_PREFIX = 'window.mapMarkerData = '
+
+
+def project_gps(gps):
+    """將 {lat, lng} 投影為底圖上的 {x, y} 百分比座標 (超出範圍時貼齊邊界)。"""
+    lng_ratio = max(0.0, min(1.0, (gps["lng"] - MAP_BOUNDS["minLng"]) / (MAP_BOUNDS["maxLng"] - MAP_BOUNDS["minLng"])))
+    lat_ratio = max(0.0, min(1.0, (MAP_BOUNDS["maxLat"] - gps["lat"]) / (MAP_BOUNDS["maxLat"] - MAP_BOUNDS["minLat"])))
+    return {
+        "x": round(MAP_FRAME["x"] + lng_ratio * MAP_FRAME["width"], 2),
+        "y": round(MAP_FRAME["y"] + lat_ratio * MAP_FRAME["height"], 2),
+    }
+
+
+def get_base_location_name(filename):
+    """與 main.js 的 getBaseLocationName() 相同：去掉副檔名與 -2、(1) 之類的編號。"""
+    base_name = re.sub(r'[-_(\（].*|\.\w+$', '', filename).strip()
+    if base_name == '南投清境農場雲海A':
+        return '南投清境農場雲海'
+    return base_name
+
+
+def cluster_points(points, radius):
+    """
+    以網格空間索引做貪婪群集。
+    points: [(x, y), ...]，依輸入順序決定群集代表點，結果可重現。
+    每個點只需查詢所在格與相鄰 8 格 (格寬 = radius)，整體約為 O(n)；排序輸入時為 O(n log n)。
+    回傳群集列表，每個群集為點索引的列表。
+    """
+    grid = {}
+    for index, (x, y) in enumerate(points):
+        grid.setdefault((math.floor(x / radius), math.floor(y / radius)), []).append(index)
+
+    assigned = [False] * len(points)
+    clusters = []
+    radius_sq = radius * radius
+    for index, (x, y) in enumerate(points):
+        if assigned[index]:
+            continue
+        assigned[index] = True
+        members = [index]
+        cell_x, cell_y = math.floor(x / radius), math.floor(y / radius)
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for other in grid.get((cell_x + dx, cell_y + dy), ()):
+                    if assigned[other]:
+                        continue
+                    ox, oy = points[other]
+                    if (ox - x) ** 2 + (oy - y) ** 2 <= radius_sq:
+                        assigned[other] = True
+                        members.append(other)
+        clusters.append(members)
+    return clusters
+
+
+def parse_js_object_literal(text):
+    """
+    把 map_markers.js 中的 JS 物件寫法 (key 未加引號、可能有結尾逗號) 轉成 JSON 解析。
+    字串內容不會被改動。
+    """
+    token = re.compile(r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|([{,]\s*)([A-Za-z_$][\w$]*)(\s*:)')
+
+    def quote(match):
+        if match.group(2) is None:
+            literal = match.group(0)
+            if literal.startswith("'"):
+                return json.dumps(literal[1:-1], ensure_ascii=False)
+            return literal
+        return f'{match.group(1)}"{match.group(2)}"{match.group(3)}'
+
+    converted = token.sub(quote, text)
+    converted = re.sub(r',(\s*[}\]])', r'\1', converted)
+    return json.loads(converted)
+
+
+def load_map_markers(path):
+    """讀取現有的 map_markers.js；檔案不存在或無法解析時回傳空列表。"""
+    if not os.path.exists(path):
+        return []
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read().strip()
+        start = text.index('=') + 1
+        return parse_js_object_literal(text[start:].rstrip().rstrip(';'))
+    except Exception as e:
+        print(f"警告：無法解析 '{path}' ({e})，將不保留手動標示。")
+        return []
+
+
+def get_cluster_title(filenames, limit=3):
+    """群集標題：依序列出不重複的地點名稱 (最多 limit 個，超過時加上「等 N 處」)。"""
+    names = []
+    for filename in filenames:
+        name = get_base_location_name(filename)
+        if name not in names:
+            names.append(name)
+    title = "、".join(names[:limit])
+    return title if len(names) <= limit else f"{title} 等 {len(names)} 處"
+
+
+def build_map_markers(all_photo_data, existing_markers, cluster_radius=0.5):
+    """
+    產生完整的標示列表：先放手動標示 (原順序)，再依群集結果加上自動標示。
+    群集標示的位置與 GPS 取所有照片的平均 (群集中心)，預覽照片取最接近中心的一張，
+    標題列出群集內的地點名稱，並附上 count 與所有照片 (main.js 顯示張數與照片列表)。
+    """
+    manual_markers = [marker for marker in existing_markers if not marker.get("auto")]
+    manual_filenames = {marker.get("filename") for marker in manual_markers if marker.get("filename")}
+
+    photos = []
+    for category, items in all_photo_data.items():
+        for item in items:
+            gps = item.get("gps")
+            if not gps or item["filename"] in manual_filenames:
+                continue
+            photos.append({"category": category, "filename": item["filename"], "gps": gps})
+    # 依分類與檔名排序，讓群集結果不受資料夾列舉順序影響
+    photos.sort(key=lambda photo: (photo["category"], photo["filename"]))
+
+    points = [project_gps(photo["gps"]) for photo in photos]
+    clusters = cluster_points([(p["x"], p["y"]) for p in points], cluster_radius)
+
+    markers = list(manual_markers)
+    used_ids = {marker.get("id") for marker in manual_markers}
+    for members in clusters:
+        center_x = sum(points[i]["x"] for i in members) / len(members)
+        center_y = sum(points[i]["y"] for i in members) / len(members)
+        lead = photos[min(members, key=lambda i: (points[i]["x"] - center_x) ** 2 + (points[i]["y"] - center_y) ** 2)]
+        base_name = get_base_location_name(lead["filename"])
+        marker_id = f"auto-{base_name}"
+        suffix = 2
+        while marker_id in used_ids:
+            marker_id = f"auto-{base_name}-{suffix}"
+            suffix += 1
+        used_ids.add(marker_id)
+
+        gps = lead["gps"]
+        if len(members) > 1:
+            gps = {
+                "lat": round(sum(photos[i]["gps"]["lat"] for i in members) / len(members), 6),
+                "lng": round(sum(photos[i]["gps"]["lng"] for i in members) / len(members), 6),
+            }
+        marker = {
+            "id": marker_id,
+            "title": get_cluster_title(photos[i]["filename"] for i in members),
+            "category": lead["category"],
+            "filename": lead["filename"],
+            "gps": gps,
+            "position": {"x": round(center_x, 2), "y": round(center_y, 2)},
+            "auto": True,
+        }
+        if len(members) > 1:
+            marker["count"] = len(members)
+            marker["photos"] = [{"category": photos[i]["category"], "filename": photos[i]["filename"]} for i in members]
+        markers.append(marker)
+    return markers
+
+
+def format_map_markers_js(markers):
+    """與地圖編輯模式「複製設定」相同的格式 (JSON.stringify 縮排 4)。"""
+    return JS_PREFIX + json.dumps(markers, ensure_ascii=False, indent=4) + ';\n'
@@ -0,0 +1,185 @@
+"""
+照片 EXIF 中繼資料掃描模組。
+
+只讀取檔頭的 EXIF 區段、不解碼像素，一次取出 GPS (經緯度/高度)、拍攝時間、相機/空拍機型號與方向。
+PNG 的 eXIf 區塊可能放在影像資料之後，Pillow 的 getexif() 此時會先解碼整張圖；這裡改為逐一略過區塊找出 eXIf。
+generate_photo_list.py 以此建立建置清單中的 metadata 快取，並支援 --metadata-only 快速更新。
+"""
+import os
+import struct
+
+from PIL import Image, ExifTags
+
+# EXIF 標籤 ID
+TAG_MAKE = 271
+TAG_MODEL = 272
+TAG_ORIENTATION = 274
+TAG_DATETIME = 306
+TAG_DATETIME_ORIGINAL = 36867
+
+# GPS IFD 標籤 ID
+# 1: GPSLatitudeRef, 2: GPSLatitude, 3: GPSLongitudeRef, 4: GPSLongitude, 5: GPSAltitudeRef, 6: GPSAltitude
+GPS_LAT_REF, GPS_LAT, GPS_LNG_REF, GPS_LNG, GPS_ALT_REF, GPS_ALT = 1, 2, 3, 4, 5, 6
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def read_png_exif_chunk(fp):
+    """
+    只讀區塊標頭、以 seek 略過區塊內容 (含 IDAT)，回傳 eXIf 區塊內容；沒有時回傳 None。
+    讀完後還原檔案位置，不影響 Pillow 之後的解碼。
+    """
+    position = fp.tell()
+    try:
+        fp.seek(0)
+        if fp.read(len(PNG_SIGNATURE)) != PNG_SIGNATURE:
+            return None
+        while True:
+            header = fp.read(8)
+            if len(header) < 8:
+                return None
+            length, chunk_type = struct.unpack('>I4s', header)
+            if chunk_type == b'eXIf':
+                return fp.read(length)
+            if chunk_type == b'IEND':
+                return None
+            fp.seek(length + 4, os.SEEK_CUR)  # 內容 + CRC
+    finally:
+        fp.seek(position)
+
+
+def get_exif(img):
+    """img.getexif()，但 PNG 不會為了尋找檔尾的 eXIf 區塊而解碼像素。"""
+    if img.format == 'PNG' and 'exif' not in img.info and img.fp is not None:
+        exif = Image.Exif()
+        data = read_png_exif_chunk(img.fp)
+        if data:
+            exif.load(data)
+        return exif
+    return img.getexif()
+
+
+def get_decimal_from_dms(dms, ref):
+    """
+    將度/分/秒 (DMS) 格式轉換為十進位度數。
+    dms: (Degrees, Minutes, Seconds)
+    ref: 'N', 'S', 'E', 'W'
+    """
+    degrees = dms[0]
+    minutes = dms[1]
+    seconds = dms[2]
+
+    decimal = degrees + (minutes / 60.0) + (seconds / 3600.0)
+
+    if ref in ['S', 'W']:
+        decimal = -decimal
+
+    return decimal
+
+
+def parse_gps_ifd(gps_info):
+    """
+    將 GPS IFD 轉為 {lat, lng, alt} 字典；缺少經緯度時回傳 None。
+    """
+    if not gps_info:
+        return None
+
+    gps_lat_ref = gps_info.get(GPS_LAT_REF)
+    gps_lat = gps_info.get(GPS_LAT)
+    gps_lng_ref = gps_info.get(GPS_LNG_REF)
+    gps_lng = gps_info.get(GPS_LNG)
+    gps_alt = gps_info.get(GPS_ALT)
+
+    if not (gps_lat and gps_lat_ref and gps_lng and gps_lng_ref):
+        return None
+
+    result = {
+        "lat": round(float(get_decimal_from_dms(gps_lat, gps_lat_ref)), 6),
+        "lng": round(float(get_decimal_from_dms(gps_lng, gps_lng_ref)), 6)
+    }
+
+    # 高度是選擇性的
+    if gps_alt is not None:
+        # gps_alt 可能是 (numerator, denominator) 或直接是數值
+        try:
+            # Pillow 的 IFDRational 處理
+            alt_val = float(gps_alt)
+        except Exception:
+            alt_val = 0
+        # GPSAltitudeRef = 1 代表海平面以下
+        if gps_info.get(GPS_ALT_REF) in (1, b'\x01'):
+            alt_val = -alt_val
+        result["alt"] = round(alt_val, 2)
+
+    return result
+
+
+def format_exif_datetime(value):
+    """EXIF 時間 '2024:05:01 10:20:30' -> '2024-05-01T10:20:30'；格式不符時回傳 None。"""
+    if not value:
+        return None
+    value = str(value).strip().rstrip('\x00')
+    try:
+        date_part, time_part = value.split(' ', 1)
+        return f"{date_part.replace(':', '-')}T{time_part}"
+    except ValueError:
+        return None
+
+
+def clean_exif_text(value):
+    if value is None:
+        return None
+    value = str(value).strip().rstrip('\x00').strip()
+    return value or None
+
+
+def read_exif_metadata(img):
+    """
+    從已開啟 (尚未解碼) 的圖片一次讀出所有需要的 EXIF 欄位。
+    回傳 {gps, taken, camera, orientation, width, height}。
+    """
+    exif = get_exif(img)
+    exif_ifd = exif.get_ifd(ExifTags.IFD.Exif) if exif else {}
+    gps_ifd = exif.get_ifd(ExifTags.IFD.GPSInfo) if exif else {}
+
+    make = clean_exif_text(exif.get(TAG_MAKE))
+    model = clean_exif_text(exif.get(TAG_MODEL))
+    if make and model and model.lower().startswith(make.lower()):
+        camera = model
+    else:
+        camera = " ".join(part for part in (make, model) if part) or None
+
+    return {
+        "gps": parse_gps_ifd(gps_ifd),
+        "taken": format_exif_datetime(exif_ifd.get(TAG_DATETIME_ORIGINAL) or exif.get(TAG_DATETIME)),
+        "camera": camera,
+        "orientation": int(exif.get(TAG_ORIENTATION, 1) or 1),
+        "width": img.width,
+        "height": img.height,
+    }
+
+
+def scan_metadata(source_path):
+    """
+    只開啟檔頭讀取 EXIF，不解碼像素 (JPEG 只需讀到影像資料前的 APP 區段；PNG 只讀區塊標頭)。
+    讀取失敗時回傳只有尺寸以外欄位為空的結果，不中斷建置。
+    """
+    try:
+        with Image.open(source_path) as img:
+            return read_exif_metadata(img)
+    except Exception as e:
+        print(f"  ! 讀取 EXIF 發生錯誤 ({os.path.basename(source_path)}): {e}")
+        return {"gps": None, "taken": None, "camera": None, "orientation": 1, "width": None, "height": None}
+
+
+def get_gps_info(img):
+    """
+    從圖片的 EXIF 資料中提取 GPS 經緯度和高度。
+    回傳: 包含 lat, lng, alt 的字典，若無資料則回傳 None。
+    """
+    try:
+        exif = get_exif(img)
+        return parse_gps_ifd(exif.get_ifd(ExifTags.IFD.GPSInfo)) if exif else None
+    except Exception as e:
+        print(f"  ! 讀取 GPS 發生錯誤: {e}")
+        return None
@@ -0,0 +1,192 @@
+"""
+相似照片 / 近重複偵測模組。
+
+每張照片由 150px 色彩分析小圖計算三種 64-bit 感知雜湊 (aHash / dHash / pHash) 與精簡色彩向量
+(2x2 區塊平均 Lab，共 12 個整數)，存放在建置清單中；以 multi-index hashing 依漢明距離建立索引：
+64-bit 雜湊切成 4 段 16-bit 各自建表，距離 <= r 的兩個雜湊至少有一段的距離 <= r // 4 (鴿籠原理)，
+因此「與 X 相似」只需查每段附近的少數桶子再驗證完整距離 (次線性且不漏)，最後以 union-find 合併成相似群組。
+pHash 需要 NumPy，未安裝時以 dHash 建立索引。
+"""
+from functools import lru_cache
+from itertools import combinations
+
+from PIL import Image
+
+try:
+    import numpy as np
+except ImportError:  # NumPy 為選用套件，未安裝時不計算 pHash
+    np = None
+
+HASH_SIZE = 8
+PHASH_SIZE = 32
+EMBEDDING_GRID = 2
+INDEX_CHUNKS = 4
+CHUNK_BITS = 64 // INDEX_CHUNKS
+
+
+def bits_to_hex(bits):
+    value = 0
+    for bit in bits:
+        value = (value << 1) | int(bool(bit))
+    return f"{value:0{len(bits) // 4}x}"
+
+
+def get_gray(proxy, size):
+    return proxy.convert('L').resize(size, Image.Resampling.BOX)
+
+
+def get_ahash(proxy):
+    """平均雜湊：8x8 灰階，亮於平均為 1。"""
+    pixels = list(get_gray(proxy, (HASH_SIZE, HASH_SIZE)).getdata())
+    mean = sum(pixels) / len(pixels)
+    return bits_to_hex([p > mean for p in pixels])
+
+
+def get_dhash(proxy):
+    """差異雜湊：9x8 灰階，每列左右相鄰像素比較。"""
+    gray = get_gray(proxy, (HASH_SIZE + 1, HASH_SIZE))
+    pixels = list(gray.getdata())
+    width = HASH_SIZE + 1
+    return bits_to_hex([pixels[row * width + col] < pixels[row * width + col + 1]
+                        for row in range(HASH_SIZE) for col in range(HASH_SIZE)])
+
+
+def get_phash(proxy):
+    """感知雜湊：32x32 灰階做 2D DCT，取左上 8x8 低頻 (不含 DC) 與中位數比較。"""
+    if np is None:
+        return None
+    pixels = np.asarray(get_gray(proxy, (PHASH_SIZE, PHASH_SIZE)), dtype=np.float64)
+    n = np.arange(PHASH_SIZE)
+    dct = np.cos(np.pi * (2 * n[None, :] + 1) * n[:, None] / (2 * PHASH_SIZE))
+    low = (dct @ pixels @ dct.T)[:HASH_SIZE, :HASH_SIZE].flatten()
+    median = np.median(low[1:])
+    return bits_to_hex(low > median)
+
+
+def rgb_to_lab(rgb):
+    """單一 sRGB (0-255) -> CIE Lab (D65)。"""
+    linear = [c / 12.92 if c <= 0.04045 else ((c + 0.055) / 1.055) ** 2.4 for c in (v / 255 for v in rgb)]
+    x = (0.4124564 * linear[0] + 0.3575761 * linear[1] + 0.1804375 * linear[2]) / 0.95047
+    y = 0.2126729 * linear[0] + 0.7151522 * linear[1] + 0.0721750 * linear[2]
+    z = (0.0193339 * linear[0] + 0.1191920 * linear[1] + 0.9503041 * linear[2]) / 1.08883
+    fx, fy, fz = (t ** (1 / 3) if t > (6 / 29) ** 3 else t / (3 * (6 / 29) ** 2) + 4 / 29 for t in (x, y, z))
+    return (116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz))
+
+
+def get_color_embedding(proxy):
+    """2x2 區塊各自的平均色轉為 Lab，依序攤平成 [L, a, b, L, a, b, ...] 整數列表。"""
+    cells = proxy.convert('RGB').resize((EMBEDDING_GRID, EMBEDDING_GRID), Image.Resampling.BOX)
+    return [round(v) for rgb in cells.getdata() for v in rgb_to_lab(rgb)]
+
+
+def get_image_signature(proxy):
+    """單張照片的相似度特徵：{a, d, p (十六進位雜湊), lab (色彩向量)}。"""
+    signature = {"a": get_ahash(proxy), "d": get_dhash(proxy)}
+    phash = get_phash(proxy)
+    if phash:
+        signature["p"] = phash
+    signature["lab"] = get_color_embedding(proxy)
+    return signature
+
+
+def hamming(a, b):
+    return bin(a ^ b).count('1')
+
+
+@lru_cache(maxsize=None)
+def get_flip_masks(bits, radius):
+    """bits 位元內所有最多 radius 個 bit 為 1 的遮罩 (含 0)。"""
+    return tuple(sum(1 << i for i in positions)
+                 for r in range(radius + 1) for positions in combinations(range(bits), r))
+
+
+def split_chunks(value):
+    mask = (1 << CHUNK_BITS) - 1
+    return [(value >> (i * CHUNK_BITS)) & mask for i in range(INDEX_CHUNKS)]
+
+
+def get_index_hash(signature):
+    """建立索引使用的雜湊：優先 pHash，沒有時用 dHash。"""
+    value = signature.get("p") or signature.get("d")
+    return int(value, 16) if value else None
+
+
+def index_insert(index, value, key):
+    for table, chunk in zip(index, split_chunks(value)):
+        table.setdefault(chunk, []).append((value, key))
+
+
+def index_query(index, value, radius):
+    """回傳 [(距離, key), ...]：每段只查距離 <= radius // INDEX_CHUNKS 的桶子，再驗證完整漢明距離。"""
+    masks = get_flip_masks(CHUNK_BITS, radius // INDEX_CHUNKS)
+    candidates = {}
+    for table, chunk in zip(index, split_chunks(value)):
+        if len(table) < len(masks):
+            # 分段值比遮罩少 (照片不多) 時，直接掃過整張表比較快
+            buckets = [bucket for other, bucket in table.items() if hamming(chunk, other) <= radius // INDEX_CHUNKS]
+        else:
+            buckets = [table[chunk ^ mask] for mask in masks if chunk ^ mask in table]
+        for bucket in buckets:
+            candidates.update((key, candidate) for candidate, key in bucket)
+    results = []
+    for key, candidate in candidates.items():
+        distance = hamming(value, candidate)
+        if distance <= radius:
+            results.append((distance, key))
+    return results
+
+
+def build_similarity_index(signatures):
+    """signatures: {key: signature}；回傳 INDEX_CHUNKS 個 {分段值: [(雜湊, key), ...]} 查詢表。"""
+    index = [{} for _ in range(INDEX_CHUNKS)]
+    for key in sorted(signatures):
+        value = get_index_hash(signatures[key])
+        if value is not None:
+            index_insert(index, value, key)
+    return index
+
+
+def get_color_distance(a, b):
+    """兩個色彩向量每個區塊 Lab 距離的均方根；任一方沒有向量時視為 0 (只比雜湊)。"""
+    if not a or not b or len(a) != len(b):
+        return 0.0
+    return (sum((x - y) ** 2 for x, y in zip(a, b)) / (len(a) // 3)) ** 0.5
+
+
+def find_similar(index, signatures, key, radius, color_radius):
+    """與 key 相似的照片 [(距離, key), ...] (不含自己)，依距離排序；色彩向量差距超過 color_radius 的排除。"""
+    signature = signatures[key]
+    value = get_index_hash(signature)
+    if value is None:
+        return []
+    matches = [
+        (distance, other) for distance, other in index_query(index, value, radius)
+        if other != key and get_color_distance(signature.get("lab"), signatures[other].get("lab")) <= color_radius
+    ]
+    return sorted(matches)
+
+
+def find_similar_groups(signatures, radius, color_radius):
+    """
+    以 union-find 把彼此相似的照片合併成群組。
+    回傳群組列表 (每組為排序後的 key 列表，至少 2 張)，依第一個 key 排序。
+    """
+    index = build_similarity_index(signatures)
+    parent = {key: key for key in signatures}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for key in sorted(signatures):
+        for _, other in find_similar(index, signatures, key, radius, color_radius):
+            root_a, root_b = find(key), find(other)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    groups = {}
+    for key in sorted(signatures):
+        groups.setdefault(find(key), []).append(key)
+    return sorted((members for members in groups.values() if len(members) > 1), key=lambda members: members[0])
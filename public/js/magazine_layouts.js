@@ -0,0 +1 @@
+window.magazineLayouts = {"version":1,"categories":["城市光影","大地映像"],"photos":[[0,"台中北屯林鼎樸御.jpg"],[0,"台中大毅讚幸福.jpg"],[0,"台中漢神洲際百貨.jpg"],[0,"新北土城天好運2.jpg"],[0,"新北土城工業區.jpg"],[0,"新北土城工業區日落.jpg"],[0,"新北土城德友植仁社區.jpg"],[0,"新北新店行政園區.jpg"],[0,"新北新店行政園區-2.jpg"],[0,"新北新店裕隆城.jpg"],[0,"新北林口和洲艾美.jpg"],[0,"新北林口和洲艾美-2.jpg"],[0,"新北林口和耀恆美 (1).jpg"],[0,"新北林口和耀恆美 (2).jpg"],[0,"新北林口富宇天玥.jpg"],[0,"新北林口富宇富御 (1).jpg"],[0,"新北林口富宇富御 (2).jpg"],[0,"新北林口富宇富御 (3).jpg"],[0,"新北林口富宇敦峰社區 (1).jpg"],[0,"新北林口富宇敦峰社區 (2).jpg"],[0,"新北林口聿德觀璟.jpg"],[0,"新北林口藝樹家 (2).jpg"],[0,"新北林口藝樹家 (4).jpg"],[0,"新北林口頤昌澄岳、鴻築玥 (1).jpg"],[0,"新北林口頤昌澄岳、鴻築玥 (2).jpg"],[0,"新北淡水台北灣：第3期(江南頤和) (2).jpg"],[0,"新北淡水台北灣：第3期(江南頤和).jpg"],[0,"新北淡水合陽齊美.jpg"],[0,"新北淡水和光崁頂五路建案 (1).jpg"],[0,"新北淡水和光崁頂五路建案 (2).jpg"],[0,"新北淡水天藝接待中心 (1).jpg"],[0,"新北淡水天藝接待中心 (2).jpg"],[0,"新北淡水天藝接待中心 (3).jpg"],[0,"新北淡水天藝接待中心 (4).jpg"],[0,"新北淡水海洋都心 (1).jpg"],[0,"新北淡水海洋都心 (2).jpg"],[0,"新北淡海新市鎮一隅.jpg"],[0,"新店五峰國中.jpg"],[0,"新店美河市.jpg"],[0,"板橋城市風景.jpg"],[0,"板橋城市風景-2.jpg"],[0,"林口三發嵐海.jpg"],[0,"林口三發嵐海-2.jpg"],[0,"林口文化北路二段與中山路路口.jpg"],[0,"桃園大園橫山書法藝術公園.jpg"],[0,"桃園小檜溪重劃區河濱公園.jpg"],[0,"桃園小檜溪重劃區河濱公園-2.jpg"],[0,"桃園小檜溪重劃區河濱公園-3.jpg"],[0,"桃園昭揚天御建案-2.jpg"],[0,"桃園水綠方建案.jpg"],[0,"桃園水綠方建案-2.jpg"],[0,"桃園水綠方建案-3.jpg"],[0,"桃園玉山公園及新家坡七期玉山官邸-2.jpg"],[0,"桃園觀音工業區廠房.jpg"],[0,"桃園龜山富宇上城.jpg"],[0,"桃園龜山富宇敦峰社區.jpg"],[0,"高雄福懋站前之星.jpg"],[0,"高雄福懋美森園.jpg"],[0,"高雄舊高雄車站(高雄願景館).jpg"],[1,"南投日月潭.jpg"],[1,"南投日月潭-2.jpg"],[1,"南投日月潭-3.jpg"],[1,"南投清境日出.jpg"],[1,"南投清境日落.jpg"],[1,"南投清境農場日出A.png"],[1,"南投清境農場日落-2.jpg"],[1,"南投清境農場日落.jpg"],[1,"南投清境農場雲海A.png"],[1,"台中洲際棒球場.jpg"],[1,"台北士林洲美橡皮壩.jpg"],[1,"台北士林雙溪濕地公園.jpg"],[1,"台北市北投社子大橋.jpg"],[1,"台北社子島腳踏車道.jpg"],[1,"基隆外木山漁港.jpg"],[1,"基隆外木山漁港-2.jpg"],[1,"基隆外木山濱海大道.jpg"],[1,"基隆外木山濱海大道-2.jpg"],[1,"基隆外木山濱海大道-3.jpg"],[1,"基隆大武崙澳底漁港.jpg"],[1,"基隆大武崙白沙灘.jpg"],[1,"基隆望幽谷.jpg"],[1,"基隆望幽谷-2.jpg"],[1,"基隆望幽谷-3.jpg"],[1,"基隆望幽谷-4.jpg"],[1,"宜蘭三星安農溪分洪堰水門.jpg"],[1,"宜蘭三星路四段旁.jpg"],[1,"宜蘭五結日落 (1)A.png"],[1,"宜蘭五結防潮閘門.jpg"],[1,"宜蘭五結防潮閘門-2.jpg"],[1,"宜蘭五結防潮閘門日落美景.jpg"],[1,"宜蘭五結黃金 (1).jpg"],[1,"宜蘭五結黃金 (3).jpg"],[1,"宜蘭冬山打那岸水閘門.jpg"],[1,"宜蘭冬山普悠瑪與希望之丘.jpg"],[1,"宜蘭冬山森之脈橋與水上綠舟.jpg"],[1,"宜蘭冬山河旁景致.jpg"],[1,"宜蘭冬山河與森之脈橋.jpg"],[1,"宜蘭冬山田園景緻.jpg"],[1,"宜蘭冬山田園景緻-2.jpg"],[1,"宜蘭冬山萬長春圳水門公園.jpg"],[1,"宜蘭冬山萬長春圳水門公園-2.jpg"],[1,"宜蘭羅東棒球場.jpg"],[1,"新北市瑞芳區南雅奇岩 (1).jpg"],[1,"新北市瑞芳區南雅奇岩 (2).jpg"],[1,"新北市瑞芳區南雅奇岩 (3).jpg"],[1,"新北市瑞芳區南雅奇岩 (4).jpg"],[1,"新北市瑞芳區南雅奇岩 (5).jpg"],[1,"新北市瑞芳區水湳洞選煉廠遺址 (1).jpg"],[1,"新北市瑞芳區水湳洞選煉廠遺址 (2).jpg"],[1,"新北市貢寮區龍洞岩場 (1).jpg"],[1,"新北市貢寮區龍洞岩場 (2).jpg"],[1,"新北市貢寮區龍洞岩場 (3).jpg"],[1,"新北市貢寮區龍洞岩場 (4).jpg"],[1,"新北市貢寮區龍洞岩場 (5).jpg"],[1,"新北林口竹林山寺公園.jpg"],[1,"新北林口竹林山寺公園-2.jpg"],[1,"新北林口竹林山寺公園-3.jpg"],[1,"新北林口竹林山觀音寺.jpg"],[1,"新北林口竹林山觀音寺-2.jpg"],[1,"新北淡水海尾子海灘 (1).jpg"],[1,"新北淡水輕軌 (1).jpg"],[1,"新北淡水輕軌 (2).jpg"],[1,"新北瑞芳礁岩海岸.jpg"],[1,"新北雙溪牡丹車站旁.jpg"],[1,"新北雙溪牡丹車站旁-2.jpg"],[1,"新店中興路.jpg"],[1,"新店景美溪旁.jpg"],[1,"新店景美溪河堤步道.jpg"],[1,"新竹寶山小西湖.jpg"],[1,"桃園大園許厝港溼地.jpg"],[1,"桃園大有梯田生態公園.jpg"],[1,"桃園玉山公園.jpg"],[1,"桃園青溪公園.jpg"],[1,"澎湖後寮天堂路  (2).jpg"],[1,"花蓮和平火車站旁.jpg"],[1,"花蓮和平火車站旁-2.jpg"],[1,"花蓮清水斷崖.jpg"],[1,"雲林北港女兒橋.jpg"],[1,"雲林北港朝天宮.jpg"],[1,"雲林斗六石榴火車站.jpg"],[1,"雲林西螺落日剪影 (2).jpg"],[1,"雲林西螺蝴蝶公園.jpg"],[1,"高雄中都橋.jpg"],[1,"高雄車站.jpg"],[1,"高雄車站-2.jpg"],[1,"高雄車站(高雄綠之丘).jpg"],[1,"高雄車站-3.jpg"],[1,"高雄輕軌.jpg"],[1,"高雄輕軌-2.jpg"]],"desktop":[{"cover":127,"pages":[[3,90,51,77],[2,40,73],[4,82,102,95,19],[4,91,29,100,109],[5,60,98,85],[2,121,71],[5,62,128,103],[1,58],[5,32,108,83],[4,124,142,139,65],[4,115,74,61,28],[1,130],[1,88],[1,99],[2,5,138],[2,145,18],[3,94,3,66],[1,16],[4,36,141,122,119],[5,116,9,137],[1,89],[2,27,7],[4,17,110,38,93],[3,107,86,76],[4,23,106,131,81],[1,101],[3,127,113,45],[1,143],[2,69,118],[4,50,120,112,144],[1,44],[3,31,104,24],[3,133,6,8],[4,33,37,52,135],[5,96,30,79],[5,39,35,42],[2,129,12],[1,43],[5,126,75,11],[1,117],[1,148],[2,53,57],[2,111,14],[5,25,55,4],[2,15,47],[5,56,67,140],[5,70,59,146],[4,123,41,63,134],[3,136,22,0],[5,84,10,132],[1,21],[4,46,114,97,125],[4,87,48,64,2],[2,68,49],[3,78,147,92],[3,34,13,80],[3,26,54,20],[3,105,1,72]]},{"cover":66,"pages":[[2,74,2],[2,121,14],[4,144,27,147,65],[1,82],[4,7,60,22,122],[3,104,9,31],[2,97,63],[2,5,81],[3,21,59,47],[5,145,55,76],[2,25,100],[2,124,44],[3,36,85,140],[3,58,137,1],[4,80,115,99,52],[2,117,53],[2,102,40],[3,107,62,110],[1,143],[4,42,0,51,119],[4,34,90,67,38],[5,84,45,79],[3,105,8,37],[2,69,106],[2,17,28],[1,123],[1,75],[2,129,12],[3,10,83,73],[3,39,61,93],[5,133,135,30],[1,48],[3,77,32,4],[3,70,98,131],[5,78,18,41],[5,49,20,94],[1,111],[2,3,24],[3,128,19,57],[1,148],[5,71,16,112],[2,127,56],[2,15,138],[5,72,50,134],[1,136],[5,87,108,146],[3,13,66,109],[2,89,54],[2,101,139],[5,29,88,142],[2,132,113],[5,23,86,141],[5,46,114,130],[1,120],[5,26,6,103],[3,33,91,95],[2,64,11],[5,43,118,35],[1,125],[3,126,116,92],[2,96,68]]},{"cover":96,"pages":[[2,70,118],[4,82,36,52,110],[2,2,59],[4,113,55,94,13],[1,0],[5,134,114,109],[5,71,60,85],[3,84,90,130],[5,128,9,32],[5,42,8,100],[3,142,132,75],[1,15],[2,33,74],[1,80],[1,3],[3,50,4,28],[3,148,79,115],[3,129,99,6],[5,104,20,93],[1,58],[5,64,38,7],[4,56,65,91,119],[4,39,95,62,19],[5,89,11,146],[1,34],[3,126,24,139],[4,49,22,37,67],[5,125,54,83],[4,107,57,140,63],[4,29,124,135,112],[1,48],[5,43,27,47],[3,46,16,121],[4,133,73,98,40],[2,61,72],[2,25,14],[5,143,30,12],[1,44],[4,77,35,131,81],[4,31,145,106,141],[4,53,137,144,76],[4,26,66,103,117],[2,68,116],[2,136,138],[5,87,108,122],[1,10],[1,96],[4,97,18,127,88],[2,17,51],[2,69,86],[4,92,41,45,102],[4,5,120,147,105],[2,123,1],[3,101,111,78],[1,23],[1,21]]},{"cover":70,"pages":[[4,69,140,88,75],[2,13,4],[2,99,122],[1,144],[1,98],[5,31,7,106],[4,87,9,45,113],[4,43,65,93,41],[3,89,1,94],[4,125,117,83,146],[2,147,86],[4,14,143,62,110],[1,39],[3,36,121,18],[2,84,6],[5,21,138,40],[4,64,51,55,142],[4,114,44,57,47],[3,120,139,82],[1,56],[2,58,22],[1,71],[2,126,103],[4,96,38,109,85],[3,104,112,135],[2,115,92],[1,148],[3,50,42,124],[3,129,27,8],[5,26,130,24],[3,77,66,100],[1,123],[3,48,68,73],[5,70,35,74],[1,145],[2,137,32],[4,53,28,81,12],[3,128,59,19],[3,2,127,30],[2,78,63],[4,116,54,134,79],[5,61,5,52],[2,3,118],[4,132,95,141,76],[5,49,0,131],[1,102],[4,60,67,119,108],[1,17],[1,29],[4,46,16,90,105],[1,15],[5,20,97,91],[3,33,37,10],[4,25,11,107,101],[2,136,133],[3,80,72,34],[2,23,111]]},{"cover":139,"pages":[[1,118],[1,139],[1,127],[1,17],[5,131,78,8],[2,27,92],[1,52],[4,16,83,140,146],[4,58,66,59,134],[1,65],[4,84,63,130,24],[3,80,37,51],[2,10,81],[5,21,73,110],[1,126],[5,64,76,113],[5,128,18,9],[4,68,74,100,30],[3,97,135,82],[2,44,28],[2,123,93],[3,70,40,112],[4,129,12,94,55],[1,87],[4,48,57,109,7],[1,43],[4,148,72,106,42],[3,34,108,67],[3,147,124,35],[1,77],[3,101,6,103],[3,102,32,141],[3,60,11,31],[2,33,75],[4,13,86,142,122],[1,36],[3,2,61,79],[1,5],[5,15,41,138],[4,136,98,137,85],[2,29,54],[3,14,111,121],[2,71,56],[2,143,117],[4,125,115,90,45],[3,96,119,20],[3,69,22,62],[1,53],[4,25,38,144,47],[4,145,19,91,133],[3,132,88,99],[4,116,4,50,107],[1,104],[4,3,95,39,105],[4,89,114,46,49],[5,23,1,120],[1,26],[1,0]]},{"cover":97,"pages":[[4,86,68,93,146],[5,46,124,106],[2,136,138],[4,23,42,88,76],[5,34,0,141],[4,2,37,109,47],[2,14,110],[1,39],[3,128,103,94],[1,111],[4,60,135,52,119],[1,48],[3,49,18,40],[5,80,45,11],[4,125,75,142,12],[4,70,35,140,82],[1,127],[4,96,24,144,131],[5,5,30,66],[3,92,51,90],[5,15,83,28],[4,107,57,65,91],[5,104,8,38],[2,43,22],[2,102,67],[3,1,29,7],[3,147,108,112],[2,145,19],[3,44,114,6],[4,36,62,122,32],[4,143,41,99,55],[2,129,27],[4,3,95,73,134],[3,101,20,63],[4,133,4,98,79],[2,123,16],[4,89,118,85,100],[4,87,113,74,33],[3,10,59,137],[4,13,81,130,105],[3,50,116,54],[5,17,9,64],[1,58],[1,53],[5,132,115,121],[5,56,31,69],[4,78,61,139,21],[1,26],[5,25,72,71],[1,120],[4,126,77,148,84],[2,97,117]]}],"mobile":[{"cover":77,"pages":[[41,43],[119,146],[28,115],[92,142],[145,140],[1,98],[133,106],[139,108],[114,148],[100,2],[103,96],[10,137],[26,52],[61,36],[66,76],[39,110],[59,118],[107,90],[105,32],[40,3],[27,64],[73,121],[15,4],[53,37],[70,7],[20,104],[132,22],[58,74],[46,8],[23,112],[111,134],[21,83],[6,65],[14,109],[87,93],[147,88],[60,47],[84,122],[128,51],[68,16],[131,42],[91,35],[85,120],[79,67],[89,30],[136,45],[116,71],[17,124],[101,113],[49,138],[125,130],[126,135],[78,9],[102,0],[29,86],[13,95],[25,12],[56,31],[69,81],[123,82],[33,24],[50,117],[44,94],[5,18],[57,127],[55,34],[38,99],[54,63],[80,144],[129,75],[48,141],[77,62],[72,19],[143,11],[97]]},{"cover":123,"pages":[[68,62],[59,135],[42,124],[3,140],[0,17],[134,114],[4,103],[81,133],[85,29],[84,75],[72,7],[77,88],[107,28],[96,35],[26,6],[78,121],[43,67],[129,100],[31,93],[119,60],[125,106],[15,110],[87,47],[9,117],[8,46],[148,73],[12,83],[113,34],[66,56],[89,55],[147,91],[69,40],[98,10],[24,136],[137,80],[21,65],[45,14],[49,19],[115,143],[13,38],[33,108],[139,48],[71,5],[25,54],[30,102],[2,76],[53,130],[58,11],[116,74],[44,120],[23,27],[128,22],[111,32],[105,52],[97,138],[145,109],[104,63],[86,123],[101,144],[92,112],[50,16],[70,18],[146,20],[126,122],[39,90],[51,127],[57,61],[95,142],[94,118],[82,64],[79,41],[37,131],[99,132],[36,141],[1]]},{"cover":105,"pages":[[99,89],[54,135],[13,90],[101,131],[36,127],[120,123],[29,79],[45,11],[37,104],[115,140],[46,86],[136,137],[129,28],[3,113],[114,125],[58,1],[132,65],[5,139],[14,98],[34,83],[117,50],[145,85],[124,24],[95,39],[97,40],[130,147],[21,121],[111,52],[61,82],[68,49],[133,73],[10,57],[128,22],[105,141],[25,100],[87,112],[43,93],[64,108],[84,94],[20,60],[80,35],[102,59],[2,42],[44,62],[116,47],[96,18],[70,146],[48,144],[53,7],[143,109],[77,91],[31,142],[88,148],[63,110],[76,41],[19,51],[92,6],[33,106],[16,71],[38,107],[30,12],[26,8],[72,74],[15,81],[78,55],[119,103],[66,138],[118,67],[4,69],[56,32],[23,75],[17,122],[0,27],[126,134],[9]]},{"cover":133,"pages":[[4,105],[57,119],[18,108],[14,142],[27,63],[132,115],[107,37],[44,0],[56,28],[29,38],[128,137],[50,59],[80,66],[25,83],[126,7],[15,41],[13,8],[97,35],[2,65],[17,130],[116,68],[72,61],[104,76],[43,106],[69,144],[26,52],[127,131],[125,140],[64,24],[34,55],[60,20],[96,90],[133,79],[136,51],[70,112],[10,99],[92,124],[49,73],[53,45],[16,42],[71,95],[74,129],[109,123],[135,111],[100,3],[23,134],[54,146],[118,31],[117,88],[113,33],[138,85],[19,39],[30,6],[110,5],[46,22],[21,47],[86,93],[32,122],[139,81],[98,9],[89,11],[87,62],[148,114],[77,12],[75,145],[121,67],[120,141],[103,91],[143,1],[147,94],[58,40],[78,82],[102,36],[48,101],[84]]},{"cover":116,"pages":[[25,117],[97,59],[87,118],[143,112],[32,43],[35,99],[120,50],[16,123],[137,122],[23,76],[3,93],[18,56],[22,133],[77,121],[15,135],[111,95],[26,38],[71,42],[116,94],[49,47],[101,141],[10,37],[34,6],[84,75],[48,4],[129,12],[136,138],[14,30],[1,7],[13,108],[128,54],[5,139],[27,69],[113,20],[45,17],[60,55],[46,115],[105,73],[78,91],[126,82],[33,142],[102,0],[127,21],[44,130],[125,144],[67,104],[53,134],[68,79],[140,80],[57,100],[62,124],[64,52],[63,41],[74,148],[81,107],[83,96],[89,40],[65,119],[86,61],[145,31],[147,88],[2,28],[132,106],[92,109],[131,29],[146,85],[11,103],[39,8],[58,110],[72,98],[36,24],[90,114],[70,66],[51,9],[19]]},{"cover":124,"pages":[[73,122],[40,124],[62,96],[91,24],[55,63],[110,44],[125,100],[141,126],[80,57],[58,106],[18,94],[118,65],[20,47],[70,130],[29,38],[114,30],[48,67],[116,52],[16,89],[101,142],[129,11],[97,138],[34,131],[1,8],[7,86],[79,25],[123,82],[98,133],[87,112],[0,60],[148,28],[127,54],[105,113],[78,95],[10,75],[61,99],[136,137],[146,2],[45,76],[46,32],[145,35],[31,66],[139,93],[12,103],[140,84],[81,19],[37,92],[41,111],[51,74],[17,4],[143,88],[36,59],[69,22],[49,135],[14,9],[117,53],[13,85],[68,144],[50,72],[109,6],[102,119],[64,83],[128,27],[26,108],[21,121],[147,90],[71,56],[33,115],[120,42],[39,134],[23,132],[107,77],[3,43],[15,5],[104]]}]};
@@ -89,6 +89,36 @@ document.addEventListener('DOMContentLoaded', () => {
         return baseName;
     };
 
+    // 響應式輸出 (data_photos.js 的 variants，columnar：width/height/format/file/bytes)
+    const PHOTO_SOURCE_TYPES = { avif: 'image/avif', webp: 'image/webp' };
+    const GALLERY_IMAGE_SIZES = '(min-width: 1024px) 352px, (min-width: 640px) 50vw, 100vw';
+    const MAGAZINE_IMAGE_SIZES = '(min-width: 768px) 50vw, 100vw';
+
+    const getPhotoSrcset = (photo, format) => {
+        const variants = photo.variants;
+        if (!variants || !Array.isArray(variants.file)) return '';
+        return variants.file
+            .map((file, index) => variants.format[index] === format
+                ? `./public/photos/${encodeURIComponent(photo.category)}/${encodeURIComponent(file)} ${variants.width[index]}w`
+                : null)
+            .filter(Boolean)
+            .join(', ');
+    };
+
+    // <picture> 內容：有 AVIF/WebP 輸出時加上 <source>，<img> 以 JPEG srcset 讓瀏覽器依版面寬度挑選尺寸
+    const getPictureHTML = (photo, sizes, imgAttributes) => {
+        const sources = Object.entries(PHOTO_SOURCE_TYPES)
+            .map(([format, type]) => {
+                const srcset = getPhotoSrcset(photo, format);
+                return srcset ? `<source type="${type}" srcset="${srcset}" sizes="${sizes}">` : '';
+            })
+            .join('');
+        const jpegSrcset = getPhotoSrcset(photo, 'jpg');
+        const src = `./public/photos/${encodeURIComponent(photo.category)}/${encodeURIComponent(photo.filename)}`;
+        const srcsetAttributes = jpegSrcset ? ` srcset="${jpegSrcset}" sizes="${sizes}"` : '';
+        return `${sources}<img src="${src}"${srcsetAttributes} ${imgAttributes}>`;
+    };
+
     const cssLengthToPx = (value, fallback = 0) => {
         const rawValue = `${value || ''}`.trim();
         const amount = parseFloat(rawValue);
@@ -402,6 +432,7 @@ document.addEventListener('DOMContentLoaded', () => {
         const photoOptions = document.getElementById('map-photo-options');
         const addFromPhoto = document.getElementById('map-add-from-photo');
         const applyPhoto = document.getElementById('map-apply-photo');
+        const clusterList = document.getElementById('map-cluster-photos');
 
         if (!mapWrap || !pinsWrap || !routeSegments || !previewImg) return;
         if (mapJourneyInitialized) return;
@@ -479,6 +510,8 @@ document.addEventListener('DOMContentLoaded', () => {
             marker.category = photo.category;
             marker.filename = photo.filename;
             delete marker.image;
+            delete marker.count;
+            delete marker.photos;
             if (photo.gps) {
                 marker.gps = photo.gps;
             } else {
@@ -506,6 +539,30 @@ document.addEventListener('DOMContentLoaded', () => {
         };
 
         const getMarkerTitle = (marker) => marker.title || getBaseLocationName(marker.filename || '') || '新的空拍標示';
+        // 自動群集標示 (map_markers.js 的 count/photos)：預覽卡片列出群集內所有照片，點選開啟燈箱
+        const getClusterPhotos = (marker) => (Array.isArray(marker?.photos) ? marker.photos : [])
+            .map(item => allPhotos.find(photo => photo.category === item.category && photo.filename === item.filename))
+            .filter(Boolean);
+        const renderClusterPhotos = (marker) => {
+            if (!clusterList) return;
+            const photos = getClusterPhotos(marker);
+            clusterList.innerHTML = '';
+            clusterList.hidden = photos.length < 2;
+            photos.forEach(photo => {
+                const title = getBaseLocationName(photo.filename);
+                const button = document.createElement('button');
+                button.type = 'button';
+                button.className = 'map-cluster-photo';
+                button.title = title;
+                button.setAttribute('aria-label', `開啟 ${title}`);
+                button.innerHTML = `<picture>${getPictureHTML(photo, '4rem', `alt="" loading="lazy"`)}</picture>`;
+                button.addEventListener('click', () => {
+                    currentCategoryPhotos = photos;
+                    openModal(photo.category, photo.filename);
+                });
+                clusterList.appendChild(button);
+            });
+        };
         const getMarkerImageSrc = (marker) => {
             if (marker.image) return marker.image;
             const photo = getMarkerPhoto(marker);
@@ -637,6 +694,7 @@ document.addEventListener('DOMContentLoaded', () => {
             setPreviewImage(marker);
             if (previewCard) previewCard.dataset.title = getMarkerTitle(marker);
             if (previewTitle) previewTitle.textContent = getMarkerTitle(marker);
+            renderClusterPhotos(marker);
             const gps = getMarkerGps(marker);
             activeCoords.textContent = gps ? `${formatCoord(gps.lat)}, ${formatCoord(gps.lng)}` : `X ${points[index].x.toFixed(1)} / Y ${points[index].y.toFixed(1)}`;
             pinsWrap.querySelectorAll('.map-pin').forEach((pin, pinIndex) => {
@@ -656,6 +714,13 @@ document.addEventListener('DOMContentLoaded', () => {
                 pin.style.setProperty('--pin-color', getColorCss(photo?.color, 1));
                 pin.dataset.title = getMarkerTitle(marker);
                 pin.setAttribute('aria-label', `標示 ${getMarkerTitle(marker)}`);
+                if (marker.count > 1) {
+                    const count = document.createElement('span');
+                    count.className = 'map-pin-count';
+                    count.textContent = marker.count;
+                    pin.appendChild(count);
+                    pin.setAttribute('aria-label', `標示 ${getMarkerTitle(marker)} (${marker.count} 張照片)`);
+                }
                 pin.addEventListener('pointerdown', (event) => {
                     if (!editMode) return;
                     event.preventDefault();
@@ -838,16 +903,15 @@ document.addEventListener('DOMContentLoaded', () => {
         } else {
             photosToDisplay.forEach((photo) => {
                 const title = getBaseLocationName(photo.filename);
-                const imagePath = `./public/photos/${encodeURIComponent(categoryName)}/${encodeURIComponent(photo.filename)}`;
                 const card = document.createElement('div');
                 card.className = 'relative w-full h-80 rounded-xl overflow-hidden shadow-2xl photo-card transition-transform transform hover:scale-105 cursor-pointer';
                 card.dataset.category = categoryName;
                 card.dataset.filename = photo.filename;
 
-                const image = document.createElement('img');
-                image.src = imagePath;
-                image.alt = title;
-                image.className = 'w-full h-full object-cover';
+                const picture = document.createElement('picture');
+                picture.className = 'block w-full h-full';
+                picture.innerHTML = getPictureHTML({ ...photo, category: categoryName }, GALLERY_IMAGE_SIZES,
+                    `alt="${escapeHTML(title)}" class="w-full h-full object-cover"`);
 
                 const overlay = document.createElement('div');
                 overlay.className = 'photo-overlay absolute inset-0 bg-black bg-opacity-40 flex items-center justify-center opacity-0 transition-opacity duration-300';
@@ -857,7 +921,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 label.textContent = title;
 
                 overlay.appendChild(label);
-                card.append(image, overlay);
+                card.append(picture, overlay);
                 galleryContainer.appendChild(card);
             });
         }
@@ -1488,32 +1552,147 @@ document.addEventListener('DOMContentLoaded', () => {
         // Set Poster (First frame or image)
         heroVideo.poster = `background/${baseFilename}.jpg`;
 
-        // Clear existing content (fallback text/sources)
-        heroVideo.innerHTML = '';
-
-        // 1. Add WebM Source (Preferred)
-        const sourceWebM = document.createElement('source');
-        sourceWebM.src = `background/${baseFilename}.webm`;
-        sourceWebM.type = 'video/webm';
-        heroVideo.appendChild(sourceWebM);
-
-        // 2. Add MP4 Source (Fallback)
-        const sourceMp4 = document.createElement('source');
-        sourceMp4.src = `background/${baseFilename}.mp4`;
-        sourceMp4.type = 'video/mp4';
-        heroVideo.appendChild(sourceMp4);
-
-        // Fallback text
-        heroVideo.appendChild(document.createTextNode('您的瀏覽器不支援此影片格式。'));
-
-        // Load and attempt play
-        heroVideo.load();
-        const playPromise = heroVideo.play();
-        if (playPromise !== undefined) {
-            playPromise.catch(error => {
-                console.log("Auto-play was prevented by the browser", error);
-            });
+        const attachSources = (descriptor) => {
+            // Clear existing content (fallback text/sources)
+            heroVideo.innerHTML = '';
+
+            // 0. Adaptive ladder (optimize_videos.py --abr), only where HLS plays natively (Safari / iOS)
+            if (descriptor && descriptor.hls) {
+                const sourceHls = document.createElement('source');
+                sourceHls.src = descriptor.hls;
+                sourceHls.type = 'application/vnd.apple.mpegurl';
+                heroVideo.appendChild(sourceHls);
+            }
+
+            // 1. Add WebM Source (Preferred)
+            const sourceWebM = document.createElement('source');
+            sourceWebM.src = `background/${baseFilename}.webm`;
+            sourceWebM.type = 'video/webm';
+            heroVideo.appendChild(sourceWebM);
+
+            // 2. Add MP4 Source (Fallback)
+            const sourceMp4 = document.createElement('source');
+            sourceMp4.src = `background/${baseFilename}.mp4`;
+            sourceMp4.type = 'video/mp4';
+            heroVideo.appendChild(sourceMp4);
+
+            // Fallback text
+            heroVideo.appendChild(document.createTextNode('您的瀏覽器不支援此影片格式。'));
+
+            // Load and attempt play
+            heroVideo.load();
+            const playPromise = heroVideo.play();
+            if (playPromise !== undefined) {
+                playPromise.catch(error => {
+                    console.log("Auto-play was prevented by the browser", error);
+                });
+            }
+        };
+
+        // Only browsers with native HLS can use the ABR descriptor; everyone else starts the WebM/MP4 sources
+        // immediately instead of waiting for a request that is usually a 404 (--abr is optional)
+        if (!heroVideo.canPlayType('application/vnd.apple.mpegurl')) {
+            attachSources(null);
+            return;
         }
+
+        // Without the descriptor (or on file://) the progressive WebM/MP4 sources are used
+        fetch(`background/abr/${baseFilename}/stream.json`)
+            .then(response => (response.ok ? response.json() : null))
+            .catch(() => null)
+            .then(attachSources);
+    };
+
+    // --- Helper: Precomputed Magazine Layouts (magazine_layouts.js, built by generate_photo_list.py) ---
+    // Returns { cover, pages: [{ batch, finalLayout }] }, or null if the file is missing or out of date.
+    const getPlannedMagazine = (isMobile) => {
+        const plan = window.magazineLayouts;
+        const variants = plan && plan.version === 1 ? plan[isMobile ? 'mobile' : 'desktop'] : null;
+        if (!window.globalPhotoData || !variants || variants.length === 0) return null;
+
+        const lookup = new Map();
+        Object.keys(window.globalPhotoData).forEach(category => {
+            window.globalPhotoData[category].forEach(p => lookup.set(`${category}/${p.filename}`, { ...p, category }));
+        });
+        const photos = plan.photos.map(([categoryIndex, filename]) => lookup.get(`${plan.categories[categoryIndex]}/${filename}`));
+        // Photos added or removed since the last build: fall back to the runtime layout
+        if (photos.length !== lookup.size || photos.some(p => !p)) return null;
+
+        const variant = variants[Math.floor(Math.random() * variants.length)];
+        return {
+            cover: photos[variant.cover],
+            pages: variant.pages.map(page => isMobile
+                ? { batch: page.map(i => photos[i]), finalLayout: 'mobile-vertical' }
+                : { batch: page.slice(1).map(i => photos[i]), finalLayout: page[0] })
+        };
+    };
+
+    // --- Helper: Runtime Magazine Layout (fallback when no precomputed layout is available) ---
+    const buildMagazinePages = (photoPool, isMobile) => {
+        const pages = [];
+        while (photoPool.length > 0) {
+            let targetCount = 1;
+            let finalLayout = 1;
+
+            if (isMobile) {
+                // --- Mobile: Always 2 photos, Vertical Split ---
+                targetCount = 2;
+                finalLayout = 'mobile-vertical';
+            } else {
+                // --- Desktop: Random 1-5 ---
+                const layoutType = Math.floor(Math.random() * 5) + 1;
+                if (layoutType === 2) targetCount = 2;
+                if (layoutType === 3 || layoutType === 5) targetCount = 3;
+                if (layoutType === 4) targetCount = 4;
+                finalLayout = layoutType;
+            }
+
+            // Select photos
+            const batch = [];
+            if (photoPool.length > 0) batch.push(photoPool.shift());
+
+            let i = 0;
+            while (batch.length < targetCount && i < photoPool.length) {
+                const p = photoPool[i];
+                const prefix = p.filename.substring(0, 4);
+                const isLocationConflict = batch.some(b => b.filename.substring(0, 4) === prefix);
+                const isColorConflict = batch.some(b => areColorsSimilar(b.color, p.color, 100));
+
+                if (!isLocationConflict && !isColorConflict) {
+                    batch.push(p);
+                    photoPool.splice(i, 1);
+                } else {
+                    i++;
+                }
+            }
+            // Relaxed fill
+            if (batch.length < targetCount) {
+                let j = 0;
+                while (batch.length < targetCount && j < photoPool.length) {
+                    const p = photoPool[j];
+                    const prefix = p.filename.substring(0, 4);
+                    const isLocationConflict = batch.some(b => b.filename.substring(0, 4) === prefix);
+                    if (!isLocationConflict) {
+                        batch.push(p);
+                        photoPool.splice(j, 1);
+                    } else {
+                        j++;
+                    }
+                }
+            }
+
+            // Adjust layout if batch is smaller than target (end of pool)
+            if (!isMobile) {
+                const count = batch.length;
+                if (count === 1) finalLayout = 1;
+                else if (count === 2) finalLayout = 2;
+                else if (count === 3 && (finalLayout !== 3 && finalLayout !== 5)) finalLayout = 3;
+                else if (count === 4) finalLayout = 4;
+            }
+
+            pages.push({ batch, finalLayout });
+        }
+        return pages;
     };
 
     // --- 7. Magazine Mode (Online Art Album/Gallery) ---
@@ -1535,8 +1714,9 @@ document.addEventListener('DOMContentLoaded', () => {
             });
         }
 
-        // 2. Random shuffle
-        photoPool.sort(() => 0.5 - Math.random());
+        // 2. Precomputed page sequence (magazine_layouts.js); otherwise random shuffle + runtime layout
+        const plannedMagazine = getPlannedMagazine(isMobile);
+        if (!plannedMagazine) photoPool.sort(() => 0.5 - Math.random());
 
         // 3. Generate Slides
         magazineWrapper.innerHTML = '';
@@ -1544,10 +1724,9 @@ document.addEventListener('DOMContentLoaded', () => {
         // Helper for Image HTML (Shared)
         const getImg = (p, className = "") => {
             const title = p.filename.replace(/[-_(\（].*|\.\w+$/g, '').trim();
-            const src = `./public/photos/${encodeURIComponent(p.category)}/${encodeURIComponent(p.filename)}`;
             return `
                 <div class="relative group w-full h-full overflow-hidden rounded-lg shadow-md transition-transform duration-500 hover:-translate-y-1 hover:shadow-xl bg-gray-50 min-h-0">
-                    <img src="${src}" alt="${escapeHTML(title)}" loading="lazy" class="w-full h-full ${className}">
+                    <picture class="block w-full h-full">${getPictureHTML(p, MAGAZINE_IMAGE_SIZES, `alt="${escapeHTML(title)}" loading="lazy" class="w-full h-full ${className}"`)}</picture>
                     <div class="absolute bottom-0 left-0 w-full bg-gradient-to-t from-black/60 to-transparent p-3 opacity-0 group-hover:opacity-100 transition-opacity duration-300">
                          <p class="text-white text-xs md:text-sm font-medium tracking-widest text-shadow truncate">${escapeHTML(title)}</p>
                     </div>
@@ -1555,11 +1734,11 @@ document.addEventListener('DOMContentLoaded', () => {
         };
 
         // --- Cover Slide Generator ---
-        const generateCoverSlide = (pool) => {
+        const generateCoverSlide = (pool, plannedCover) => {
             const earthPhotos = pool.filter(p => p.category === "大地映像");
-            const coverPhoto = earthPhotos.length > 0
+            const coverPhoto = plannedCover || (earthPhotos.length > 0
                 ? earthPhotos[Math.floor(Math.random() * earthPhotos.length)]
-                : pool[Math.floor(Math.random() * pool.length)];
+                : pool[Math.floor(Math.random() * pool.length)]);
 
             if (!coverPhoto) return;
 
@@ -1639,69 +1818,11 @@ document.addEventListener('DOMContentLoaded', () => {
             magazineWrapper.appendChild(slide);
         };
 
-        generateCoverSlide(photoPool);
+        generateCoverSlide(photoPool, plannedMagazine && plannedMagazine.cover);
 
         // --- Content Slides Generator ---
-        while (photoPool.length > 0) {
-            let targetCount = 1;
-            let finalLayout = 1;
-
-            if (isMobile) {
-                // --- Mobile: Always 2 photos, Vertical Split ---
-                targetCount = 2;
-                finalLayout = 'mobile-vertical';
-            } else {
-                // --- Desktop: Random 1-5 ---
-                const layoutType = Math.floor(Math.random() * 5) + 1;
-                if (layoutType === 2) targetCount = 2;
-                if (layoutType === 3 || layoutType === 5) targetCount = 3;
-                if (layoutType === 4) targetCount = 4;
-                finalLayout = layoutType;
-            }
-
-            // Select photos
-            const batch = [];
-            if (photoPool.length > 0) batch.push(photoPool.shift());
-
-            let i = 0;
-            while (batch.length < targetCount && i < photoPool.length) {
-                const p = photoPool[i];
-                const prefix = p.filename.substring(0, 4);
-                const isLocationConflict = batch.some(b => b.filename.substring(0, 4) === prefix);
-                const isColorConflict = batch.some(b => areColorsSimilar(b.color, p.color, 100));
-
-                if (!isLocationConflict && !isColorConflict) {
-                    batch.push(p);
-                    photoPool.splice(i, 1);
-                } else {
-                    i++;
-                }
-            }
-            // Relaxed fill
-            if (batch.length < targetCount) {
-                let j = 0;
-                while (batch.length < targetCount && j < photoPool.length) {
-                    const p = photoPool[j];
-                    const prefix = p.filename.substring(0, 4);
-                    const isLocationConflict = batch.some(b => b.filename.substring(0, 4) === prefix);
-                    if (!isLocationConflict) {
-                        batch.push(p);
-                        photoPool.splice(j, 1);
-                    } else {
-                        j++;
-                    }
-                }
-            }
-
-            // Adjust layout if batch is smaller than target (end of pool)
-            if (!isMobile) {
-                const count = batch.length;
-                if (count === 1) finalLayout = 1;
-                else if (count === 2) finalLayout = 2;
-                else if (count === 3 && (finalLayout !== 3 && finalLayout !== 5)) finalLayout = 3;
-                else if (count === 4) finalLayout = 4;
-            }
-
+        const pages = plannedMagazine ? plannedMagazine.pages : buildMagazinePages(photoPool, isMobile);
+        pages.forEach(({ batch, finalLayout }) => {
             const slide = document.createElement('div');
             // Unified Padding for Consistency
             slide.className = 'swiper-slide flex items-center justify-center p-1 md:p-4 box-border';
@@ -1775,7 +1896,7 @@ document.addEventListener('DOMContentLoaded', () => {
 
             slide.innerHTML = containerHtmlStart + innerHtml + containerHtmlEnd;
             magazineWrapper.appendChild(slide);
-        }
+        });
 
         // Theme: Switch Modal to Light Mode
         magazineModal.classList.remove('bg-black/95');
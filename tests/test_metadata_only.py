@@ -0,0 +1,83 @@
+"""
+--metadata-only 在沒有建置清單時 (剛 clone，.photo_build_manifest.json 不納入版本控制) 的行為。
+執行：python -m pytest -q tests (或 python -m unittest discover tests)
+"""
+import io
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generate_photo_list as gpl  # noqa: E402
+
+TAG_MODEL = 272
+
+
+class MetadataOnlyWithoutManifestTest(unittest.TestCase):
+    def setUp(self):
+        self.original_cwd = os.getcwd()
+        self.temp_dir = tempfile.mkdtemp()
+        os.chdir(self.temp_dir)
+        for category in gpl.portfolio_categories:
+            os.makedirs(os.path.join(gpl.source_parent_folder, category))
+            os.makedirs(os.path.join(gpl.output_parent_folder, 'photos', category))
+        os.makedirs(os.path.join(gpl.output_parent_folder, 'js'))
+
+        exif = Image.Exif()
+        exif[TAG_MODEL] = 'FC3582'
+        Image.new('RGB', (64, 48), (200, 120, 40)).save('photos/城市光影/港口.jpg', exif=exif.tobytes())
+        shutil.copy('photos/城市光影/港口.jpg', 'public/photos/城市光影/港口.jpg')
+
+        self.variants = {"width": [640], "height": [480], "format": ["jpg"], "file": ["港口.jpg"], "bytes": [1234]}
+        self.published = {
+            "城市光影": [{"filename": "港口.jpg", "color": [200, 120, 40], "variants": self.variants, "similar": 1}],
+            "大地映像": [],
+        }
+        gpl.write_text_atomic('public/js/data_photos.js', gpl.build_photo_data_js(self.published))
+        gpl.write_text_atomic(gpl.magazine_layouts_file, 'window.magazineLayouts = {"version": 1};\n')
+
+    def tearDown(self):
+        os.chdir(self.original_cwd)
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def refresh(self):
+        with redirect_stdout(io.StringIO()):
+            return gpl.refresh_metadata_only(map_markers=False)
+
+    def read(self, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_keeps_published_entries(self):
+        self.assertFalse(os.path.exists(gpl.build_manifest_file))
+        self.assertTrue(self.refresh())
+
+        data = gpl.load_photo_data()
+        self.assertEqual([item["filename"] for item in data["城市光影"]], ["港口.jpg"])
+        item = data["城市光影"][0]
+        self.assertEqual(item["color"], [200, 120, 40])
+        self.assertEqual(item["variants"], self.variants)
+        self.assertEqual(item["similar"], 1)
+        self.assertEqual(item["camera"], 'FC3582')
+        self.assertIn('"photos":[[0,"港口.jpg"]]', self.read(gpl.magazine_layouts_file))
+
+    def test_aborts_without_writing_when_photo_was_never_built(self):
+        Image.new('RGB', (64, 48), (20, 80, 160)).save('photos/大地映像/新照片.jpg')
+        data_before = self.read('public/js/data_photos.js')
+        layouts_before = self.read(gpl.magazine_layouts_file)
+
+        self.assertFalse(self.refresh())
+
+        self.assertEqual(self.read('public/js/data_photos.js'), data_before)
+        self.assertEqual(self.read(gpl.magazine_layouts_file), layouts_before)
+        self.assertFalse(os.path.exists(gpl.build_manifest_file))
+
+
+if __name__ == '__main__':
+    unittest.main()